@@ -7,6 +7,7 @@ HERE = pathlib.Path(__file__).parent
 README = (HERE / "README.md").read_text()
 INSTALL_REQUIRED = (HERE / "requirements.txt").read_text()
 IMAGE_EXTRA_REQUIRED = (HERE / "image_extra_requirements.txt").read_text()
+ASYNC_EXTRA_REQUIRED = (HERE / "async_extra_requirements.txt").read_text()
 SETUP_REQUIRED = (HERE / "setup_requirements.txt").read_text()
 TEST_REQUIRED = (HERE / "test_requirements.txt").read_text()
 
@@ -29,6 +30,7 @@ setup(
     install_requires=INSTALL_REQUIRED,
     extras_require={
         "Images": IMAGE_EXTRA_REQUIRED,
+        "Async": ASYNC_EXTRA_REQUIRED,
     },
     classifiers=[
         'Development Status :: 3 - Alpha',
@@ -0,0 +1,59 @@
+"""Memory used per vehicle in the addressable tree
+
+Run with python -m tests.benchmark_memory [numberOfVehicles]
+"""
+import gc
+import logging
+import sys
+import tracemalloc
+
+from weconnect.addressable import AddressableLeaf
+from weconnect.domain import Domain
+from weconnect.weconnect import WeConnect
+
+
+def selectiveStatus():
+    # Every status known to Vehicle.updateStatus without values, so all attributes of the tree are created
+    data = {}
+    for domain in Domain:
+        data[domain.value] = {key: {'value': {}} for key in ['accessStatus', 'climatisationTimer', 'chargingProfiles', 'capabilitiesStatus',
+                                                             'batteryStatus', 'chargingStatus', 'chargingSettings', 'chargeMode', 'plugStatus',
+                                                             'chargingCareSettings', 'climatisationStatus', 'climatisationSettings',
+                                                             'windowHeatingStatus', 'auxiliaryHeatingStatus', 'climatisationTimersStatus',
+                                                             'activeVentilationTimersStatus', 'auxiliaryHeatingTimersStatus',
+                                                             'departureTimersStatus', 'rangeStatus', 'lightsStatus', 'lvBatteryStatus',
+                                                             'readinessStatus', 'maintenanceStatus', 'warningLights', 'oilLevelStatus',
+                                                             'odometerStatus', 'temperatureBatteryStatus', 'temperatureOutsideStatus',
+                                                             'fuelLevelStatus', 'batterySupportStatus']}
+    return data
+
+
+def main(numberOfVehicles=50):
+    logging.getLogger('weconnect').setLevel(logging.CRITICAL)
+    vins = [f'WVWZZZ{i:011d}' for i in range(numberOfVehicles)]
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+
+    def fetchData(url, *args, **kwargs):
+        if url == WeConnect.VEHICLES_URL:
+            return {'data': [{'vin': vin, 'model': 'ID.3', 'nickname': 'Car', 'capabilities': []} for vin in vins]}
+        if 'selectivestatus' in url:
+            return selectiveStatus()
+        return None
+    weConnect.fetchData = fetchData
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    weConnect.update(updatePictures=False)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    leaves = len([element for element in gc.get_objects() if isinstance(element, AddressableLeaf)])
+    print(f'{numberOfVehicles} vehicles, {leaves // numberOfVehicles} elements per vehicle')
+    print(f'{allocated // numberOfVehicles} bytes per vehicle, {allocated // leaves} bytes per element')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
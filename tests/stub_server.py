@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer():
+    """Local stand-in for the VW servers. Routes map a path to a callable getting the request handler and returning (status, headers, body)"""
+
+    def __init__(self, routes=None, delay=0.0):
+        self.routes = routes or {}
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def do_POST(self):
+                stub.handle(self)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def handle(self, handler):
+        with self.lock:
+            self.requests.append((handler.command, handler.path, dict(handler.headers)))
+            self.connections.add(handler.client_address)
+        if 'Content-Length' in handler.headers:
+            handler.rfile.read(int(handler.headers['Content-Length']))
+        if self.delay:
+            time.sleep(self.delay)
+        route = self.routes.get(handler.path.partition('?')[0])
+        if route is None:
+            status, headers, body = 404, {}, b''
+        else:
+            status, headers, body = route(handler)
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            headers = {'Content-Type': 'application/json', **headers}
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def count(self, path):
+        with self.lock:
+            return len([request for request in self.requests if request[1].partition('?')[0] == path])
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 
 from weconnect import addressable
@@ -205,3 +207,293 @@ def test_AdressableObjectLeafChildren():
     assert children[0] == addressableObject
     assert children[1] == childAddressableLeaf1
     assert children[2] == childAddressableLeaf2
+
+
+def test_LazyImageAttribute(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    import io  # pylint: disable=import-outside-toplevel
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, format='PNG')
+    png = buffer.getvalue()
+
+    parent = addressable.AddressableObject(localAddress='pictures', parent=None)
+    attribute = addressable.LazyImageAttribute(localAddress='car', parent=parent)
+    changes = []
+    attribute.addObserver(lambda element, flags: changes.append(flags), flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED)
+
+    attribute.setEncodedWithCarTime(png, fromServer=True)
+    assert attribute.enabled
+    assert not attribute.decoded
+    # The original bytes are written without decoding
+    attribute.saveToFile(str(tmp_path / 'car.png'))
+    assert (tmp_path / 'car.png').read_bytes() == png
+    assert not attribute.decoded
+
+    assert attribute.value.size == (10, 10)
+    assert attribute.decoded
+    attribute.release()
+    assert not attribute.decoded
+    assert attribute.value.size == (10, 10)
+
+    attribute.setEncodedWithCarTime(png, fromServer=True)
+    assert len(changes) == 1
+
+    # Decoded images are compared by identity and encoded when released
+    image = Image.new('RGB', (20, 20), 'blue')
+    attribute.setValueWithCarTime(image, fromServer=True)
+    attribute.setValueWithCarTime(image, fromServer=True)
+    assert len(changes) == 2
+    attribute.release()
+    assert attribute.encoded.startswith(addressable.LazyImageAttribute.PNG_SIGNATURE)
+    assert attribute.value.size == (20, 20)
+    assert attribute.toJSON() is None
+
+
+def test_asciiArtCache(monkeypatch):
+    Image = pytest.importorskip('PIL.Image')
+    if not addressable.SUPPORT_ASCII_IMAGES:
+        pytest.skip('ascii_magic is not installed')
+    rendered = []
+    imgToASCIIArt = addressable.imgToASCIIArt
+    monkeypatch.setattr(addressable, 'imgToASCIIArt', lambda img, **kwargs: rendered.append(kwargs) or imgToASCIIArt(img, **kwargs))
+
+    parent = addressable.AddressableObject(localAddress='pictures', parent=None)
+    attribute = addressable.LazyImageAttribute(localAddress='car', parent=parent, value=Image.new('RGB', (10, 10), 'red'))
+    first = str(attribute)
+    assert str(attribute) == first
+    attribute.asciiArt(columns=40)
+    attribute.asciiArt(columns=40)
+    assert len(rendered) == 2
+
+    # Released images are not decoded again to be rendered
+    attribute.release()
+    assert str(attribute) == first
+    assert not attribute.decoded
+
+    attribute.setValueWithCarTime(Image.new('RGB', (10, 10), 'blue'))
+    str(attribute)
+    assert len(rendered) == 3
+
+
+def test_compactLayout():
+    parent = addressable.AddressableObject(localAddress='parent', parent=None)
+    attribute = addressable.ChangeableAttribute(localAddress='attribute', parent=parent, value=1, valueType=int)
+    # Observer sets are only created when needed
+    assert attribute._AddressableLeaf__observers is None  # pylint: disable=protected-access
+    assert attribute.getObservers(addressable.AddressableLeaf.ObserverEvent.ALL) == []
+    attribute.removeObserver(print)
+
+    def observer(element, flags):
+        pass
+    attribute.addObserver(observer, flag=addressable.AddressableLeaf.ObserverEvent.ALL)
+    assert attribute.getObservers(addressable.AddressableLeaf.ObserverEvent.ALL) == [observer]
+
+    # All fields of attributes are stored in slots
+    for cls in type(attribute).__mro__:
+        if issubclass(cls, addressable.AddressableAttribute):
+            assert '__slots__' in cls.__dict__
+    assert not attribute.__dict__
+
+
+def test_observerIndex():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    parent = addressable.AddressableObject(localAddress='parent', parent=root)
+    attribute = addressable.AddressableAttribute(localAddress='attribute', parent=parent, value=None, valueType=int)
+    calls = []
+
+    def rootObserver(element, flags):
+        calls.append(('root', element.localAddress))
+
+    def parentObserver(element, flags):
+        calls.append(('parent', element.localAddress))
+
+    root.addObserver(rootObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                     priority=addressable.AddressableLeaf.ObserverPriority.USER_LOW)
+    parent.addObserver(parentObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                       priority=addressable.AddressableLeaf.ObserverPriority.USER_HIGH)
+    attribute.setValueWithCarTime(1)
+    assert calls == [('parent', 'attribute'), ('root', 'attribute')]
+
+    # Lookups are cached until observers change
+    assert attribute.getObservers(addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED) == [parentObserver, rootObserver]
+    parent.removeObserver(parentObserver)
+    assert attribute.getObservers(addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED) == [rootObserver]
+
+    # or the element is moved
+    attribute.parent = addressable.AddressableObject(localAddress='other', parent=None)
+    assert attribute.getObservers(addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED) == []
+
+
+def test_removeObserver():
+    leaf = addressable.AddressableLeaf(localAddress='leaf', parent=None)
+
+    def observe1(element, flags):
+        pass
+
+    def observe2(element, flags):
+        pass
+
+    leaf.addObserver(observe1, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED)
+    leaf.addObserver(observe1, flag=addressable.AddressableLeaf.ObserverEvent.ENABLED)
+    leaf.addObserver(observe2, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED)
+
+    # Only the given observer is removed, with a flag only the registration with this flag
+    leaf.removeObserver(observe1, flag=addressable.AddressableLeaf.ObserverEvent.ENABLED)
+    assert sorted(leaf.getObservers(addressable.AddressableLeaf.ObserverEvent.ALL), key=lambda observer: observer.__name__) == [observe1, observe2]
+    leaf.removeObserver(observe1)
+    assert leaf.getObservers(addressable.AddressableLeaf.ObserverEvent.ALL) == [observe2]
+    # Observers can be added again after removing
+    leaf.addObserver(observe1, flag=addressable.AddressableLeaf.ObserverEvent.ALL)
+    assert len(leaf.getObservers(addressable.AddressableLeaf.ObserverEvent.ALL)) == 2
+
+
+def test_updateTransaction():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    first = addressable.AddressableAttribute(localAddress='first', parent=root, value=None, valueType=int)
+    second = addressable.AddressableAttribute(localAddress='second', parent=root, value=None, valueType=int)
+    calls = []
+
+    def lowObserver(element, flags):
+        calls.append(('low', element.localAddress, element.value))
+
+    def highObserver(element, flags):
+        calls.append(('high', element.localAddress, element.value))
+
+    def completeObserver(element, flags):
+        calls.append(('complete', element.localAddress, element.value))
+
+    root.addObserver(lowObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                     priority=addressable.AddressableLeaf.ObserverPriority.USER_LOW)
+    second.addObserver(highObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                       priority=addressable.AddressableLeaf.ObserverPriority.USER_HIGH)
+    root.addObserver(completeObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, onUpdateComplete=True)
+
+    with root.updateTransaction():
+        first.setValueWithCarTime(1)
+        first.setValueWithCarTime(2)
+        second.setValueWithCarTime(3)
+        # Nested transactions join the outer one
+        with root.updateTransaction():
+            second.setValueWithCarTime(4)
+        assert calls == []
+    # Every changed element is notified once, ordered by priority and then by the order of the changes
+    assert calls == [('high', 'second', 4), ('low', 'first', 2), ('low', 'second', 4), ('complete', 'first', 2), ('complete', 'second', 4)]
+    assert addressable.UpdateTransaction.active == 0
+
+    # Observers are notified even if the update fails
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        with root.updateTransaction():
+            first.setValueWithCarTime(5)
+            raise RuntimeError('update failed')
+    assert calls == [('low', 'first', 5), ('complete', 'first', 5)]
+
+    # Without a transaction observers are notified immediately
+    calls.clear()
+    first.setValueWithCarTime(6)
+    assert calls == [('low', 'first', 6)]
+    root.updateComplete()
+    assert calls == [('low', 'first', 6), ('complete', 'first', 6)]
+
+
+def test_updateTransactionSeveralTrees():
+    calls = []
+
+    def completeObserver(element, flags):
+        calls.append(element.getGlobalAddress())
+
+    roots = []
+    attributes = []
+    for name in ['first', 'second']:
+        root = addressable.AddressableObject(localAddress=name, parent=None)
+        root.addObserver(completeObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, onUpdateComplete=True)
+        roots.append(root)
+        attributes.append(addressable.AddressableAttribute(localAddress='attribute', parent=root, value=None, valueType=int))
+
+    # Changed outside of a transaction, only a transaction on the same tree may flush it
+    attributes[1].setValueWithCarTime(1)
+    with roots[0].updateTransaction():
+        attributes[0].setValueWithCarTime(2)
+    assert calls == ['first/attribute']
+    with roots[1].updateTransaction():
+        pass
+    assert calls == ['first/attribute', 'second/attribute']
+
+
+def test_updateTransactionFailingObserver():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    first = addressable.AddressableAttribute(localAddress='first', parent=root, value=None, valueType=int)
+    second = addressable.AddressableAttribute(localAddress='second', parent=root, value=None, valueType=int)
+    calls = []
+
+    def failingObserver(element, flags):
+        raise ValueError('observer failed')
+
+    def observer(element, flags):
+        calls.append(element.localAddress)
+
+    def completeObserver(element, flags):
+        calls.append(('complete', element.localAddress))
+
+    root.addObserver(failingObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                     priority=addressable.AddressableLeaf.ObserverPriority.USER_HIGH)
+    root.addObserver(failingObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, onUpdateComplete=True)
+    root.addObserver(completeObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, onUpdateComplete=True,
+                     priority=addressable.AddressableLeaf.ObserverPriority.USER_LOW)
+    root.addObserver(observer, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                     priority=addressable.AddressableLeaf.ObserverPriority.USER_LOW)
+    with root.updateTransaction():
+        first.setValueWithCarTime(1)
+        second.setValueWithCarTime(2)
+    assert calls == ['first', 'second', ('complete', 'first'), ('complete', 'second')]
+    assert first.onCompleteNotifyFlags is None
+    assert second.onCompleteNotifyFlags is None
+
+
+def test_updateTransactionJoinedOutlivesOwner():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    attribute = addressable.AddressableAttribute(localAddress='attribute', parent=root, value=None, valueType=int)
+    calls = []
+
+    def observer(element, flags):
+        calls.append('changed')
+
+    def completeObserver(element, flags):
+        calls.append('complete')
+
+    root.addObserver(observer, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED)
+    root.addObserver(completeObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, onUpdateComplete=True)
+
+    # Two updates running at the same time, the one that joined finishes last
+    outer = root.updateTransaction()
+    inner = root.updateTransaction()
+    outer.__enter__()
+    inner.__enter__()
+    outer.__exit__(None, None, None)
+    attribute.setValueWithCarTime(1)
+    assert calls == []
+    inner.__exit__(None, None, None)
+    assert calls == ['changed', 'complete']
+    assert addressable.UpdateTransaction.active == 0
+
+
+def test_updateTransactionThreads():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    attributes = [addressable.AddressableAttribute(localAddress=f'attribute{index}', parent=root, value=None, valueType=int) for index in range(8)]
+    calls = []
+    root.addObserver(lambda element, flags: calls.append(element.localAddress), flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED,
+                     onUpdateComplete=True)
+    barrier = threading.Barrier(len(attributes))
+
+    def update(attribute):
+        with root.updateTransaction():
+            barrier.wait(timeout=5)
+            attribute.setValueWithCarTime(1)
+
+    threads = [threading.Thread(target=update, args=(attribute,)) for attribute in attributes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert sorted(calls) == sorted(attribute.localAddress for attribute in attributes)
+    assert addressable.UpdateTransaction.active == 0
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from tests.stub_server import StubServer
+
+aiohttp = pytest.importorskip('aiohttp')
+from weconnect.async_weconnect import AsyncWeConnect  # noqa: E402 # pylint: disable=wrong-import-position
+from weconnect.errors import RetrievalError  # noqa: E402 # pylint: disable=wrong-import-position
+from weconnect.weconnect import WeConnect  # noqa: E402 # pylint: disable=wrong-import-position
+
+
+@pytest.fixture
+def weConnect(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    weConnect = AsyncWeConnect(username='test', password='test', maxAge=300)
+    weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+    return weConnect
+
+
+def test_fetchDataAsync(weConnect):
+    routes = {'/data': lambda handler: (200, {}, {'data': handler.headers['Authorization']})}
+    with StubServer(routes=routes) as server:
+        async def fetch():
+            try:
+                first = await weConnect.fetchDataAsync(f'{server.url}/data')
+                second = await weConnect.fetchDataAsync(f'{server.url}/data')
+                return first, second
+            finally:
+                await weConnect.close()
+
+        first, second = asyncio.run(fetch())
+        assert first == {'data': 'Bearer token'}
+        assert second == first
+        # Second call is served from the cache
+        assert server.count('/data') == 1
+        assert weConnect.getTotalElapsed() is not None
+
+
+def test_fetchDataAsyncConcurrent(weConnect):
+    routes = {'/data': lambda handler: (200, {}, {'path': handler.path})}
+    with StubServer(routes=routes, delay=0.2) as server:
+        async def fetchAll():
+            try:
+                return await asyncio.gather(*[weConnect.fetchDataAsync(f'{server.url}/data?id={i}') for i in range(20)])
+            finally:
+                await weConnect.close()
+
+        start = time.monotonic()
+        results = asyncio.run(fetchAll())
+        assert time.monotonic() - start < 20 * 0.2 / 2
+        assert [result['path'] for result in results] == [f'/data?id={i}' for i in range(20)]
+
+
+def test_fetchDataAsyncErrors(weConnect):
+    routes = {'/notfound': lambda handler: (404, {}, b''),
+              '/empty': lambda handler: (200, {}, b'')}
+    with StubServer(routes=routes) as server:
+        async def fetch():
+            try:
+                with pytest.raises(RetrievalError):
+                    await weConnect.fetchDataAsync(f'{server.url}/notfound')
+                assert await weConnect.fetchDataAsync(f'{server.url}/notfound', allowHttpError=True, allowedErrors=[404]) is None
+                assert await weConnect.fetchDataAsync(f'{server.url}/empty', allowEmpty=True) is None
+            finally:
+                await weConnect.close()
+
+        asyncio.run(fetch())
+
+
+def vehicleRoutes(vins):
+    status = {'access': {'accessStatus': {'value': {'carCapturedTimestamp': '2024-01-01T00:00:00Z', 'overallStatus': 'safe',
+                                                    'doors': [], 'windows': []}}}}
+    routes = {'/vehicle/v1/vehicles': lambda handler: (200, {}, {'data': [{'vin': vin, 'model': 'ID.3', 'capabilities': []} for vin in vins]})}
+    for vin in vins:
+        routes[f'/vehicle/v1/vehicles/{vin}/selectivestatus'] = lambda handler: (200, {}, status)
+        routes[f'/vehicle/v1/vehicles/{vin}/parkingposition'] = lambda handler: (204, {}, b'')
+        for tripType in ['shortterm', 'longterm', 'cyclic']:
+            routes[f'/vehicle/v1/trips/{vin}/{tripType}/last'] = lambda handler: (204, {}, b'')
+        routes[f'/media/v2/vehicle-images/{vin}'] = lambda handler: (200, {}, {'data': []})
+    return routes
+
+
+def test_update(weConnect, monkeypatch):
+    vins = [f'WVWZZZ{i:011d}' for i in range(2)]
+    synchronousFetches = []
+    monkeypatch.setattr(WeConnect, 'fetchData', lambda self, url, *args, **kwargs: synchronousFetches.append(url))
+    monkeypatch.setattr(WeConnect, 'fetchImageData', lambda self, url, *args, **kwargs: synchronousFetches.append(url))
+
+    with StubServer(routes=vehicleRoutes(vins)) as server:
+        get = weConnect.asyncSession.get
+
+        async def getFromStub(url, **kwargs):
+            return await get(url.replace('https://emea.bff.cariad.digital', server.url), **kwargs)
+        monkeypatch.setattr(weConnect.asyncSession, 'get', getFromStub)
+
+        async def update():
+            try:
+                # Two updates running at the same time each use their own prefetched data
+                await asyncio.gather(weConnect.update(), weConnect.update())
+            finally:
+                await weConnect.close()
+
+        asyncio.run(update())
+
+        assert synchronousFetches == []
+        assert list(weConnect.vehicles.keys()) == vins
+        for vin, vehicle in weConnect.vehicles.items():
+            assert vehicle.model.value == 'ID.3'
+            assert vehicle.domains['access']['accessStatus'].overallStatus.value.value == 'safe'
+            # Once for each of the updates, building the tree did not fetch anything
+            assert server.count(f'/vehicle/v1/vehicles/{vin}/selectivestatus') == 2
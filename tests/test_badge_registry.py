@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weconnect.elements.vehicle import Vehicle
+
+pytest.importorskip('PIL.Image')
+from weconnect.elements.helpers.badge_registry import BADGES, BadgeRegistry  # noqa: E402 # pylint: disable=wrong-import-position
+
+
+def test_allBadges():
+    for badge in Vehicle.Badge:
+        badgeImage = BADGES[badge.value]
+        assert badgeImage.mode == 'RGBA'
+        assert max(badgeImage.size) <= 100
+        assert BADGES[badge.value] is badgeImage
+
+
+def test_loadedOnce():
+    registry = BadgeRegistry(BADGES.directory)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        badgeImages = list(executor.map(lambda _: registry['warning'], range(32)))
+    assert all(badgeImage is badgeImages[0] for badgeImage in badgeImages)
+    assert len(registry) == 1
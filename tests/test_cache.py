@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from weconnect.cache import MemoryCache, SQLiteCache
+from weconnect.weconnect import WeConnect
+
+
+def test_lruEviction():
+    cache = MemoryCache(maxEntries=2)
+    cache.put('a', {'value': 1})
+    cache.put('b', {'value': 2})
+    assert cache.get('a').data == {'value': 1}
+    cache.put('c', {'value': 3})
+    # b was used least recently
+    assert cache.keys() == ['a', 'c']
+    assert cache.get('b') is None
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 1, 'evictions': 1}
+
+
+def test_maxBytes():
+    cache = MemoryCache(maxBytes=100)
+    cache.put('a', b'x' * 60)
+    cache.put('b', b'x' * 30)
+    assert cache.size == 90
+    cache.put('c', b'x' * 30)
+    assert 'a' not in cache
+    assert cache.size == 60
+
+
+def test_ttl():
+    cache = MemoryCache(ttl=0.1)
+    cache.put('a', {'value': 1})
+    cache.put('b', {'value': 2}, storedAt=time.time() - 1)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    time.sleep(0.15)
+    assert cache.get('a') is None
+    assert cache.evictions == 2
+
+
+def test_sizeFromResponse(monkeypatch):
+    cache = MemoryCache(maxBytes=100)
+
+    def sizeOf(data):
+        raise AssertionError('data must not be serialized to get its size')
+    monkeypatch.setattr(MemoryCache, 'sizeOf', staticmethod(sizeOf))
+    cache.put('a', {'value': 1}, size=60)
+    cache.touch('a')
+    assert cache.size == 60
+    cache.put('b', {'value': 2}, size=50)
+    assert 'a' not in cache
+    assert cache.size == 50
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_ageIgnoresClockChanges(monkeypatch, tmp_path, backend):
+    cache = MemoryCache() if backend == 'memory' else SQLiteCache(str(tmp_path / 'cache.db'))
+    cache.put('fetched', {'value': 1})
+    cache.put('loaded', {'value': 2}, storedAt=time.time() - 100)
+    assert cache.peek('loaded').age >= 100
+    # The system clock is set back by an hour
+    wallClock = time.time() - 3600
+    monkeypatch.setattr(time, 'time', lambda: wallClock)
+    assert 0 <= cache.peek('fetched').age < 10
+    assert 100 <= cache.peek('loaded').age < 110
+    cache.close()
+
+
+def test_jsonPersistence(tmp_path):
+    cacheFile = tmp_path / 'cache.json'
+    # Format written by previous versions
+    cacheFile.write_text(json.dumps({'https://example.com/data': [{'value': 1}, '2024-01-01 10:00:00.000000'],
+                                     'https://example.com/image': ['aW1hZ2U=', '2024-01-01 10:00:00.000000', {'ETag': '"1"'}]}))
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+    weConnect.fillCacheFromJson(str(cacheFile), maxAge=300)
+    assert weConnect.cache['https://example.com/data'].data == {'value': 1}
+    assert weConnect.cache['https://example.com/image'].validators == {'ETag': '"1"'}
+    assert weConnect.lookupCache('https://example.com/data', maxAge=300) == ({'value': 1}, False)
+
+    weConnect.cache.put('https://example.com/image', b'image')
+    assert weConnect.lookupCache('https://example.com/image', maxAge=300) == (b'image', True)
+    weConnect.persistCacheAsJson(str(cacheFile))
+    persisted = json.loads(cacheFile.read_text())
+    assert persisted['https://example.com/image'][0] == 'aW1hZ2U='
+    assert persisted['https://example.com/data'] == [{'value': 1}, '2024-01-01 10:00:00']
+
+
+def test_sqlitePersistence(tmp_path):
+    cacheFile = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(cacheFile)
+    cache.put('https://example.com/data', {'value': 1}, validators={'ETag': '"1"'})
+    cache.put('https://example.com/image', b'\x89PNG')
+    cache.close()
+
+    cache = SQLiteCache(cacheFile)
+    assert cache.get('https://example.com/data').data == {'value': 1}
+    assert cache.get('https://example.com/data').validators == {'ETag': '"1"'}
+    assert cache.get('https://example.com/image').data == b'\x89PNG'
+    assert cache.get('https://example.com/missing') is None
+    assert sorted(cache.keys()) == ['https://example.com/data', 'https://example.com/image']
+    assert cache.stats() == {'entries': 2, 'hits': 3, 'misses': 1, 'evictions': 0}
+    # Json cache files can be imported and exported
+    assert cache.toDict()['https://example.com/image'][0] == 'iVBORw=='
+    cache.delete('https://example.com/image')
+    assert 'https://example.com/image' not in cache
+    cache.close()
+
+
+def test_sqliteRecovery(tmp_path):
+    cacheFile = tmp_path / 'cache.db'
+    cacheFile.write_bytes(b'this is not a database' * 100)
+    cache = SQLiteCache(str(cacheFile))
+    cache.put('a', {'value': 1})
+    assert cache.get('a').data == {'value': 1}
+    cache.close()
+    # The damaged file is kept for inspection
+    assert len(list(tmp_path.glob('cache.db.corrupt-*'))) == 1
+
+
+def test_sqliteFailedImport(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'))
+    cache.put('a', {'value': 1})
+    with pytest.raises(TypeError):
+        cache.fromDict({'b': [{'value': 2}, '2024-01-01 00:00:00'], 'c': [object(), '2024-01-01 00:00:00']})
+    # Nothing of the failed import was written and the previous content is kept
+    assert cache.keys() == ['a']
+
+    # Database errors roll back the import as well
+    connection = sqlite3.connect(str(tmp_path / 'cache.db'))
+    connection.execute("CREATE TRIGGER failing BEFORE INSERT ON cache WHEN NEW.key = 'c' BEGIN SELECT RAISE(ABORT, 'injected failure'); END")
+    connection.close()
+    cache.fromDict({'b': [{'value': 2}, '2024-01-01 00:00:00'], 'c': [{'value': 3}, '2024-01-01 00:00:00']})
+    assert cache.keys() == ['a']
+    assert cache.get('a').data == {'value': 1}
+    cache.close()
+    # A database that can not be used is logged instead of raising
+    cache.delete('a')
+    cache.clear()
+    assert cache.keys() == []
+
+
+def test_corruptJsonIsKept(tmp_path):
+    cacheFile = tmp_path / 'cache.json'
+    cacheFile.write_text('{"broken')
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+    weConnect.fillCacheFromJson(str(cacheFile), maxAge=300)
+    assert not cacheFile.exists()
+    assert len(list(tmp_path.glob('cache.json.corrupt-*'))) == 1
@@ -0,0 +1,48 @@
+import base64
+import io
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+from weconnect.elements.helpers.icon_cache import IconCache  # noqa: E402 # pylint: disable=wrong-import-position
+from weconnect.elements.warning_lights_status import WarningLightsStatus  # noqa: E402 # pylint: disable=wrong-import-position
+
+
+def encodedIcon(color):
+    buffer = io.BytesIO()
+    Image.new('RGBA', (128, 128), color).save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def test_sharedIcons():
+    cache = IconCache()
+    icon = cache.get(encodedIcon('red'))
+    assert cache.get(encodedIcon('red')) is icon
+    assert cache.get(encodedIcon('yellow')) is not icon
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    resized = cache.resized(icon, (64, 64))
+    assert resized.size == (64, 64)
+    assert cache.resized(icon, (64, 64)) is resized
+    # Images not returned by the cache are resized without caching
+    other = Image.new('RGBA', (128, 128), 'red')
+    assert cache.resized(other, (64, 64)) is not cache.resized(other, (64, 64))
+
+
+def test_eviction():
+    cache = IconCache(maxEntries=2)
+    red = cache.get(encodedIcon('red'))
+    cache.resized(red)
+    cache.get(encodedIcon('yellow'))
+    cache.get(encodedIcon('white'))
+    assert len(cache) == 2
+    assert cache.get(encodedIcon('red')) is not red
+
+
+def test_warningLightsShareIcons():
+    fromDict = {'messageId': '1', 'text': 'Check tire pressure', 'icon': 'data:image/png;base64,' + encodedIcon('yellow')}
+    first = WarningLightsStatus.WarningLight(parent=None, fromDict=fromDict)
+    second = WarningLightsStatus.WarningLight(parent=None, fromDict=fromDict)
+    assert first.icon.value is second.icon.value
+    first.update(fromDict)
+    assert first.icon.value is second.icon.value
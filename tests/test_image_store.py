@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from weconnect.image_store import ImageStore
+
+
+def test_putAndGet(tmp_path):
+    store = ImageStore(str(tmp_path / 'images'))
+    reference = store.put(b'image')
+    assert ImageStore.isReference(reference)
+    assert store.put(b'image') == reference
+    assert reference in store
+    assert store.get(reference) == b'image'
+    with store.open(reference) as mappedFile:
+        assert mappedFile.read() == b'image'
+    assert list(store.references()) == [reference]
+    # Base64 encoded images of older cache files are no references
+    assert not ImageStore.isReference('aW1hZ2U=')
+
+
+def test_prune(tmp_path):
+    store = ImageStore(str(tmp_path))
+    keep = store.put(b'keep')
+    remove = store.put(b'remove')
+    assert store.prune({keep}) == 1
+    assert keep in store
+    assert remove not in store
+    assert store.get(remove) is None
+
+
+def test_invalidReference(tmp_path):
+    store = ImageStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.path('sha256:../../etc/passwd')
+    assert store.get('sha256:../../etc/passwd') is None
+    assert 'sha256:abc' not in store
+
+
+def test_lazyImageDictMissingFile(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    from weconnect.elements.helpers.lazy_image_dict import LazyImageDict  # pylint: disable=import-outside-toplevel
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, format='PNG')
+    store = ImageStore(str(tmp_path))
+    reference = store.put(buffer.getvalue())
+    images = LazyImageDict()
+    images.setStored('car', store, reference)
+    images.setStored('other', store, reference)
+    assert 'car' in images
+
+    # The file disappears after it was checked
+    store.prune(set())
+    with pytest.raises(KeyError):
+        images['car']  # pylint: disable=pointless-statement
+    # The reference is dropped, so the image can be set again after downloading it
+    assert 'car' not in images
+    assert 'other' not in images
+    assert images.generation('other') is None
+    assert images.setStored('other', store, store.put(buffer.getvalue()))
+    assert images['other'].size == (10, 10)
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+
+import pytest
+
+from weconnect import addressable
+from weconnect.observer_dispatcher import ObserverDispatcher
+
+
+def test_dispatchInWorker():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    attribute = addressable.AddressableAttribute(localAddress='attribute', parent=root, value=None, valueType=int)
+    release = threading.Event()
+    calls = []
+
+    def slowObserver(element, flags):
+        release.wait(timeout=5)
+        calls.append((threading.current_thread().name, flags))
+
+    with ObserverDispatcher() as dispatcher:
+        root.addObserver(slowObserver, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, dispatcher=dispatcher)
+        # The slow observer does not block changing the value
+        for value in range(5):
+            attribute.setValueWithCarTime(value)
+        assert calls == []
+        release.set()
+        assert dispatcher.flush(timeout=5)
+        assert len(calls) == 5
+        assert all(name.startswith('WeConnect observer dispatcher') for name, _ in calls)
+        stats = dispatcher.stats()
+        assert stats['dispatched'] == 5
+        assert stats['queueDepth'] == 0
+        assert stats['maxQueueDepth'] >= 4
+        assert stats['maxLatency'] > 0
+
+        # The observer can be removed with the original function
+        root.removeObserver(slowObserver)
+        attribute.setValueWithCarTime(10)
+        assert dispatcher.flush(timeout=5)
+        assert len(calls) == 5
+
+
+def test_orderPerObserver():
+    seen = {'first': [], 'second': []}
+
+    def first(element, flags):
+        seen['first'].append(element)
+
+    def second(element, flags):
+        seen['second'].append(element)
+
+    with ObserverDispatcher(workers=4) as dispatcher:
+        for element in range(100):
+            for observer in (first, second):
+                dispatcher.submit(observer, element, addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED)
+        assert dispatcher.flush(timeout=5)
+    assert seen['first'] == list(range(100))
+    assert seen['second'] == list(range(100))
+
+
+@pytest.mark.parametrize('policy, expected', [(ObserverDispatcher.OverflowPolicy.DROP_NEWEST, [0, 1, 2]),
+                                              (ObserverDispatcher.OverflowPolicy.DROP_OLDEST, [0, 3, 4])])
+def test_overflowPolicy(policy, expected):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def observer(element, flags):
+        started.set()
+        release.wait(timeout=5)
+        calls.append(element)
+
+    with ObserverDispatcher(maxQueueSize=2, overflowPolicy=policy) as dispatcher:
+        dispatcher.submit(observer, 0, None)
+        assert started.wait(timeout=5)
+        results = [dispatcher.submit(observer, element, None) for element in range(1, 5)]
+        assert dispatcher.queueDepth == 2
+        release.set()
+        assert dispatcher.flush(timeout=5)
+    assert calls == expected
+    assert dispatcher.dropped == 2
+    assert results == ([True, True, False, False] if policy == ObserverDispatcher.OverflowPolicy.DROP_NEWEST else [True] * 4)
+
+
+def test_blockAndErrors():
+    release = threading.Event()
+    calls = []
+
+    def observer(element, flags):
+        release.wait(timeout=5)
+        if element == 1:
+            raise ValueError('observer failed')
+        calls.append(element)
+
+    dispatcher = ObserverDispatcher(maxQueueSize=1)
+    dispatcher.submit(observer, 0, None)
+    dispatcher.submit(observer, 1, None)
+    blocked = threading.Thread(target=dispatcher.submit, args=(observer, 2, None))
+    blocked.start()
+    blocked.join(timeout=0.2)
+    # The queue is full, so the producer waits
+    assert blocked.is_alive()
+    release.set()
+    blocked.join(timeout=5)
+    dispatcher.close()
+    assert calls == [0, 2]
+    assert dispatcher.errors == 1
+    assert dispatcher.dispatched == 3
+    assert not dispatcher.submit(observer, 3, None)
+
+
+def test_dispatchInLoop():
+    async def run():
+        loop = asyncio.get_running_loop()
+        calls = []
+
+        async def observer(element, flags):
+            await asyncio.sleep(0)
+            calls.append((element, asyncio.get_running_loop() is loop))
+
+        dispatcher = ObserverDispatcher(loop=loop)
+        for element in range(3):
+            dispatcher.submit(observer, element, None)
+        await loop.run_in_executor(None, dispatcher.flush, 5)
+        await loop.run_in_executor(None, dispatcher.close)
+        return calls
+
+    assert asyncio.run(run()) == [(0, True), (1, True), (2, True)]
+
+
+def test_fullQueueInLoop():
+    # Notifications from the loop thread must not wait for workers that wait for the loop
+    async def run():
+        loop = asyncio.get_running_loop()
+        root = addressable.AddressableObject(localAddress='root', parent=None)
+        attributes = [addressable.AddressableAttribute(localAddress=f'attribute{index}', parent=root, value=None, valueType=int)
+                      for index in range(20)]
+        calls = []
+
+        async def observer(element, flags):
+            calls.append(element.localAddress)
+
+        dispatcher = ObserverDispatcher(maxQueueSize=5, loop=loop)
+        root.addObserver(observer, flag=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED, dispatcher=dispatcher)
+        with root.updateTransaction():
+            for value, attribute in enumerate(attributes):
+                attribute.setValueWithCarTime(value)
+        await loop.run_in_executor(None, dispatcher.flush, 5)
+        await loop.run_in_executor(None, dispatcher.close)
+        return calls
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(asyncio.run(run())), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert result == [[f'attribute{index}' for index in range(20)]]
@@ -0,0 +1,136 @@
+import gc
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from tests.stub_server import StubServer
+from weconnect.auth.token_refresher import TokenRefresher
+from weconnect.weconnect import WeConnect
+
+
+def identityRoutes():
+    def data(handler):
+        if handler.headers.get('Authorization') == 'Bearer new':
+            return 200, {}, {'path': handler.path}
+        return 401, {}, b''
+
+    return {'/login': lambda handler: (200, {}, {'access_token': 'new', 'refresh_token': 'refresh', 'expires_in': 3600}),
+            '/refresh': lambda handler: (200, {}, {'access_token': 'new', 'refresh_token': 'refresh', 'expires_in': 3600}),
+            '/data': data}
+
+
+def stubAuth(session, server):
+    def login():
+        time.sleep(0.2)
+        session.token = requests.post(f'{server.url}/login').json()
+
+    def refresh():
+        time.sleep(0.2)
+        session.token = requests.post(f'{server.url}/refresh').json()
+    session.login = login
+    session.refresh = refresh
+
+
+def test_concurrentReloginOnUnauthorized(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    with StubServer(routes=identityRoutes()) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+        weConnect.session.token = {'access_token': 'old', 'expires_in': 3600}
+        stubAuth(weConnect.session, server)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda i: weConnect.fetchData(f'{server.url}/data?id={i}'), range(10)))
+
+        assert [result['path'] for result in results] == [f'/data?id={i}' for i in range(10)]
+        assert server.count('/login') == 1
+
+
+def test_concurrentRefreshOnExpiredToken(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    with StubServer(routes=identityRoutes()) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+        weConnect.session.token = {'access_token': 'old', 'refresh_token': 'refresh', 'expires_in': 3600, 'expires_at': time.time() - 10}
+        stubAuth(weConnect.session, server)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda i: weConnect.fetchData(f'{server.url}/data?id={i}'), range(10)))
+
+        assert len(results) == 10
+        assert server.count('/refresh') == 1
+        assert server.count('/login') == 0
+        assert weConnect.session.authGeneration == 1
+
+
+def test_backgroundTokenRefresh(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    with StubServer(routes=identityRoutes()) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+        weConnect.session.token = {'access_token': 'new', 'refresh_token': 'refresh', 'expires_in': 3600, 'expires_at': time.time() + 1.2}
+        stubAuth(weConnect.session, server)
+        persisted = []
+        refresher = TokenRefresher(weConnect.session, margin=1, retryInterval=1, onRefresh=lambda: persisted.append(weConnect.session.expiresAt))
+        refresher.start()
+        try:
+            time.sleep(0.3)
+            # Refresh is running in the background, requests still use the old token without waiting
+            start = time.monotonic()
+            assert weConnect.fetchData(f'{server.url}/data') == {'path': '/data'}
+            assert time.monotonic() - start < 0.1
+            time.sleep(0.3)
+            assert server.count('/refresh') == 1
+            assert len(persisted) == 1
+            assert refresher.nextRefreshIn() > 3000
+        finally:
+            refresher.stop()
+        assert not refresher.running
+
+
+def test_connectionPool(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    with StubServer(routes={'/data': lambda handler: (200, {}, {'path': handler.path})}, delay=0.05) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, poolMaxsize=3, poolBlock=True)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+
+        for cycle in range(2):
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                results = list(executor.map(lambda i: weConnect.fetchData(f'{server.url}/data?cycle={cycle}&id={i}'), range(10)))
+            assert len(results) == 10
+            weConnect.session.cookies.clear()
+        # All requests of both cycles were sent over at most three kept alive connections
+        assert len(server.requests) == 20
+        assert len(server.connections) <= 3
+
+
+def test_backgroundTokenRefreshSurvivesErrors(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+    weConnect.session.token = {'access_token': 'new', 'refresh_token': 'refresh', 'expires_in': 3600, 'expires_at': time.time()}
+    attempts = []
+
+    def refreshOrRelogin(generation, invalidateAccessToken=True):
+        attempts.append(generation)
+        raise requests.exceptions.ConnectionError('network down')
+    weConnect.session.refreshOrRelogin = refreshOrRelogin
+    refresher = TokenRefresher(weConnect.session, margin=1, retryInterval=0.1)
+    refresher.start()
+    try:
+        time.sleep(0.5)
+        # Refreshing is tried again after the error instead of ending the background thread
+        assert len(attempts) > 1
+        assert refresher.running
+    finally:
+        refresher.stop()
+
+
+def test_tokenRefresherDoesNotKeepWeConnectAlive(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, tokenRefreshMargin=300)
+    refresher = weConnect._WeConnect__tokenRefresher  # pylint: disable=protected-access
+    assert refresher.running
+    reference = weakref.ref(weConnect)
+    del weConnect
+    gc.collect()
+    assert reference() is None
+    assert not refresher.running
@@ -0,0 +1,53 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from tests.stub_server import StubServer
+from weconnect.elements.helpers.request_scheduler import RequestScheduler, parseRetryAfter
+from weconnect.errors import TooManyRequestsError
+from weconnect.weconnect import WeConnect
+
+
+def test_parseRetryAfter():
+    assert parseRetryAfter(None) is None
+    assert parseRetryAfter('120') == 120
+    assert parseRetryAfter('invalid') is None
+    assert 50 < parseRetryAfter(formatdate(time.time() + 60, usegmt=True)) <= 60
+
+
+def test_tokenBucket():
+    scheduler = RequestScheduler(rate=10, burst=2)
+    assert scheduler.availableTokens == pytest.approx(2)
+    start = time.monotonic()
+    for _ in range(6):
+        scheduler.acquire()
+    # Two requests are sent at once, the remaining four have to wait for new tokens
+    assert 0.35 < time.monotonic() - start < 0.6
+    assert scheduler.queueDepth == 0
+
+
+def test_pause():
+    scheduler = RequestScheduler()
+    assert scheduler.reserve() == 0
+    scheduler.pause(10)
+    assert 9 < scheduler.reserve() <= 10
+    assert 9 < scheduler.pausedFor <= 10
+
+
+def test_retryAfterTooManyRequests(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    responses = [(429, {'Retry-After': '1'}, b''), (200, {}, {'value': 1})]
+    with StubServer(routes={'/status': lambda handler: responses.pop(0) if responses else (429, {'Retry-After': '0'}, b'')}) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, requestsPerHour=3600)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+
+        start = time.monotonic()
+        assert weConnect.fetchData(f'{server.url}/status') == {'value': 1}
+        assert time.monotonic() - start >= 1
+        assert server.count('/status') == 2
+
+        # After maxRetries the error is raised as before
+        with pytest.raises(TooManyRequestsError):
+            weConnect.fetchData(f'{server.url}/status', force=True)
+        assert server.count('/status') == 2 + 1 + weConnect.requestScheduler.maxRetries
@@ -0,0 +1,55 @@
+import threading
+
+from weconnect import addressable
+from weconnect.subscription import CoalescingSubscription
+
+
+def test_coalescingSubscription():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    first = addressable.AddressableAttribute(localAddress='first', parent=root, value=None, valueType=int)
+    second = addressable.AddressableAttribute(localAddress='second', parent=root, value=None, valueType=int)
+
+    with CoalescingSubscription(root) as subscription:
+        for value in range(10):
+            first.setValueWithCarTime(value, fromServer=True)
+            second.setValueWithCarTime(value * 2, fromServer=True)
+        # root is enabled together with its first child
+        assert len(subscription) == 3
+
+        changes = subscription.drain(maxChanges=2)
+        assert [change.address for change in changes] == ['root', 'root/first']
+        changes = changes[1:]
+        assert changes[0].value == 9
+        assert changes[0].flags & addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED
+        assert changes[0].flags & addressable.AddressableLeaf.ObserverEvent.UPDATED_FROM_SERVER
+        assert changes[0].notifications > 1
+
+        changes = subscription.drain()
+        assert [(change.address, change.value) for change in changes] == [('root/second', 18)]
+        assert subscription.drain() == []
+        stats = subscription.stats()
+        assert stats['pending'] == 0
+        assert stats['coalesced'] == stats['notifications'] - 3
+
+        # Enabled and disabled again before draining cancels out
+        third = addressable.AddressableAttribute(localAddress='third', parent=root, value=None, valueType=int)
+        third.enabled = True
+        third.enabled = False
+        assert subscription.drain() == []
+
+    first.setValueWithCarTime(100)
+    assert subscription.drain() == []
+
+
+def test_drainWaits():
+    root = addressable.AddressableObject(localAddress='root', parent=None)
+    attribute = addressable.AddressableAttribute(localAddress='attribute', parent=root, value=None, valueType=int)
+    subscription = CoalescingSubscription(root, flags=addressable.AddressableLeaf.ObserverEvent.VALUE_CHANGED)
+
+    timer = threading.Timer(0.05, attribute.setValueWithCarTime, args=(1,))
+    timer.start()
+    changes = subscription.drain(timeout=5)
+    timer.join()
+    assert [(change.address, change.value) for change in changes] == [('root/attribute', 1)]
+    assert subscription.drain(timeout=0.01) == []
+    subscription.close()
@@ -0,0 +1,275 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.stub_server import StubServer
+
+from weconnect.domain import Domain
+from weconnect.image_store import ImageStore
+from weconnect.weconnect import WeConnect
+from weconnect.errors import RetrievalError
+
+
+def fakeFetchData(vins, delays, failingVins=()):
+    def fetchData(url, force=False, allowEmpty=False, allowHttpError=False, allowedErrors=None):
+        if url == WeConnect.VEHICLES_URL:
+            return {'data': [{'vin': vin, 'model': 'ID.3', 'capabilities': []} for vin in vins]}
+        for part, delay in delays.items():
+            if part in url:
+                time.sleep(delay)
+        for vin in failingVins:
+            if vin in url:
+                raise RetrievalError(f'failed {vin}')
+        if 'selectivestatus' in url:
+            return {'userCapabilities': {}}
+        return None
+    return fetchData
+
+
+@pytest.mark.parametrize('maxWorkers', [None, 4])
+def test_updateVehiclesParallel(monkeypatch, maxWorkers):
+    vins = [f'WVWZZZ{i:011d}' for i in range(4)]
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxWorkers=maxWorkers)
+    monkeypatch.setattr(weConnect, 'fetchData', fakeFetchData(vins, delays={'selectivestatus': 0.2}))
+
+    start = time.monotonic()
+    weConnect.update(updatePictures=False)
+    elapsed = time.monotonic() - start
+
+    assert list(weConnect.vehicles.keys()) == vins
+    assert all(vehicle.model.value == 'ID.3' for vehicle in weConnect.vehicles.values())
+    if maxWorkers is not None:
+        assert elapsed < len(vins) * 0.2 / 2
+    else:
+        assert elapsed >= len(vins) * 0.2
+
+
+def test_updateVehiclesParallelErrors(monkeypatch):
+    vins = [f'WVWZZZ{i:011d}' for i in range(4)]
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxWorkers=4)
+    monkeypatch.setattr(weConnect, 'fetchData', fakeFetchData(vins, delays={}, failingVins=vins[1:3]))
+
+    with pytest.raises(RetrievalError, match='2 vehicles'):
+        weConnect.update(updatePictures=False)
+    # Vehicles that could be updated are still available
+    assert list(weConnect.vehicles.keys()) == [vins[0], vins[3]]
+
+
+def test_updateStatusParallelTrips(monkeypatch):
+    vins = ['WVWZZZ00000000000']
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+    monkeypatch.setattr(weConnect, 'fetchData', fakeFetchData(vins, delays={'/trips/': 0.2}))
+
+    start = time.monotonic()
+    weConnect.update(updatePictures=False)
+    # The three trip types are fetched at the same time
+    assert time.monotonic() - start < 2 * 0.2
+
+
+def test_updatePicturesParallel(monkeypatch):
+    Image = pytest.importorskip('PIL.Image')
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, format='PNG')
+    png = buffer.getvalue()
+    imageIds = ['car_34view', 'car_birdview', 'door_left_front_overlay', 'window_left_front_overlay']
+
+    with StubServer(routes={f'/{imageId}': lambda handler: (200, {'Content-Type': 'image/png'}, png) for imageId in imageIds}, delay=0.2) as server:
+        vins = ['WVWZZZ00000000000']
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxAgePictures=300)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+        fetchData = fakeFetchData(vins, delays={})
+
+        def fetchDataWithPictures(url, *args, **kwargs):
+            if 'vehicle-images' in url:
+                return {'data': [{'id': imageId, 'url': f'{server.url}/{imageId}'} for imageId in imageIds]}
+            return fetchData(url, *args, **kwargs)
+        monkeypatch.setattr(weConnect, 'fetchData', fetchDataWithPictures)
+
+        start = time.monotonic()
+        weConnect.update()
+        assert time.monotonic() - start < 2 * 0.2
+
+        vehicle = weConnect.vehicles[vins[0]]
+        assert vehicle.pictures['car'].value.size == (10, 10)
+        assert 'status' in vehicle.pictures
+        # Downloaded bytes are cached without re-encoding
+        assert weConnect.cache[f'{server.url}/car_34view'].data == png
+        statusPicture = vehicle.pictures['status'].value
+        composed = []
+        composeStatusPictures = vehicle._Vehicle__composeStatusPictures
+        monkeypatch.setattr(vehicle, '_Vehicle__composeStatusPictures', lambda *args: composed.append(args) or composeStatusPictures(*args))
+
+        # Second update is served from the cache and the unchanged status picture is not composed again
+        weConnect.update()
+        assert server.count('/car_34view') == 1
+        assert not composed
+        assert vehicle.pictures['status'].value is statusPicture
+
+        # Composing again after a change reuses the decoded downloads
+        decoded = []
+        imageOpen = Image.open
+        monkeypatch.setattr(Image, 'open', lambda *args, **kwargs: decoded.append(args) or imageOpen(*args, **kwargs))
+        vehicle._Vehicle__statusPictureKey = None  # pylint: disable=protected-access
+        vehicle.updateStatusPicture()
+        assert len(composed) == 1
+        assert not decoded
+        # Unless they were released explicitly
+        vehicle.releaseImages()
+        vehicle._Vehicle__statusPictureKey = None  # pylint: disable=protected-access
+        vehicle.updateStatusPicture()
+        assert decoded
+
+
+def test_fetchDataConditional(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+
+    def status(handler):
+        if handler.headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return 200, {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}, {'value': 1}
+
+    with StubServer(routes={'/status': status}) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxAge=0)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+        url = f'{server.url}/status'
+
+        assert weConnect.fetchData(url) == {'value': 1}
+        assert weConnect.cache[url].validators == {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        time.sleep(0.01)
+        assert weConnect.fetchData(url) == {'value': 1}
+        assert server.requests[1][2]['If-None-Match'] == '"v1"'
+        assert server.requests[1][2]['If-Modified-Since'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+        assert weConnect.getNotModifiedCount() == 1
+        assert weConnect.cache[url].validators['ETag'] == '"v1"'
+
+        # Forced requests do not use the validators
+        assert weConnect.fetchData(url, force=True) == {'value': 1}
+        assert 'If-None-Match' not in server.requests[2][2]
+        assert weConnect.getNotModifiedCount() == 1
+
+
+def test_fetchDataSingleFlight(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    with StubServer(routes={'/status': lambda handler: (200, {}, {'value': 1})}, delay=0.2) as server:
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+        url = f'{server.url}/status'
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda _: weConnect.fetchData(url), range(10)))
+        assert results == [{'value': 1}] * 10
+        assert server.count('/status') == 1
+        assert weConnect.getSharedFetchCount() == 9
+
+        # Once the request is finished the next call does a new request
+        weConnect.fetchData(url)
+        assert server.count('/status') == 2
+
+
+def test_maxAgePolicy(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    policy = {r'/vehicles$': 3600, Domain.CHARGING: 30, Domain.TRIPS: 0}
+    weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxAge=300, maxAgePolicy=policy)
+    baseUrl = 'https://emea.bff.cariad.digital/vehicle/v1'
+    assert weConnect.getMaxAge(WeConnect.VEHICLES_URL) == 3600
+    assert weConnect.getMaxAge(f'{baseUrl}/vehicles/VIN/selectivestatus?jobs=access,charging') == 30
+    assert weConnect.getMaxAge(f'{baseUrl}/vehicles/VIN/selectivestatus?jobs=all') == 30
+    assert weConnect.getMaxAge(f'{baseUrl}/vehicles/VIN/selectivestatus?jobs=access') == 300
+    assert weConnect.getMaxAge(f'{baseUrl}/trips/VIN/shortterm/last') == 0
+    assert weConnect.getMaxAge(f'{baseUrl}/vehicles/VIN/parkingposition') == 300
+
+    with StubServer(routes={'/vehicles': lambda handler: (200, {}, {'data': []}),
+                            '/trips/VIN/shortterm/last': lambda handler: (200, {}, {'data': {}})}) as server:
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+        for _ in range(2):
+            weConnect.fetchData(f'{server.url}/vehicles')
+            weConnect.fetchData(f'{server.url}/trips/VIN/shortterm/last')
+            time.sleep(0.01)
+        assert server.count('/vehicles') == 1
+        assert server.count('/trips/VIN/shortterm/last') == 2
+
+
+def test_staleWhileRevalidate(monkeypatch):
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    responses = [{'data': [], 'version': 1}, {'data': [], 'version': 2}]
+    with StubServer(routes={'/vehicles': lambda handler: (200, {}, responses.pop(0) if len(responses) > 1 else responses[0])}, delay=0.2) as server:
+        monkeypatch.setattr(WeConnect, 'VEHICLES_URL', f'{server.url}/vehicles')
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxAge=0, staleWhileRevalidate=60)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+        updates = []
+        updateVehicles = weConnect.updateVehicles
+
+        def countingUpdateVehicles(*args, **kwargs):
+            updates.append(weConnect.cache.peek(WeConnect.VEHICLES_URL))
+            updateVehicles(*args, **kwargs)
+        monkeypatch.setattr(weConnect, 'updateVehicles', countingUpdateVehicles)
+
+        weConnect.update()
+        assert weConnect.cache[WeConnect.VEHICLES_URL].data['version'] == 1
+
+        # Outdated data is returned without waiting for the server
+        start = time.monotonic()
+        weConnect.update()
+        assert time.monotonic() - start < 0.2
+        # The update is repeated in the background once the new data arrived
+        deadline = time.monotonic() + 2
+        while len(updates) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert weConnect.cache[WeConnect.VEHICLES_URL].data['version'] == 2
+        assert len(updates) == 3
+        assert updates[2].data['version'] == 2
+
+        # Data older than the stale limit is fetched before returning
+        weConnect.staleWhileRevalidate = 0
+        time.sleep(0.3)
+        assert weConnect.fetchData(WeConnect.VEHICLES_URL)['version'] == 2
+        weConnect.disconnect()
+
+
+def test_updatePicturesImageStore(monkeypatch, tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    monkeypatch.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, format='PNG')
+    png = buffer.getvalue()
+    imageIds = ['car_34view', 'car_birdview']
+
+    with StubServer(routes={f'/{imageId}': lambda handler: (200, {'Content-Type': 'image/png'}, png) for imageId in imageIds}) as server:
+        vins = ['WVWZZZ00000000000']
+        imageStore = ImageStore(str(tmp_path / 'images'))
+        weConnect = WeConnect(username='test', password='test', updateAfterLogin=False, loginOnInit=False, maxAgePictures=300,
+                              imageStore=imageStore)
+        weConnect.session.token = {'access_token': 'token', 'expires_in': 3600}
+        fetchData = fakeFetchData(vins, delays={})
+
+        def fetchDataWithPictures(url, *args, **kwargs):
+            if 'vehicle-images' in url:
+                return {'data': [{'id': imageId, 'url': f'{server.url}/{imageId}'} for imageId in imageIds]}
+            return fetchData(url, *args, **kwargs)
+        monkeypatch.setattr(weConnect, 'fetchData', fetchDataWithPictures)
+
+        weConnect.update()
+        vehicle = weConnect.vehicles[vins[0]]
+        assert vehicle.pictures['car'].value.size == (10, 10)
+        # Both images have the same content, so the store contains a single file and the cache only references it
+        reference = weConnect.cache[f'{server.url}/car_34view'].data
+        assert ImageStore.isReference(reference)
+        assert weConnect.cache[f'{server.url}/car_birdview'].data == reference
+        assert list(imageStore.references()) == [reference]
+        assert reference in weConnect.cache.toJson()
+
+        # A removed file is downloaded again
+        imageStore.prune(set())
+        vehicle.updateStatusPicture()
+        weConnect.update()
+        assert server.count('/car_34view') == 2
+        assert reference in imageStore
+
+        # A damaged reference in the cache is downloaded again as well
+        weConnect.cache.put(f'{server.url}/car_34view', 'sha256:abc')
+        weConnect.update()
+        assert server.count('/car_34view') == 3
+        assert weConnect.cache[f'{server.url}/car_34view'].data == reference
@@ -1,13 +1,17 @@
 from __future__ import annotations
 from typing import Callable, NoReturn, Optional, Dict, List, Set, Any, Tuple, Union, Type, TypeVar, Generic
 
+import io
 import json
 import logging
+import shutil
 import time as timemodule
 from datetime import datetime, timezone, time
 from enum import Enum, IntEnum, Flag, auto
+from threading import Lock, RLock
 
 from weconnect.util import toBool, robustTimeParse, ExtendedWithNullEncoder
+from weconnect.observer_dispatcher import ObserverDispatcher
 
 SUPPORT_IMAGES = False
 try:
@@ -27,6 +31,13 @@ LOG: logging.Logger = logging.getLogger("weconnect")
 
 
 class AddressableLeaf():
+    # Effective observers (own and those of all parents) are cached per element and flags. The epoch changes whenever an observer is added or
+    # removed or an element gets a new parent anywhere in the tree, which invalidates all cached lookups. As long as there are no observers at all
+    # nothing is looked up or cached.
+    _observerEpoch: int = 0
+    _observerCount: int = 0
+    _observerLock: RLock = RLock()
+
     def __init__(
         self,
         localAddress: str,
@@ -35,8 +46,10 @@ class AddressableLeaf():
         self.__enabled: bool = False
         self.__localAddress: str = localAddress
         self.__parent: Optional[AddressableObject] = parent
-        self.__observers: Set[Tuple[Callable[[Optional[Any], AddressableLeaf.ObserverEvent], None],
-                                    AddressableLeaf.ObserverEvent, AddressableLeaf.ObserverPriority, bool]] = set()
+        # Most elements are never observed directly, so the set is only created when the first observer is added
+        self.__observers: Optional[Set[Tuple[Callable[[Optional[Any], AddressableLeaf.ObserverEvent], None],
+                                             AddressableLeaf.ObserverEvent, AddressableLeaf.ObserverPriority, bool]]] = None
+        self.__observerIndex: Optional[Tuple[int, Dict[Tuple[int, bool], Tuple[Any, ...]]]] = None
         self.lastChange: Optional[datetime] = None
         self.lastUpdateFromServer: Optional[datetime] = None
         self.lastUpdateFromCar: Optional[datetime] = None
@@ -45,49 +58,117 @@ class AddressableLeaf():
     def __del__(self) -> None:
         if self.enabled:
             self.enabled = False
+        if self.__observers:
+            with AddressableLeaf._observerLock:
+                AddressableLeaf._observerCount -= len(self.__observers)
 
     def addObserver(self, observer: Callable, flag: AddressableLeaf.ObserverEvent, priority: Optional[AddressableLeaf.ObserverPriority] = None,
-                    onUpdateComplete: bool = False) -> None:
+                    onUpdateComplete: bool = False, dispatcher: Optional[ObserverDispatcher] = None) -> None:
+        """Add observer that is called with the element and flags when the element or one of its children changes
+
+        Args:
+            observer (Callable): Called as observer(element=element, flags=flags)
+            flag (AddressableLeaf.ObserverEvent): Events the observer is interested in
+            priority (AddressableLeaf.ObserverPriority, optional): Observers with lower values are called first. Defaults to USER_MID.
+            onUpdateComplete (bool, optional): Call the observer only once the update is complete. Defaults to False.
+            dispatcher (ObserverDispatcher, optional): Call the observer in the worker threads of dispatcher instead of the thread that changed
+            the element. Defaults to None.
+        """
         if priority is None:
             priority = AddressableLeaf.ObserverPriority.USER_MID
-        self.__observers.add((observer, flag, priority, onUpdateComplete))
+        if dispatcher is not None:
+            observer = dispatcher.wrap(observer)
+        with AddressableLeaf._observerLock:
+            if self.__observers is None:
+                self.__observers = set()
+            observerEntry = (observer, flag, priority, onUpdateComplete)
+            if observerEntry not in self.__observers:
+                self.__observers.add(observerEntry)
+                AddressableLeaf._observerCount += 1
+                AddressableLeaf._observerEpoch += 1
         LOG.debug('%s: Observer added with flags: %s', self.getGlobalAddress(), flag)
 
     def removeObserver(self, observer: Callable, flag: Optional[AddressableLeaf.ObserverEvent] = None) -> None:
-        self.__observers = filter(lambda observerEntry: observerEntry[0] == observer
-                                  or (flag is not None and observerEntry[1] == flag), self.__observers)
+        """Remove observer. If flag is given only the registration with these flags is removed, otherwise all registrations of the observer."""
+        if self.__observers is None:
+            return
+        with AddressableLeaf._observerLock:
+            removed: Set[Tuple[Callable, AddressableLeaf.ObserverEvent, AddressableLeaf.ObserverPriority, bool]] = \
+                {observerEntry for observerEntry in self.__observers if observerEntry[0] == observer and (flag is None or observerEntry[1] == flag)}
+            if removed:
+                self.__observers -= removed
+                AddressableLeaf._observerCount -= len(removed)
+                AddressableLeaf._observerEpoch += 1
 
     def getObservers(self, flags, onUpdateComplete: bool = False) -> List[Any]:
-        return [observerEntry[0] for observerEntry in self.getObserverEntries(flags, onUpdateComplete)]
+        return [observerEntry[0] for observerEntry in self.__effectiveObservers(flags, onUpdateComplete)]
 
     def getObserverEntries(self, flags: AddressableLeaf.ObserverEvent, onUpdateComplete: bool = False) -> List[Any]:
-        observers: Set[Tuple[Callable, AddressableLeaf.ObserverEvent, AddressableLeaf.ObserverPriority, bool]] = set()
-        for observerEntry in self.__observers:
-            observer, observerflags, priority, observerOnUpdateComplete = observerEntry
-            del observer
-            del priority
-            if (flags & observerflags) and observerOnUpdateComplete == onUpdateComplete:
-                observers.add(observerEntry)
-        if self.__parent is not None:
-            observers.update(self.__parent.getObserverEntries(flags, onUpdateComplete))
-        return sorted(observers, key=lambda entry: int(entry[2]))
+        return list(self.__effectiveObservers(flags, onUpdateComplete))
+
+    def __effectiveObservers(self, flags: AddressableLeaf.ObserverEvent, onUpdateComplete: bool) -> Tuple[Any, ...]:
+        """Observers of this element and all parents for flags sorted by priority"""
+        if AddressableLeaf._observerCount == 0:
+            return ()
+        epoch: int = AddressableLeaf._observerEpoch
+        index: Optional[Tuple[int, Dict[Tuple[int, bool], Tuple[Any, ...]]]] = self.__observerIndex
+        if index is None or index[0] != epoch:
+            index = (epoch, {})
+            self.__observerIndex = index
+        key: Tuple[int, bool] = (flags.value, onUpdateComplete)
+        observerEntries: Optional[Tuple[Any, ...]] = index[1].get(key)
+        if observerEntries is None:
+            observers: Set[Tuple[Callable, AddressableLeaf.ObserverEvent, AddressableLeaf.ObserverPriority, bool]] = set()
+            for observerEntry in self.__observers or ():
+                observer, observerflags, priority, observerOnUpdateComplete = observerEntry
+                del observer
+                del priority
+                if (flags & observerflags) and observerOnUpdateComplete == onUpdateComplete:
+                    observers.add(observerEntry)
+            if self.__parent is not None:
+                observers.update(self.__parent.__effectiveObservers(flags, onUpdateComplete))
+            observerEntries = tuple(sorted(observers, key=lambda entry: int(entry[2])))
+            index[1][key] = observerEntries
+        return observerEntries
 
     def notify(self, flags: AddressableLeaf.ObserverEvent) -> None:
-        observers: List[Callable] = self.getObservers(flags, onUpdateComplete=False)
-        for observer in observers:
-            observer(element=self, flags=flags)
-        if self.onCompleteNotifyFlags is not None:
-            # Remove disabled if was enabled and not yet notified
-            if (flags & AddressableLeaf.ObserverEvent.ENABLED) and (self.onCompleteNotifyFlags & AddressableLeaf.ObserverEvent.DISABLED):
-                self.onCompleteNotifyFlags &= ~AddressableLeaf.ObserverEvent.DISABLED  # pylint: disable=invalid-unary-operand-type
-            # Remove enabled if was enabled and not yet notified
-            elif (flags & AddressableLeaf.ObserverEvent.DISABLED) and (self.onCompleteNotifyFlags & AddressableLeaf.ObserverEvent.ENABLED):
-                self.onCompleteNotifyFlags &= ~AddressableLeaf.ObserverEvent.ENABLED  # pylint: disable=invalid-unary-operand-type
-            else:
-                self.onCompleteNotifyFlags |= flags
+        transaction: Optional[UpdateTransaction] = self._getTransaction() if UpdateTransaction.active else None
+        observerEntries: Tuple[Any, ...] = ()
+        if transaction is not None:
+            # Observers are notified when the transaction ends
+            transaction.record(self, flags)
         else:
-            self.onCompleteNotifyFlags = flags
-        LOG.debug('%s: Notify called with flags: %s for %d observers', self.getGlobalAddress(), flags, len(observers))
+            observerEntries = self.__effectiveObservers(flags, onUpdateComplete=False)
+            for observerEntry in observerEntries:
+                observerEntry[0](element=self, flags=flags)
+            if self.onCompleteNotifyFlags is None:
+                self._notifiedOutsideTransaction()
+        self.onCompleteNotifyFlags = AddressableLeaf.mergeFlags(self.onCompleteNotifyFlags, flags)
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug('%s: Notify called with flags: %s for %d observers', self.getGlobalAddress(), flags, len(observerEntries))
+
+    @staticmethod
+    def mergeFlags(pendingFlags: Optional[AddressableLeaf.ObserverEvent], flags: AddressableLeaf.ObserverEvent) -> AddressableLeaf.ObserverEvent:
+        """Combine flags of a notification with flags not yet notified"""
+        if pendingFlags is None:
+            return flags
+        # Remove disabled if was enabled and not yet notified
+        if (flags & AddressableLeaf.ObserverEvent.ENABLED) and (pendingFlags & AddressableLeaf.ObserverEvent.DISABLED):
+            return pendingFlags & ~AddressableLeaf.ObserverEvent.DISABLED  # pylint: disable=invalid-unary-operand-type
+        # Remove enabled if was enabled and not yet notified
+        if (flags & AddressableLeaf.ObserverEvent.DISABLED) and (pendingFlags & AddressableLeaf.ObserverEvent.ENABLED):
+            return pendingFlags & ~AddressableLeaf.ObserverEvent.ENABLED  # pylint: disable=invalid-unary-operand-type
+        return pendingFlags | flags
+
+    def _getTransaction(self) -> Optional[UpdateTransaction]:
+        if self.__parent is not None:
+            return self.__parent._getTransaction()
+        return None
+
+    def _notifiedOutsideTransaction(self) -> None:
+        """Mark the root of the tree, its observers for update complete are then only found by walking the whole tree"""
+        if self.__parent is not None:
+            self.__parent._notifiedOutsideTransaction()
 
     def updateComplete(self) -> None:
         if self.onCompleteNotifyFlags is not None:
@@ -127,6 +208,9 @@ class AddressableLeaf():
 
     @parent.setter
     def parent(self, newParent: AddressableObject):
+        if newParent is not self.__parent:
+            with AddressableLeaf._observerLock:
+                AddressableLeaf._observerEpoch += 1
         self.__parent = newParent
 
     def getLocalAddress(self) -> str:
@@ -178,6 +262,13 @@ T = TypeVar('T')
 
 
 class AddressableAttribute(AddressableLeaf, Generic[T]):
+    # Attributes are by far the most common elements of the tree. With slots for all fields, including those of AddressableLeaf, the instance
+    # dictionary inherited from AddressableLeaf is never created. AddressableLeaf itself can not use slots as this would conflict with the layout
+    # of dict and list in AddressableDict and AddressableList.
+    __slots__ = ('_AddressableLeaf__enabled', '_AddressableLeaf__localAddress', '_AddressableLeaf__parent', '_AddressableLeaf__observers',
+                 '_AddressableLeaf__observerIndex', 'lastChange', 'lastUpdateFromServer', 'lastUpdateFromCar', 'onCompleteNotifyFlags',
+                 '__value', 'valueType', 'valueGetter', 'valueSetter', '__asciiArt')
+
     def __init__(
         self,
         localAddress: str,
@@ -193,6 +284,7 @@ class AddressableAttribute(AddressableLeaf, Generic[T]):
         self.valueType: Type[T] = valueType
         self.valueGetter = valueGetter
         self.valueSetter = valueSetter
+        self.__asciiArt: Optional[Dict[Tuple[int, Any], str]] = None
         if value is not None:
             self.setValueWithCarTime(value, lastUpdateFromCar, fromServer=True)
 
@@ -222,6 +314,12 @@ class AddressableAttribute(AddressableLeaf, Generic[T]):
                              f' but is of type {type(newValue)}')
         valueChanged: bool = newValue != self.__value
         self.__value = newValue
+        self._valueSet(valueChanged, lastUpdateFromCar=lastUpdateFromCar, fromServer=fromServer, noNotify=noNotify)
+
+    def _valueSet(self, valueChanged: bool, lastUpdateFromCar: Optional[datetime] = None, fromServer: bool = False, noNotify: bool = False) -> None:
+        """Update timestamps and notify observers after a new value was set"""
+        if valueChanged:
+            self.__asciiArt = None
         flags: Optional[AddressableLeaf.ObserverEvent] = None
         if not self.enabled:
             self.enabled = True
@@ -250,12 +348,34 @@ class AddressableAttribute(AddressableLeaf, Generic[T]):
     def isLeaf(self) -> bool:  # pylint: disable=R0201
         return True
 
+    def asciiArt(self, columns: int = 0, mode: Optional[ASCIIModes] = None) -> str:
+        """Render the image value as ASCII art. The result is cached per number of columns and mode until the value changes.
+
+        Args:
+            columns (int, optional): Width in characters, 0 means the width of the terminal. Defaults to 0.
+            mode (ASCIIModes, optional): Output format. Defaults to ASCIIModes.TERMINAL.
+
+        Returns:
+            str: Rendered image
+        """
+        if mode is None:
+            mode = ASCIIModes.TERMINAL
+        if columns == 0:
+            columns = shutil.get_terminal_size()[0]
+        if self.__asciiArt is None:
+            self.__asciiArt = {}
+        asciiArt: Optional[str] = self.__asciiArt.get((columns, mode))
+        if asciiArt is None:
+            asciiArt = imgToASCIIArt(self.value, columns=columns, mode=mode)
+            self.__asciiArt[(columns, mode)] = asciiArt
+        return asciiArt
+
     def saveToFile(self, filename: str) -> None:  # noqa: C901
         if self.value is not None:
             if filename.endswith(('.txt', '.TXT', '.text')):
                 with open(filename, mode='w', encoding='utf8') as textfile:
                     if SUPPORT_IMAGES and SUPPORT_ASCII_IMAGES and isinstance(self.value, Image.Image):
-                        textfile.write(imgToASCIIArt(self.value, columns=120, mode=ASCIIModes.ASCII))
+                        textfile.write(self.asciiArt(columns=120, mode=ASCIIModes.ASCII))
                     else:
                         textfile.write(str(self))
             elif filename.endswith(('.htm', '.HTM', '.html', '.HTML')):
@@ -264,7 +384,7 @@ class AddressableAttribute(AddressableLeaf, Generic[T]):
                         html = """<!DOCTYPE html><head><title>ASCII art</title></head><body><pre style="display: inline-block; border-width: 4px 6px;
     border-color: black; border-style: solid; background-color:black; font-size: 8px;">"""
                         htmlfile.write(html)
-                        htmlfile.write(imgToASCIIArt(self.value, columns=240, mode=ASCIIModes.HTML))
+                        htmlfile.write(self.asciiArt(columns=240, mode=ASCIIModes.HTML))
                         htmlfile.write('<pre/></body></html>')
                     else:
                         htmlfile.write(str(self))
@@ -344,11 +464,99 @@ class AddressableAttribute(AddressableLeaf, Generic[T]):
         if isinstance(self.value, datetime):
             return self.value.isoformat()  # pylint: disable=no-member
         if SUPPORT_IMAGES and isinstance(self.value, Image.Image):
-            return imgToASCIIArt(self.value)  # pylint: disable=no-member
+            return self.asciiArt()
         return str(self.value)
 
 
+class LazyImageAttribute(AddressableAttribute):
+    """Image attribute that keeps the encoded image and only decodes it when the value is accessed
+
+    Images set as encoded bytes are compared by their bytes, decoded images by identity, so setting the same image again is cheap. The decoded image
+    can be dropped with release, e.g. under memory pressure, and is decoded again on the next access.
+    """
+
+    __slots__ = ('__encoded', '__image')
+
+    PNG_SIGNATURE: bytes = b'\x89PNG\r\n\x1a\n'
+
+    def __init__(
+        self,
+        localAddress: str,
+        parent: AddressableObject,
+        value: Optional[Image.Image] = None,
+        lastUpdateFromCar: Optional[datetime] = None
+    ) -> None:
+        self.__encoded: Optional[bytes] = None
+        self.__image: Optional[Image.Image] = None
+        super().__init__(localAddress=localAddress, parent=parent, value=value, valueType=Image.Image, lastUpdateFromCar=lastUpdateFromCar)
+
+    @property
+    def value(self) -> Optional[Image.Image]:
+        if self.__image is None and self.__encoded is not None:
+            self.__image = Image.open(io.BytesIO(self.__encoded))
+        return self.__image
+
+    @value.setter
+    def value(self, newValue: Optional[Image.Image]) -> NoReturn:
+        raise NotImplementedError('You cannot set this attribute. Set is not implemented')
+
+    @property
+    def encoded(self) -> Optional[bytes]:
+        """Encoded image as it was set or as created by release, None if the image was never encoded"""
+        return self.__encoded
+
+    @property
+    def decoded(self) -> bool:
+        return self.__image is not None
+
+    def setValueWithCarTime(self, newValue, lastUpdateFromCar: Optional[datetime] = None, fromServer: bool = False, noNotify: bool = False) -> None:
+        if newValue is not None and not isinstance(newValue, Image.Image):
+            raise ValueError(f'{self.getGlobalAddress()}: new value {newValue} must be of type {Image.Image}'
+                             f' but is of type {type(newValue)}')
+        valueChanged: bool = newValue is not self.__image or (newValue is None and self.__encoded is not None)
+        self.__image = newValue
+        self.__encoded = None
+        self._valueSet(valueChanged, lastUpdateFromCar=lastUpdateFromCar, fromServer=fromServer, noNotify=noNotify)
+
+    def setEncodedWithCarTime(self, newValue: Optional[bytes], lastUpdateFromCar: Optional[datetime] = None, fromServer: bool = False,
+                              noNotify: bool = False) -> None:
+        """Set the image from its encoded bytes, it is only decoded when the value is accessed"""
+        valueChanged: bool = newValue != self.__encoded or (self.__encoded is None and self.__image is not None)
+        if valueChanged:
+            self.__encoded = newValue
+            self.__image = None
+        self._valueSet(valueChanged, lastUpdateFromCar=lastUpdateFromCar, fromServer=fromServer, noNotify=noNotify)
+
+    def release(self) -> None:
+        """Drop the decoded image and keep only the encoded image. Images that were set decoded are encoded as png first."""
+        if self.__image is not None:
+            if self.__encoded is None:
+                buffer: io.BytesIO = io.BytesIO()
+                self.__image.save(buffer, format='PNG')
+                self.__encoded = buffer.getvalue()
+            self.__image = None
+
+    def toJSON(self):
+        return None
+
+    def __str__(self) -> str:
+        if self.__image is None and self.__encoded is None:
+            return str(None)
+        # Rendered images are cached, so the image is not decoded if it was rendered before
+        return self.asciiArt()
+
+    def saveToFile(self, filename: str) -> None:
+        if filename.endswith(('.png', '.PNG')) and self.__encoded is not None and self.__encoded.startswith(LazyImageAttribute.PNG_SIGNATURE):
+            # The original file is written without decoding and encoding it again
+            with open(filename, mode='wb') as pngfile:
+                pngfile.write(self.__encoded)
+        else:
+            super().saveToFile(filename)
+
+
 class ChangeableAttribute(AddressableAttribute):
+    __slots__ = ()
+
     def __init__(
         self,
         localAddress: str,
@@ -423,6 +631,8 @@ class ChangeableAttribute(AddressableAttribute):
 
 
 class AliasChangeableAttribute(ChangeableAttribute):
+    __slots__ = ('targetAttribute', 'conversion')
+
     def __init__(
         self,
         localAddress: str,
@@ -453,9 +663,35 @@ class AddressableObject(AddressableLeaf):
         localAddress: str,
         parent: Optional[AddressableObject],
     ) -> None:
+        self.__transaction: Optional[UpdateTransaction] = None
+        self.__notifiedOutsideTransaction: bool = False
         super().__init__(localAddress, parent)
         self.__children: dict[str, AddressableLeaf] = {}
 
+    def updateTransaction(self) -> UpdateTransaction:
+        """Context manager deferring all notifications of this element and its children until the end of the transaction, see UpdateTransaction"""
+        return UpdateTransaction(self)
+
+    def _getTransaction(self) -> Optional[UpdateTransaction]:
+        if self.__transaction is not None:
+            return self.__transaction
+        return super()._getTransaction()
+
+    def _setTransaction(self, transaction: Optional[UpdateTransaction]) -> None:
+        self.__transaction = transaction
+
+    def _notifiedOutsideTransaction(self) -> None:
+        if self.parent is None:
+            self.__notifiedOutsideTransaction = True
+        else:
+            super()._notifiedOutsideTransaction()
+
+    def _takeNotifiedOutsideTransaction(self) -> bool:
+        """Return if elements of this tree were notified outside of a transaction since the last call"""
+        notifiedOutsideTransaction: bool = self.__notifiedOutsideTransaction
+        self.__notifiedOutsideTransaction = False
+        return notifiedOutsideTransaction
+
     @AddressableLeaf.enabled.setter  # type: ignore
     def enabled(self, setEnabled: bool) -> None:
         if not setEnabled and self.enabled:
@@ -577,3 +813,92 @@ class AddressableList(AddressableObject, List[L]):
 
     def __str__(self) -> str:
         return '[' + ', '.join([str(item) for item in self if item.enabled]) + ']'
+
+
+class UpdateTransaction():
+    """Batches the notifications of an element and all its children
+
+    While the transaction is active, elements that change are only recorded and several changes of the same element are combined. When the
+    transaction ends, observers of all changed elements are called once in the order of their priority, followed by the observers for update
+    complete of the changed elements. Transactions inside an active transaction of the same element or one of its parents join the outer transaction.
+    The changes are dispatched when the last participant leaves, so updates running at the same time are dispatched once the last of them ends.
+
+    Args:
+        element (AddressableObject): Element whose notifications are batched, e.g. WeConnect or a Vehicle
+    """
+
+    # Number of active transactions, elements only look for a transaction if there is one
+    active: int = 0
+    # Guards entering and leaving transactions, so two threads never both start a transaction on the same tree
+    __activeLock: Lock = Lock()
+
+    def __init__(self, element: AddressableObject) -> None:
+        self.element: AddressableObject = element
+        self.__lock: Lock = Lock()
+        self.__changed: Dict[int, Tuple[AddressableLeaf, AddressableLeaf.ObserverEvent]] = {}
+        self.__joined: Optional[UpdateTransaction] = None
+        self.__participants: int = 0
+
+    def __enter__(self) -> UpdateTransaction:
+        with UpdateTransaction.__activeLock:
+            transaction: Optional[UpdateTransaction] = self.element._getTransaction()  # pylint: disable=protected-access
+            if transaction is None:
+                self.element._setTransaction(self)  # pylint: disable=protected-access
+                UpdateTransaction.active += 1
+                transaction = self
+            else:
+                self.__joined = transaction
+            transaction.__participants += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # The transaction ends when the last participant leaves, regardless of who started it. Otherwise changes of an update that joined
+        # a concurrent update and finishes after it would never be dispatched.
+        transaction: UpdateTransaction = self.__joined if self.__joined is not None else self
+        self.__joined = None
+        with UpdateTransaction.__activeLock:
+            transaction.__participants -= 1
+            if transaction.__participants > 0:
+                return
+            transaction.element._setTransaction(None)  # pylint: disable=protected-access
+            UpdateTransaction.active -= 1
+        transaction.dispatch()
+
+    def record(self, element: AddressableLeaf, flags: AddressableLeaf.ObserverEvent) -> None:
+        """Record a notification of element, called by AddressableLeaf.notify"""
+        with self.__lock:
+            changed: Optional[Tuple[AddressableLeaf, AddressableLeaf.ObserverEvent]] = self.__changed.get(id(element))
+            self.__changed[id(element)] = (element, AddressableLeaf.mergeFlags(changed[1] if changed is not None else None, flags))
+
+    def dispatch(self) -> None:
+        """Notify the observers of all recorded elements"""
+        with self.__lock:
+            changed: List[Tuple[AddressableLeaf, AddressableLeaf.ObserverEvent]] = list(self.__changed.values())
+            self.__changed = {}
+
+        calls: List[Tuple[int, int, Callable, AddressableLeaf, AddressableLeaf.ObserverEvent]] = []
+        for order, (element, flags) in enumerate(changed):
+            if flags:
+                for observer, _, priority, _ in element.getObserverEntries(flags):
+                    calls.append((int(priority), order, observer, element, flags))
+        # Sorting by priority first keeps the order of the changes for observers of the same priority
+        calls.sort(key=lambda call: (call[0], call[1]))
+        for _, _, observer, element, flags in calls:
+            UpdateTransaction.__call(observer, element, flags)
+
+        for element, _ in changed:
+            completeFlags: Optional[AddressableLeaf.ObserverEvent] = element.onCompleteNotifyFlags
+            if completeFlags is not None:
+                for observer in element.getObservers(completeFlags, onUpdateComplete=True):
+                    UpdateTransaction.__call(observer, element, completeFlags)
+                element.onCompleteNotifyFlags = None
+        if self.element.parent is None and self.element._takeNotifiedOutsideTransaction():  # pylint: disable=protected-access
+            self.element.updateComplete()
+
+    @staticmethod
+    def __call(observer: Callable, element: AddressableLeaf, flags: AddressableLeaf.ObserverEvent) -> None:
+        # A failing observer must not keep the others from being notified
+        try:
+            observer(element=element, flags=flags)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            LOG.error('%s: Observer %s failed: %s', element.getGlobalAddress(), observer, err)
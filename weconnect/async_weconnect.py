@@ -0,0 +1,272 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple, Any, Optional, Union
+
+import asyncio
+import contextvars
+import logging
+
+import aiohttp
+import requests
+
+from weconnect.auth.async_openid_session import AsyncOpenIDSession
+from weconnect.cache import Cache
+from weconnect.image_store import ImageStore
+from weconnect.domain import Domain
+from weconnect.elements.vehicle import Vehicle
+from weconnect.errors import RetrievalError
+from weconnect.weconnect import WeConnect
+from weconnect.weconnect_errors import ErrorEventType
+
+SUPPORT_IMAGES = False
+try:
+    from PIL import Image  # type: ignore # noqa: F401 # pylint: disable=unused-import
+    SUPPORT_IMAGES = True
+except ImportError:
+    pass
+
+LOG = logging.getLogger("weconnect")
+
+# Responses prefetched for the update running in the current context, every update has its own so concurrent updates do not interfere
+PREFETCHED: contextvars.ContextVar[Optional[Dict[str, Tuple[Optional[Any], Optional[Exception]]]]] = \
+    contextvars.ContextVar('prefetched', default=None)
+
+
+class AsyncWeConnect(WeConnect):
+    """WeConnect interface that does its HTTP I/O with asyncio
+
+    All requests of an update cycle are fetched concurrently on the event loop. Afterwards the addressable tree is built from the fetched data using the
+    same code as WeConnect, so the resulting vehicles and observers behave exactly the same.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        username: str,
+        password: str,
+        spin: Union[str, bool] = None,
+        tokenfile: Optional[str] = None,
+        fixAPI: bool = True,
+        proxy: Optional[str] = None,
+        maxAge: Optional[int] = None,
+        maxAgePictures: Optional[int] = None,
+        numRetries: int = 3,
+        timeout: bool = None,
+        forceReloginAfter: Optional[int] = None,
+        maxConnections: int = 100,
+        tokenRefreshMargin: Optional[int] = None,
+        requestsPerHour: Optional[float] = None,
+        requestBurst: int = 10,
+        cache: Optional[Cache] = None,
+        maxAgePolicy: Optional[Dict[Union[str, Domain], int]] = None,
+        staleWhileRevalidate: Optional[int] = None,
+        imageStore: Optional[ImageStore] = None
+    ) -> None:
+        """Initialize asyncio WeConnect interface. Login and update need to be awaited manually.
+
+        Args:
+            username (str): Username used with WeConnect. This is your volkswagen user.
+            password (str): Password used with WeConnect. This is your volkswagen password.
+            tokenfile (str, optional): Optional file to read/write token from/to. Defaults to None.
+            fixAPI (bool, optional): Automatically fix known issues with the WeConnect responses. Defaults to True.
+            proxy (str, optional): Set a proxy IP adress and port
+            maxAge (int, optional): Maximum age of the cache before date is fetched again. None means no caching. Defaults to None.
+            maxAgePictures (Optional[int], optional):  Maximum age of the pictures in the cache before date is fetched again. None means no caching.
+            Defaults to None.
+            numRetries (int, optional): Number of retries when http requests are failing. Defaults to 3.
+            timeout (bool, optional, optional): Timeout in seconds used for http connections to the VW servers
+            forceReloginAfter (int, optional): Force a full relogin after number of seconds. This might be necessary to get fresh data
+            maxConnections (int, optional): Maximum number of simultaneous connections to the VW servers. Defaults to 100.
+            tokenRefreshMargin (int, optional): Refresh tokens in a background thread this many seconds before they expire. Defaults to None.
+            requestsPerHour (float, optional): Limit the requests to the VW servers, requests exceeding the limit are delayed. Defaults to None.
+            requestBurst (int, optional): Number of requests that can be sent at once when requestsPerHour is used. Defaults to 10.
+            cache (Cache, optional): Backend for the response cache. Defaults to an unlimited MemoryCache.
+            maxAgePolicy (Dict[Union[str, Domain], int], optional): Maximum age of the cache per URL pattern or domain. Defaults to None.
+            staleWhileRevalidate (int, optional): Seconds after the maximum age in which outdated data is returned immediately while it is fetched in the
+            background. Defaults to None.
+            imageStore (ImageStore, optional): Store for downloaded images, the cache then only keeps references to the stored files.
+            Defaults to None.
+        """
+        super().__init__(username=username, password=password, spin=spin, tokenfile=tokenfile, updateAfterLogin=False, loginOnInit=False,
+                         fixAPI=fixAPI, proxy=proxy, maxAge=maxAge, maxAgePictures=maxAgePictures, numRetries=numRetries, timeout=timeout,
+                         forceReloginAfter=forceReloginAfter, tokenRefreshMargin=tokenRefreshMargin,
+                         requestsPerHour=requestsPerHour, requestBurst=requestBurst, cache=cache, maxAgePolicy=maxAgePolicy,
+                         staleWhileRevalidate=staleWhileRevalidate, imageStore=imageStore)
+        self.__asyncSession: AsyncOpenIDSession = AsyncOpenIDSession(self.session, maxConnections=maxConnections)
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def asyncSession(self) -> AsyncOpenIDSession:
+        return self.__asyncSession
+
+    async def close(self) -> None:
+        await self.__asyncSession.close()
+
+    async def loginAsync(self, generation: Optional[int] = None) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.login, generation)
+
+    async def update(self, updateCapabilities: bool = True, updatePictures: bool = True, force: bool = False,  # pylint: disable=invalid-overridden-method
+                     selective: Optional[list[Domain]] = None) -> None:
+        self._lastUpdateArgs = {'updateCapabilities': updateCapabilities, 'updatePictures': updatePictures, 'selective': selective}
+        self.__loop = asyncio.get_running_loop()
+        self.clearElapsed()
+        try:
+            # Observers are notified once all vehicles and charging stations are updated
+            with self.updateTransaction():
+                await self.updateVehicles(updateCapabilities=updateCapabilities, updatePictures=updatePictures, force=force, selective=selective)
+                await self.updateChargingStations(force=force)
+        finally:
+            self.session.cookies.clear()  # Clear cookies to have a fresh session afterwards
+
+    async def updateVehicles(self, updateCapabilities: bool = True, updatePictures: bool = True,  # noqa: C901 # pylint: disable=invalid-overridden-method
+                             force: bool = False, selective: Optional[list[Domain]] = None) -> None:
+        prefetched: Dict[str, Tuple[Optional[Any], Optional[Exception]]] = {}
+        token: contextvars.Token = PREFETCHED.set(prefetched)
+        try:
+            await self.__prefetch(prefetched, WeConnect.VEHICLES_URL, force=force)
+            data, error = prefetched[WeConnect.VEHICLES_URL]
+            if error is None and data is not None and 'data' in data and data['data']:
+                # Vehicles must exist to know which requests they need, new vehicles are created without fetching their status
+                vehicles: List[Vehicle] = []
+                for vehicleDict in data['data']:
+                    if 'vin' not in vehicleDict:
+                        break
+                    vin: str = vehicleDict['vin']
+                    if vin not in self.vehicles:
+                        self.vehicles[vin] = Vehicle(weConnect=self, vin=vin, parent=self.vehicles, fromDict=vehicleDict, fixAPI=self.fixAPI,
+                                                     updateCapabilities=updateCapabilities, updatePictures=False, selective=selective,
+                                                     enableTracker=self.trackerEnabled, fetchStatus=False)
+                    else:
+                        self.vehicles[vin].update(fromDict=vehicleDict, updateCapabilities=updateCapabilities, updatePictures=False, fetchStatus=False)
+                    vehicles.append(self.vehicles[vin])
+
+                prefetches = []
+                for vehicle in vehicles:
+                    for url, kwargs in vehicle.getStatusRequests(updateCapabilities=updateCapabilities, selective=selective):
+                        prefetches.append(self.__prefetch(prefetched, url, force=force, **kwargs))
+                    if SUPPORT_IMAGES and updatePictures:
+                        prefetches.append(self.__prefetchPictures(prefetched, vehicle))
+                await asyncio.gather(*prefetches)
+
+            # Build the tree from the prefetched data
+            super().updateVehicles(updateCapabilities=updateCapabilities, updatePictures=updatePictures, force=force, selective=selective)
+        finally:
+            PREFETCHED.reset(token)
+
+    async def updateChargingStations(self, force: bool = False) -> None:  # pylint: disable=invalid-overridden-method
+        if self.latitude is not None and self.longitude is not None:
+            prefetched: Dict[str, Tuple[Optional[Any], Optional[Exception]]] = {}
+            token: contextvars.Token = PREFETCHED.set(prefetched)
+            try:
+                url: str = self.getChargingStationsUrl(self.latitude, self.longitude, searchRadius=self.searchRadius, market=self.market,
+                                                       useLocale=self.useLocale)
+                await self.__prefetch(prefetched, url, force=force)
+                super().updateChargingStations(force=force)
+            finally:
+                PREFETCHED.reset(token)
+
+    async def __prefetch(self, prefetched: Dict[str, Tuple[Optional[Any], Optional[Exception]]], url: str, **kwargs) -> None:
+        try:
+            prefetched[url] = (await self.fetchDataAsync(url, **kwargs), None)
+        except RetrievalError as retrievalError:
+            prefetched[url] = (None, retrievalError)
+
+    async def __prefetchPictures(self, prefetched: Dict[str, Tuple[Optional[Any], Optional[Exception]]], vehicle: Vehicle) -> None:
+        url: str = vehicle.getPicturesUrl()
+        await self.__prefetch(prefetched, url, allowHttpError=True)
+        data, error = prefetched[url]
+        if error is None and data is not None and 'data' in data:
+            imageurls: List[str] = [image['url'] for image in data['data'] if not self.lookupCache(image['url'], self.maxAgePictures)[1]]
+            await asyncio.gather(*[self.__prefetchImage(prefetched, imageurl) for imageurl in imageurls])
+
+    async def __prefetchImage(self, prefetched: Dict[str, Tuple[Optional[Any], Optional[Exception]]], url: str) -> None:
+        try:
+            prefetched[url] = (await self.fetchImageDataAsync(url), None)
+        except RetrievalError as retrievalError:
+            prefetched[url] = (None, retrievalError)
+
+    def _onRevalidated(self) -> None:
+        """Repeats the last update on the event loop the update was running on"""
+        if self._lastUpdateArgs is not None and self.__loop is not None and not self.__loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.update(**self._lastUpdateArgs), self.__loop)
+
+    def fetchData(self, url, force=False, allowEmpty=False, allowHttpError=False, allowedErrors=None, allowStale=True) -> Optional[Dict[str, Any]]:
+        prefetched: Optional[Dict[str, Tuple[Optional[Any], Optional[Exception]]]] = PREFETCHED.get()
+        if prefetched is not None and url in prefetched:
+            data, error = prefetched[url]
+            if error is not None:
+                raise error
+            return data
+        LOG.debug('%s was not prefetched, fetching it synchronously', url)
+        return super().fetchData(url, force=force, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors,
+                                 allowStale=allowStale)
+
+    def fetchImageData(self, url: str) -> Optional[bytes]:
+        prefetched: Optional[Dict[str, Tuple[Optional[Any], Optional[Exception]]]] = PREFETCHED.get()
+        if prefetched is not None and url in prefetched:
+            data, error = prefetched[url]
+            if error is not None:
+                raise error
+            return data
+        LOG.debug('%s was not prefetched, fetching it synchronously', url)
+        return super().fetchImageData(url)
+
+    async def fetchDataAsync(self, url, force=False, allowEmpty=False, allowHttpError=False, allowedErrors=None,  # noqa: C901
+                             allowStale=True) -> Optional[Dict[str, Any]]:
+        data: Optional[Dict[str, Any]] = None
+        headers: Dict[str, str] = {}
+        if not force:
+            maxAge: Optional[int] = self.getMaxAge(url)
+            data, fresh = self.lookupCache(url, maxAge)
+            if fresh:
+                return data
+            if allowStale and self.isStaleUsable(url, maxAge):
+                self.revalidate(url, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors)
+                return data
+            headers = self.getConditionalHeaders(url, data)
+        try:
+            generation: int = self.session.authGeneration
+            statusResponse = await self.__asyncSession.get(url, allow_redirects=False, headers=headers)
+            self.recordElapsed(statusResponse.elapsed)
+            if statusResponse.status_code == requests.codes['unauthorized']:
+                LOG.info('Server asks for new authorization')
+                await self.loginAsync(generation)
+                statusResponse = await self.__asyncSession.get(url, allow_redirects=False, headers=headers)
+                self.recordElapsed(statusResponse.elapsed)
+                return self._processResponse(url, statusResponse, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors,
+                                             reauthorized=True)
+            return self._processResponse(url, statusResponse, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors)
+        except aiohttp.ClientPayloadError as payloadError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'chunked encoding error',
+                             'Could not fetch data due to connection problem with chunked encoding')
+            raise RetrievalError from payloadError
+        except aiohttp.ClientError as connectionError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'connection', 'Could not fetch data due to connection problem')
+            raise RetrievalError from connectionError
+        except asyncio.TimeoutError as timeoutError:
+            self.notifyError(self, ErrorEventType.TIMEOUT, 'timeout', 'Could not fetch data due to timeout')
+            raise RetrievalError from timeoutError
+
+    async def fetchImageDataAsync(self, url: str) -> Optional[bytes]:
+        try:
+            generation: int = self.session.authGeneration
+            imageDownloadResponse = await self.__asyncSession.get(url)
+            self.recordElapsed(imageDownloadResponse.elapsed)
+            if imageDownloadResponse.status_code == requests.codes['unauthorized']:
+                LOG.info('Server asks for new authorization')
+                await self.loginAsync(generation)
+                imageDownloadResponse = await self.__asyncSession.get(url)
+                self.recordElapsed(imageDownloadResponse.elapsed)
+                if imageDownloadResponse.status_code != requests.codes['ok']:
+                    self.notifyError(self, ErrorEventType.HTTP, str(imageDownloadResponse.status_code),
+                                     'Could not fetch vehicle image due to server error')
+                    raise RetrievalError('Could not retrieve vehicle image even after re-authorization.'
+                                         f' Status Code was: {imageDownloadResponse.status_code}')
+            if imageDownloadResponse.status_code == requests.codes['ok']:
+                return imageDownloadResponse.content
+            LOG.warning('Failed downloading picture %s with status code %d will try again in next update', url, imageDownloadResponse.status_code)
+            return None
+        except aiohttp.ClientError as connectionError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'connection', 'Could not fetch vehicle image due to connection problem')
+            raise RetrievalError from connectionError
+        except asyncio.TimeoutError as timeoutError:
+            self.notifyError(self, ErrorEventType.TIMEOUT, 'timeout', 'Could not fetch vehicle image due to timeout')
+            raise RetrievalError from timeoutError
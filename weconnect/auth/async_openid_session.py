@@ -0,0 +1,118 @@
+from typing import Any, Dict, Optional
+import asyncio
+import functools
+import json
+import logging
+import time
+from datetime import timedelta
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from weconnect.auth.openid_session import OpenIDSession, AccessType
+from weconnect.elements.helpers.request_scheduler import RequestScheduler, parseRetryAfter
+
+
+LOG = logging.getLogger("weconnect")
+
+
+class AsyncResponse():
+    """Fully read response of an AsyncOpenIDSession request. Offers the subset of requests.Response used by WeConnect"""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, elapsed: timedelta) -> None:
+        self.url: str = url
+        self.status_code: int = status_code
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict(headers)
+        self.content: bytes = content
+        self.elapsed: timedelta = elapsed
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.content)
+        except json.JSONDecodeError as err:
+            raise requests.exceptions.JSONDecodeError(err.msg, err.doc, err.pos) from err
+
+
+class AsyncOpenIDSession():
+    """Asyncio counterpart of OpenIDSession.request
+
+    Tokens, headers, proxies and timeouts are taken from the wrapped synchronous session so that both share one login. Only login and token refresh,
+    which happen rarely, are executed in the default executor of the event loop.
+    """
+
+    def __init__(self, session: OpenIDSession, maxConnections: int = 100) -> None:
+        self.session: OpenIDSession = session
+        self.maxConnections: int = maxConnections
+        self.__clientSession: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def clientSession(self) -> aiohttp.ClientSession:
+        if self.__clientSession is None or self.__clientSession.closed:
+            timeout = aiohttp.ClientTimeout(total=self.session.timeout)
+            self.__clientSession = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.maxConnections), timeout=timeout)
+        return self.__clientSession
+
+    async def close(self) -> None:
+        if self.__clientSession is not None:
+            await self.__clientSession.close()
+            self.__clientSession = None
+
+    async def authorizeRequest(self, url, data=None, headers=None, withhold_token=False, access_type=AccessType.ACCESS, token=None):
+        """Prepare a request. If the token is not usable anymore the refresh or login is done in the executor."""
+        if access_type == AccessType.NONE or withhold_token or token is not None \
+                or (self.session.authorized and not self.session.expired and not self.session.reloginDue):
+            return self.session.authorizeRequest(url, data=data, headers=headers, withhold_token=withhold_token, access_type=access_type, token=token)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.session.authorizeRequest, url, data=data, headers=headers,
+                                                                  withhold_token=withhold_token, access_type=access_type, token=token))
+
+    async def request(self, method, url, data=None, headers=None, withhold_token=False, access_type=AccessType.ACCESS, token=None,
+                      **kwargs) -> AsyncResponse:
+        url, headers, data = await self.authorizeRequest(url, data=data, headers=headers, withhold_token=withhold_token, access_type=access_type,
+                                                         token=token)
+        requestHeaders: Dict[str, str] = dict(self.session.headers)
+        if headers is not None:
+            requestHeaders.update(headers)
+        if 'proxy' not in kwargs and self.session.proxies:
+            kwargs['proxy'] = self.session.proxies.get('https')
+
+        scheduler: Optional[RequestScheduler] = self.session.scheduler if access_type == AccessType.ACCESS else None
+        retries: int = self.session.retries or 0
+        attempt: int = 0
+        tooManyRequestsAttempt: int = 0
+        while True:
+            if scheduler is not None:
+                await scheduler.acquireAsync()
+            start: float = time.monotonic()
+            async with self.clientSession.request(method, url, data=data, headers=requestHeaders, **kwargs) as response:
+                content: bytes = await response.read()
+                asyncResponse = AsyncResponse(url=str(response.url), status_code=response.status, headers=response.headers, content=content,
+                                              elapsed=timedelta(seconds=(time.monotonic() - start)))
+            # Retry after the time given by the server when a scheduler is used, like the synchronous session does
+            if scheduler is not None and asyncResponse.status_code == requests.codes['too_many_requests'] and tooManyRequestsAttempt < scheduler.maxRetries:
+                retryAfter: Optional[float] = parseRetryAfter(asyncResponse.headers.get('Retry-After'))
+                if retryAfter is None:
+                    retryAfter = scheduler.defaultRetryAfter
+                LOG.warning('Too many requests, will retry %s in %.0fs', url, retryAfter)
+                scheduler.pause(retryAfter)
+                tooManyRequestsAttempt += 1
+                continue
+            # Retry on internal server error (500) like the synchronous session does
+            if asyncResponse.status_code != requests.codes['internal_server_error'] or attempt >= retries:
+                return asyncResponse
+            await asyncio.sleep(0.1 * (2 ** attempt))
+            attempt += 1
+
+    async def get(self, url, **kwargs) -> AsyncResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, data=None, **kwargs) -> AsyncResponse:
+        return await self.request('POST', url, data=data, **kwargs)
+
+    async def put(self, url, data=None, **kwargs) -> AsyncResponse:
+        return await self.request('PUT', url, data=data, **kwargs)
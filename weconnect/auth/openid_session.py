@@ -1,6 +1,7 @@
 from enum import Enum, auto
 import time
 import logging
+from threading import RLock
 from oauthlib.oauth2.rfc6749.errors import InsecureTransportError, TokenExpiredError, MissingTokenError
 from oauthlib.oauth2.rfc6749.utils import is_secure_transport
 
@@ -15,6 +16,7 @@ from weconnect.auth.auth_util import addBearerAuthHeader
 from weconnect.errors import AuthentificationError, RetrievalError
 
 from weconnect.elements.helpers.blacklist_retry import BlacklistRetry
+from weconnect.elements.helpers.request_scheduler import RequestScheduler, parseRetryAfter
 
 
 LOG = logging.getLogger("weconnect")
@@ -29,7 +31,7 @@ class AccessType(Enum):
 
 class OpenIDSession(requests.Session):
     def __init__(self, client_id=None, redirect_uri=None, refresh_url=None, scope=None, token=None, metadata={}, state=None, timeout=None,
-                 forceReloginAfter=None, **kwargs):
+                 forceReloginAfter=None, poolConnections=10, poolMaxsize=10, poolBlock=False, **kwargs):
         super(OpenIDSession, self).__init__(**kwargs)
         self.client_id = client_id
         self.redirect_uri = redirect_uri
@@ -45,6 +47,14 @@ class OpenIDSession(requests.Session):
         self.forceReloginAfter = forceReloginAfter
 
         self._retries = False
+        self.scheduler = None
+        self._poolConnections = poolConnections
+        self._poolMaxsize = poolMaxsize
+        self._poolBlock = poolBlock
+
+        # Only one thread at a time does a login or refresh, the generation is increased after each of them
+        self._authLock = RLock()
+        self._authGeneration = 0
 
     @property
     def forceReloginAfter(self):
@@ -64,13 +74,37 @@ class OpenIDSession(requests.Session):
     def retries(self, newValue):
         self._retries = newValue
         if newValue:
+            self.mountAdapters()
+
+    def configurePool(self, poolConnections=10, poolMaxsize=10, poolBlock=False):
+        """Configure the connection pools used for the requests
+
+        Args:
+            poolConnections (int, optional): Number of hosts connections are kept open for. Defaults to 10.
+            poolMaxsize (int, optional): Maximum number of connections kept open per host. Defaults to 10.
+            poolBlock (bool, optional): Wait for a free connection instead of opening additional connections that are not kept open afterwards.
+            Defaults to False.
+        """
+        self._poolConnections = poolConnections
+        self._poolMaxsize = poolMaxsize
+        self._poolBlock = poolBlock
+        self.mountAdapters()
+
+    def mountAdapters(self):
+        """Mount adapters with the configured retries and connection pool. Open connections of previously mounted adapters are closed."""
+        retries = 0
+        if self._retries:
             # Retry on internal server error (500)
-            retries = BlacklistRetry(total=newValue,
+            retries = BlacklistRetry(total=self._retries,
                                      backoff_factor=0.1,
                                      status_forcelist=[500],
                                      status_blacklist=[429],
                                      raise_on_status=False)
-            self.mount('https://', HTTPAdapter(max_retries=retries))
+        for prefix in ['https://', 'http://']:
+            if prefix in self.adapters:
+                self.adapters[prefix].close()
+            self.mount(prefix, HTTPAdapter(max_retries=retries, pool_connections=self._poolConnections, pool_maxsize=self._poolMaxsize,
+                                           pool_block=self._poolBlock))
 
     @property
     def token(self):
@@ -156,6 +190,42 @@ class OpenIDSession(requests.Session):
     def refresh(self):
         pass
 
+    @property
+    def authGeneration(self):
+        return self._authGeneration
+
+    def relogin(self, generation=None):
+        """Login. If generation is given the login is skipped when another thread did a login or refresh since generation was read."""
+        with self._authLock:
+            if generation is not None and generation != self._authGeneration:
+                LOG.debug('Skipping login, tokens were renewed in the meantime')
+                return
+            self.login()
+            self._authGeneration += 1
+
+    def refreshOrRelogin(self, generation=None, invalidateAccessToken=True):
+        """Refresh the tokens or login if refresh is not possible. If generation is given nothing is done when another thread did a login or
+        refresh since generation was read. With invalidateAccessToken set to False the current access token can be used by other threads until
+        the new one is available."""
+        with self._authLock:
+            if generation is not None and generation != self._authGeneration:
+                LOG.debug('Skipping refresh, tokens were renewed in the meantime')
+                return
+            if invalidateAccessToken:
+                self.accessToken = None
+            try:
+                self.refresh()
+            except AuthentificationError:
+                self.login()
+            except TokenExpiredError:
+                self.login()
+            except MissingTokenError:
+                self.login()
+            except RetrievalError:
+                LOG.error('Retrieval Error while refreshing token. Probably the token was invalidated. Trying to do a new login instead.')
+                self.login()
+            self._authGeneration += 1
+
     def authorizationUrl(self, url, state=None, **kwargs):
         state = state or self.state
         authUrl = prepare_grant_uri(uri=url, client_id=self.client_id, redirect_uri=self.redirect_uri, response_type='code id_token token', scope=self.scope,
@@ -171,7 +241,11 @@ class OpenIDSession(requests.Session):
         self.token = parse_token_response(token_response, scope=self.scope)
         return self.token
 
-    def request(  # noqa: C901
+    @property
+    def reloginDue(self):
+        return self.forceReloginAfter is not None and self.lastLogin is not None and (self.lastLogin + self.forceReloginAfter) < time.time()
+
+    def request(
         self,
         method,
         url,
@@ -184,41 +258,54 @@ class OpenIDSession(requests.Session):
         **kwargs
     ):
         """Intercept all requests and add the OAuth 2 token if present."""
+        url, headers, data = self.authorizeRequest(url, data=data, headers=headers, withhold_token=withhold_token, access_type=access_type, token=token)
+
+        if timeout is None:
+            timeout = self.timeout
+
+        if self.scheduler is None or access_type != AccessType.ACCESS:
+            return super(OpenIDSession, self).request(
+                method, url, headers=headers, data=data, **kwargs
+            )
+        return self.scheduledRequest(self.scheduler, method, url, headers=headers, data=data, **kwargs)
+
+    def scheduledRequest(self, scheduler: RequestScheduler, method, url, headers=None, data=None, **kwargs):
+        """Send request when the scheduler allows it and retry it after the time given by the server when it answers with too many requests"""
+        attempt = 0
+        while True:
+            scheduler.acquire()
+            response = super(OpenIDSession, self).request(method, url, headers=headers, data=data, **kwargs)
+            if response.status_code != requests.codes['too_many_requests'] or attempt >= scheduler.maxRetries:
+                return response
+            retryAfter = parseRetryAfter(response.headers.get('Retry-After'))
+            if retryAfter is None:
+                retryAfter = scheduler.defaultRetryAfter
+            LOG.warning('Too many requests, will retry %s in %.0fs', url, retryAfter)
+            scheduler.pause(retryAfter)
+            attempt += 1
+
+    def authorizeRequest(self, url, data=None, headers=None, withhold_token=False, access_type=AccessType.ACCESS, token=None):
+        """Prepare url, headers and body of a request. Adds the token and does a refresh or login if necessary."""
         if not is_secure_transport(url):
             raise InsecureTransportError()
         if access_type != AccessType.NONE and not withhold_token:
-            if self.forceReloginAfter is not None and self.lastLogin is not None and (self.lastLogin + self.forceReloginAfter) < time.time():
+            generation = self._authGeneration
+            if self.reloginDue:
                 LOG.debug("Forced new login after %ds", self.forceReloginAfter)
-                self.login()
+                self.relogin(generation)
+                generation = self._authGeneration
             try:
                 url, headers, data = self.addToken(url, body=data, headers=headers, access_type=access_type, token=token)
             # Attempt to retrieve and save new access token if expired
             except TokenExpiredError:
                 LOG.info('Token expired')
-                self.accessToken = None
-                try:
-                    self.refresh()
-                except AuthentificationError:
-                    self.login()
-                except TokenExpiredError:
-                    self.login()
-                except MissingTokenError:
-                    self.login()
-                except RetrievalError:
-                    LOG.error('Retrieval Error while refreshing token. Probably the token was invalidated. Trying to do a new login instead.')
-                    self.login()
+                self.refreshOrRelogin(generation)
                 url, headers, data = self.addToken(url, body=data, headers=headers, access_type=access_type, token=token)
             except MissingTokenError:
                 LOG.error('Missing token')
-                self.login()
+                self.relogin(generation)
                 url, headers, data = self.addToken(url, body=data, headers=headers, access_type=access_type, token=token)
-
-        if timeout is None:
-            timeout = self.timeout
-
-        return super(OpenIDSession, self).request(
-            method, url, headers=headers, data=data, **kwargs
-        )
+        return (url, headers, data)
 
     def addToken(self, uri, body=None, headers=None, access_type=AccessType.ACCESS, token=None, **kwargs):
         if not is_secure_transport(uri):
@@ -234,8 +321,9 @@ class OpenIDSession(requests.Session):
                     raise MissingTokenError(description="Missing refresh token.")
                 token = self.refreshToken
             else:
+                generation = self._authGeneration
                 if not self.authorized:
-                    self.login()
+                    self.relogin(generation)
                 if not (self.accessToken):
                     raise MissingTokenError(description="Missing access token.")
                 if self.expired:
@@ -0,0 +1,86 @@
+from typing import Callable, Optional
+from threading import Lock, Timer
+import time
+import logging
+
+from weconnect.auth.openid_session import OpenIDSession
+from weconnect.errors import AuthentificationError, RetrievalError
+
+
+LOG = logging.getLogger("weconnect")
+
+
+class TokenRefresher:
+    """Refreshes the tokens of a session in a background thread a margin before they expire
+
+    The access token stays valid while the refresh is running, so requests of other threads do not have to wait for it.
+    """
+
+    def __init__(self, session: OpenIDSession, margin: int = 300, retryInterval: int = 60, onRefresh: Optional[Callable[[], None]] = None) -> None:
+        """Initialize TokenRefresher. Refreshing starts with start().
+
+        Args:
+            session (OpenIDSession): Session to refresh the tokens for
+            margin (int, optional): Seconds before expiry of the access token the refresh is done. Defaults to 300.
+            retryInterval (int, optional): Seconds to wait before checking again when there is no token or refreshing failed. Defaults to 60.
+            onRefresh (Callable[[], None], optional): Called after each successful refresh, e.g. to persist the new tokens. Defaults to None.
+        """
+        self.session: OpenIDSession = session
+        self.margin: int = margin
+        self.retryInterval: int = retryInterval
+        self.onRefresh: Optional[Callable[[], None]] = onRefresh
+        self.__lock: Lock = Lock()
+        self.__timer: Optional[Timer] = None
+        self.__running: bool = False
+
+    @property
+    def running(self) -> bool:
+        return self.__running
+
+    def start(self) -> None:
+        with self.__lock:
+            self.__running = True
+        self.__schedule()
+
+    def stop(self) -> None:
+        with self.__lock:
+            self.__running = False
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+    def nextRefreshIn(self) -> float:
+        """Seconds until the next refresh is due"""
+        expiresAt = self.session.expiresAt
+        if expiresAt is None or not self.session.authorized:
+            return self.retryInterval
+        return max(0.0, expiresAt - self.margin - time.time())
+
+    def __schedule(self, delay: Optional[float] = None) -> None:
+        with self.__lock:
+            if not self.__running:
+                return
+            if delay is None:
+                delay = self.nextRefreshIn()
+            LOG.debug('Next token refresh in %.0fs', delay)
+            self.__timer = Timer(delay, self.__refresh)
+            self.__timer.daemon = True
+            self.__timer.start()
+
+    def __refresh(self) -> None:
+        delay: Optional[float] = self.retryInterval
+        try:
+            # The tokens may have been renewed by a request in the meantime
+            if self.session.authorized and self.session.expiresAt is not None and self.nextRefreshIn() <= 0:
+                LOG.info('Refreshing tokens in background')
+                self.session.refreshOrRelogin(self.session.authGeneration, invalidateAccessToken=False)
+                if self.onRefresh is not None:
+                    self.onRefresh()
+            delay = None
+        except (AuthentificationError, RetrievalError) as err:
+            LOG.warning('Refreshing tokens in background failed, will try again in %ds: %s', self.retryInterval, err)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            # Anything escaping here would end the timer thread and no refresh would be scheduled anymore
+            LOG.error('Refreshing tokens in background failed unexpectedly, will try again in %ds: %s', self.retryInterval, err)
+        finally:
+            self.__schedule(delay)
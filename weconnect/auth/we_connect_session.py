@@ -46,18 +46,7 @@ class WeConnectSession(VWWebSession):
             'Pragma': 'no-cache'
         })
 
-    def request(
-        self,
-        method,
-        url,
-        data=None,
-        headers=None,
-        withhold_token=False,
-        access_type=AccessType.ACCESS,
-        token=None,
-        timeout=None,
-        **kwargs
-    ):
+    def authorizeRequest(self, url, data=None, headers=None, withhold_token=False, access_type=AccessType.ACCESS, token=None):
         """Intercept all requests and add weconnect-trace-id header."""
 
         import secrets
@@ -66,9 +55,8 @@ class WeConnectSession(VWWebSession):
         headers = headers or {}
         headers['weconnect-trace-id'] = weConnectTraceId
 
-        return super(WeConnectSession, self).request(
-            method, url, headers=headers, data=data, withhold_token=withhold_token, access_type=access_type, token=token, timeout=timeout, **kwargs
-        )
+        return super(WeConnectSession, self).authorizeRequest(url, data=data, headers=headers, withhold_token=withhold_token, access_type=access_type,
+                                                              token=token)
 
     def login(self):
         super(WeConnectSession, self).login()
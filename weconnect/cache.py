@@ -0,0 +1,385 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import RLock
+import base64
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from weconnect.util import ExtendedEncoder
+
+LOG = logging.getLogger("weconnect")
+
+
+class CacheEntry(NamedTuple):
+    """Cached response. storedAt is the time of the last successful fetch or revalidation in seconds since the epoch and is used for persistence.
+    fetchedAt is the same time on the monotonic clock, so the age of entries is not affected by changes of the system clock."""
+    data: Any
+    storedAt: float
+    validators: Optional[Dict[str, str]] = None
+    fetchedAt: Optional[float] = None
+
+    @property
+    def age(self) -> float:
+        if self.fetchedAt is not None:
+            return time.monotonic() - self.fetchedAt
+        return time.time() - self.storedAt
+
+    @staticmethod
+    def monotonicTime(storedAt: Optional[float]) -> float:
+        """Time on the monotonic clock for storedAt, the current time if storedAt is None"""
+        if storedAt is None:
+            return time.monotonic()
+        return time.monotonic() - max(0.0, time.time() - storedAt)
+
+
+class Cache(ABC):
+    """Interface of the response cache used by WeConnect. Keys are the URLs the data was fetched from."""
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key or None. Counts as hit or miss."""
+
+    @abstractmethod
+    def put(self, key: str, data: Any, validators: Optional[Dict[str, str]] = None, storedAt: Optional[float] = None, size: Optional[int] = None) -> None:
+        """Store data for key. storedAt defaults to now. size is the size of the data in bytes if known, e.g. the length of the response body."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def keys(self) -> List[str]:
+        pass
+
+    def touch(self, key: str) -> None:
+        """Mark the entry for key as fetched right now, e.g. after the server confirmed it is still valid"""
+        entry: Optional[CacheEntry] = self.peek(key)
+        if entry is not None:
+            self.put(key, entry.data, validators=entry.validators, size=self.sizeOfEntry(key))
+
+    @abstractmethod
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key without counting it as hit or miss"""
+
+    def close(self) -> None:
+        pass
+
+    def sizeOfEntry(self, key: str) -> Optional[int]:  # pylint: disable=unused-argument
+        """Known size of the entry for key, None if the backend does not track it"""
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def toDict(self) -> Dict[str, List[Any]]:
+        """Serializable representation in the format of the json cache files. Binary data is base64 encoded."""
+        result: Dict[str, List[Any]] = {}
+        for key in self.keys():
+            entry: Optional[CacheEntry] = self.peek(key)
+            if entry is None:
+                continue
+            data: Any = entry.data
+            if isinstance(data, bytes):
+                data = base64.b64encode(data).decode('utf-8')
+            storedAt: str = str(datetime.fromtimestamp(entry.storedAt, tz=timezone.utc).replace(tzinfo=None))
+            result[key] = [data, storedAt] if entry.validators is None else [data, storedAt, entry.validators]
+        return result
+
+    def fromDict(self, fromDict: Dict[str, List[Any]]) -> None:
+        """Replace the content with entries in the format of the json cache files"""
+        self.clear()
+        for key, data, validators, storedAt in Cache.entriesFromDict(fromDict):
+            self.put(key, data, validators=validators, storedAt=storedAt)
+
+    @staticmethod
+    def entriesFromDict(fromDict: Dict[str, List[Any]]) -> Iterator[Tuple[str, Any, Optional[Dict[str, str]], float]]:
+        """Key, data, validators and storedAt of the valid entries in the format of the json cache files"""
+        for key, value in fromDict.items():
+            try:
+                storedAt: float = datetime.fromisoformat(value[1]).replace(tzinfo=timezone.utc).timestamp()
+            except (TypeError, ValueError, IndexError):
+                LOG.warning('Ignoring cache entry for %s with invalid date', key)
+                continue
+            yield key, value[0], value[2] if len(value) > 2 else None, storedAt
+
+    def toJson(self) -> str:
+        return json.dumps(self.toDict(), cls=ExtendedEncoder)
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        entry: Optional[CacheEntry] = self.peek(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.peek(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+class MemoryCache(Cache):
+    """In memory cache with least recently used eviction
+
+    Args:
+        maxEntries (int, optional): Maximum number of entries. None means unlimited. Defaults to None.
+        maxBytes (int, optional): Maximum approximate size of all cached data in bytes. None means unlimited. Defaults to None.
+        ttl (float, optional): Seconds after which an entry is removed, regardless of how it is used. None means entries do not expire.
+        Defaults to None.
+    """
+
+    class Slot(NamedTuple):
+        entry: CacheEntry
+        size: int
+        deadline: Optional[float]
+
+    def __init__(self, maxEntries: Optional[int] = None, maxBytes: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        super().__init__()
+        self.maxEntries: Optional[int] = maxEntries
+        self.maxBytes: Optional[int] = maxBytes
+        self.ttl: Optional[float] = ttl
+        self.__lock: RLock = RLock()
+        self.__slots: OrderedDict[str, MemoryCache.Slot] = OrderedDict()
+        self.__bytes: int = 0
+
+    @property
+    def size(self) -> int:
+        """Approximate size of all cached data in bytes, only tracked if maxBytes is set"""
+        return self.__bytes
+
+    @staticmethod
+    def sizeOf(data: Any) -> int:
+        """Size of data if it is not known from the response, serializing is only needed for data that was not fetched, e.g. loaded from a file"""
+        if isinstance(data, (bytes, str)):
+            return len(data)
+        return len(json.dumps(data, cls=ExtendedEncoder))
+
+    def sizeOfEntry(self, key: str) -> Optional[int]:
+        with self.__lock:
+            slot: Optional[MemoryCache.Slot] = self.__slots.get(key)
+            return slot.size if slot is not None and self.maxBytes is not None else None
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.__lock:
+            slot: Optional[MemoryCache.Slot] = self.__slots.get(key)
+            if slot is not None and slot.deadline is not None and slot.deadline < time.monotonic():
+                self.__remove(key)
+                self.evictions += 1
+                slot = None
+            if slot is None:
+                self.misses += 1
+                return None
+            self.__slots.move_to_end(key)
+            self.hits += 1
+            return slot.entry
+
+    def put(self, key: str, data: Any, validators: Optional[Dict[str, str]] = None, storedAt: Optional[float] = None, size: Optional[int] = None) -> None:
+        fetchedAt: float = CacheEntry.monotonicTime(storedAt)
+        if storedAt is None:
+            storedAt = time.time()
+        deadline: Optional[float] = None
+        if self.ttl is not None:
+            deadline = fetchedAt + self.ttl
+        if self.maxBytes is None:
+            size = 0
+        elif size is None:
+            size = MemoryCache.sizeOf(data)
+        with self.__lock:
+            if key in self.__slots:
+                self.__remove(key)
+            self.__slots[key] = MemoryCache.Slot(entry=CacheEntry(data=data, storedAt=storedAt, validators=validators, fetchedAt=fetchedAt), size=size,
+                                                 deadline=deadline)
+            self.__bytes += size
+            while self.__slots and ((self.maxEntries is not None and len(self.__slots) > self.maxEntries)
+                                    or (self.maxBytes is not None and self.__bytes > self.maxBytes)):
+                self.__remove(next(iter(self.__slots)))
+                self.evictions += 1
+
+    def __remove(self, key: str) -> None:
+        slot: MemoryCache.Slot = self.__slots.pop(key)
+        self.__bytes -= slot.size
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        with self.__lock:
+            slot: Optional[MemoryCache.Slot] = self.__slots.get(key)
+            if slot is None or (slot.deadline is not None and slot.deadline < time.monotonic()):
+                return None
+            return slot.entry
+
+    def delete(self, key: str) -> None:
+        with self.__lock:
+            if key in self.__slots:
+                self.__remove(key)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__slots.clear()
+            self.__bytes = 0
+
+    def keys(self) -> List[str]:
+        with self.__lock:
+            return list(self.__slots.keys())
+
+    def __len__(self) -> int:
+        return len(self.__slots)
+
+
+class SQLiteCache(Cache):
+    """Persistent cache in a SQLite database
+
+    Every put is written immediately, so there is no need to dump the whole cache. JSON data and binary data like images are stored in separate
+    columns. A database that cannot be opened is moved aside and replaced by a new one instead of failing or being deleted.
+
+    Args:
+        filename (str): Database file
+    """
+
+    def __init__(self, filename: str) -> None:
+        super().__init__()
+        self.filename: str = filename
+        self.__lock: RLock = RLock()
+        # Fetch times on the monotonic clock of entries used by this process, the database only has the wall clock time for persistence
+        self.__fetchedAt: Dict[str, float] = {}
+        try:
+            self.__connection: sqlite3.Connection = self.__open()
+        except sqlite3.DatabaseError as err:
+            corruptFilename: str = f'{filename}.corrupt-{int(time.time())}'
+            LOG.error('Cache database %s seems corrupted (%s), moving it to %s and creating a new one. '
+                      'If this problem persists please check if a problem with your disk exists.', filename, err, corruptFilename)
+            for suffix in ['', '-wal', '-shm']:
+                if os.path.exists(filename + suffix):
+                    os.replace(filename + suffix, corruptFilename + suffix)
+            self.__connection = self.__open()
+
+    def __open(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection = sqlite3.connect(self.filename, check_same_thread=False, isolation_level=None)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            result = connection.execute('PRAGMA quick_check').fetchone()
+            if result is None or result[0] != 'ok':
+                raise sqlite3.DatabaseError(f'quick_check failed: {result}')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, json TEXT, blob BLOB, storedAt REAL NOT NULL, validators TEXT)')
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def __query(self, key: str) -> Optional[CacheEntry]:
+        with self.__lock:
+            try:
+                row = self.__connection.execute('SELECT json, blob, storedAt, validators FROM cache WHERE key = ?', (key,)).fetchone()
+            except sqlite3.Error as err:
+                LOG.error('Reading %s from cache database %s failed: %s', key, self.filename, err)
+                return None
+        if row is None:
+            return None
+        jsonData, blob, storedAt, validators = row
+        data: Any = blob if blob is not None else json.loads(jsonData)
+        with self.__lock:
+            fetchedAt: float = self.__fetchedAt.setdefault(key, CacheEntry.monotonicTime(storedAt))
+        return CacheEntry(data=data, storedAt=storedAt, validators=json.loads(validators) if validators is not None else None, fetchedAt=fetchedAt)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry: Optional[CacheEntry] = self.__query(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        return self.__query(key)
+
+    def put(self, key: str, data: Any, validators: Optional[Dict[str, str]] = None, storedAt: Optional[float] = None, size: Optional[int] = None) -> None:
+        fetchedAt: float = CacheEntry.monotonicTime(storedAt)
+        with self.__lock:
+            try:
+                self.__insert(key, data, validators, storedAt if storedAt is not None else time.time())
+                self.__fetchedAt[key] = fetchedAt
+            except sqlite3.Error as err:
+                LOG.error('Writing %s to cache database %s failed: %s', key, self.filename, err)
+
+    def __insert(self, key: str, data: Any, validators: Optional[Dict[str, str]], storedAt: float) -> None:
+        jsonData: Optional[str] = None
+        blob: Optional[bytes] = None
+        if isinstance(data, bytes):
+            blob = data
+        else:
+            jsonData = json.dumps(data, cls=ExtendedEncoder)
+        self.__connection.execute('INSERT OR REPLACE INTO cache (key, json, blob, storedAt, validators) VALUES (?, ?, ?, ?, ?)',
+                                  (key, jsonData, blob, storedAt, json.dumps(validators) if validators is not None else None))
+
+    def touch(self, key: str) -> None:
+        with self.__lock:
+            try:
+                self.__connection.execute('UPDATE cache SET storedAt = ? WHERE key = ?', (time.time(), key))
+                self.__fetchedAt[key] = time.monotonic()
+            except sqlite3.Error as err:
+                LOG.error('Updating %s in cache database %s failed: %s', key, self.filename, err)
+
+    def delete(self, key: str) -> None:
+        with self.__lock:
+            try:
+                self.__connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self.__fetchedAt.pop(key, None)
+            except sqlite3.Error as err:
+                LOG.error('Deleting %s from cache database %s failed: %s', key, self.filename, err)
+
+    def clear(self) -> None:
+        with self.__lock:
+            try:
+                self.__connection.execute('DELETE FROM cache')
+                self.__fetchedAt.clear()
+            except sqlite3.Error as err:
+                LOG.error('Clearing cache database %s failed: %s', self.filename, err)
+
+    def keys(self) -> List[str]:
+        with self.__lock:
+            try:
+                return [row[0] for row in self.__connection.execute('SELECT key FROM cache')]
+            except sqlite3.Error as err:
+                LOG.error('Reading keys from cache database %s failed: %s', self.filename, err)
+                return []
+
+    def fromDict(self, fromDict: Dict[str, List[Any]]) -> None:
+        # Write all entries in one transaction, a failed import leaves the previous content untouched. Database errors are not only logged
+        # like in put and clear, as the transaction could otherwise be committed without the failed entries.
+        with self.__lock:
+            try:
+                self.__connection.execute('BEGIN')
+                try:
+                    self.__connection.execute('DELETE FROM cache')
+                    for key, data, validators, storedAt in Cache.entriesFromDict(fromDict):
+                        self.__insert(key, data, validators, storedAt)
+                except BaseException:
+                    self.__connection.execute('ROLLBACK')
+                    raise
+                self.__connection.execute('COMMIT')
+            except sqlite3.Error as err:
+                LOG.error('Importing into cache database %s failed, the previous content is kept: %s', self.filename, err)
+                return
+            # Fetch times are taken from storedAt when the entries are used
+            self.__fetchedAt.clear()
@@ -0,0 +1,41 @@
+from typing import Dict, Optional
+import os
+from threading import Lock
+
+from PIL import Image  # type: ignore
+
+
+class BadgeRegistry():
+    """Badge images shared by all vehicles. Each badge is loaded, scaled to fit 100x100 pixels and converted to RGBA once when it is used first.
+
+    Args:
+        directory (str): Directory containing the badges as <name>.png
+    """
+
+    SIZE = (100, 100)
+
+    def __init__(self, directory: str) -> None:
+        self.directory: str = directory
+        self.__lock: Lock = Lock()
+        self.__badges: Dict[str, Image.Image] = {}
+
+    def get(self, name: str) -> Image.Image:
+        badge: Optional[Image.Image] = self.__badges.get(name)
+        if badge is None:
+            with self.__lock:
+                badge = self.__badges.get(name)
+                if badge is None:
+                    with Image.open(os.path.join(self.directory, f'{name}.png')) as badgeFile:
+                        badgeFile.thumbnail(BadgeRegistry.SIZE)
+                        badge = badgeFile.convert('RGBA')
+                    self.__badges[name] = badge
+        return badge
+
+    def __getitem__(self, name: str) -> Image.Image:
+        return self.get(name)
+
+    def __len__(self) -> int:
+        return len(self.__badges)
+
+
+BADGES: BadgeRegistry = BadgeRegistry(os.path.join(os.path.dirname(__file__), '..', '..', 'badges'))
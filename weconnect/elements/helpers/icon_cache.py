@@ -0,0 +1,71 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from threading import Lock
+import base64
+import hashlib
+import io
+
+from PIL import Image  # type: ignore
+
+
+class IconCache():
+    """Bounded cache of decoded icons shared by all vehicles
+
+    The same few warning light icons are sent for all vehicles in every update. They are decoded once and the same image object is returned for the
+    same icon, together with resized versions of it.
+
+    Args:
+        maxEntries (int, optional): Maximum number of icons kept, the least recently used icon is removed first. Defaults to 128.
+    """
+
+    def __init__(self, maxEntries: int = 128) -> None:
+        self.maxEntries: int = maxEntries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.__lock: Lock = Lock()
+        self.__icons: OrderedDict[str, Image.Image] = OrderedDict()
+        self.__keys: Dict[int, str] = {}
+        self.__resized: Dict[Tuple[str, Tuple[int, int]], Image.Image] = {}
+
+    def get(self, data: str) -> Image.Image:
+        """Return the decoded image for base64 encoded image data"""
+        key: str = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        with self.__lock:
+            icon: Optional[Image.Image] = self.__icons.get(key)
+            if icon is not None:
+                self.__icons.move_to_end(key)
+                self.hits += 1
+                return icon
+            self.misses += 1
+        icon = Image.open(io.BytesIO(base64.b64decode(data)))
+        icon.load()
+        with self.__lock:
+            if key in self.__icons:
+                return self.__icons[key]
+            self.__icons[key] = icon
+            self.__keys[id(icon)] = key
+            while len(self.__icons) > self.maxEntries:
+                oldKey, oldIcon = self.__icons.popitem(last=False)
+                del self.__keys[id(oldIcon)]
+                for resizedKey in [resizedKey for resizedKey in self.__resized if resizedKey[0] == oldKey]:
+                    del self.__resized[resizedKey]
+        return icon
+
+    def resized(self, icon: Image.Image, size: Tuple[int, int] = (64, 64)) -> Image.Image:
+        """Return icon resized to size. The result is cached for icons returned by get."""
+        with self.__lock:
+            key: Optional[str] = self.__keys.get(id(icon))
+            if key is not None and self.__icons.get(key) is icon:
+                resizedIcon: Optional[Image.Image] = self.__resized.get((key, size))
+                if resizedIcon is None:
+                    resizedIcon = icon.resize(size, Image.LANCZOS)
+                    self.__resized[(key, size)] = resizedIcon
+                return resizedIcon
+        return icon.resize(size, Image.LANCZOS)
+
+    def __len__(self) -> int:
+        return len(self.__icons)
+
+
+ICONS: IconCache = IconCache()
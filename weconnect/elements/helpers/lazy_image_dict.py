@@ -0,0 +1,114 @@
+from typing import Dict, Optional, Tuple, Union
+import io
+import itertools
+import logging
+
+from PIL import Image  # type: ignore
+
+from weconnect.image_store import ImageStore
+
+LOG = logging.getLogger("weconnect")
+
+
+class LazyImageDict(dict):
+    """Dict of images that are kept as encoded bytes or a reference into an ImageStore and only decoded when they are accessed for the first time"""
+
+    __generations = itertools.count(1)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__encoded: Dict[str, Union[bytes, Tuple[ImageStore, str]]] = {}
+        self.__generation: Dict[str, int] = {}
+        self.__rgba: Dict[str, Image.Image] = {}
+
+    def generation(self, key: str) -> Optional[int]:
+        """Number that changes whenever the image for key changes, None if there is no image for key"""
+        return self.__generation.get(key)
+
+    def getRGBA(self, key: str) -> Image.Image:
+        """Return the image for key converted to RGBA, e.g. to be used as overlay. The conversion is only done once per image."""
+        rgba: Optional[Image.Image] = self.__rgba.get(key)
+        if rgba is None:
+            rgba = self[key].convert('RGBA')
+            self.__rgba[key] = rgba
+        return rgba
+
+    def __setitem__(self, key: str, value: Image.Image) -> None:
+        if super().get(key) is not value:
+            self.__changed(key)
+        super().__setitem__(key, value)
+
+    def __changed(self, key: str) -> None:
+        self.__generation[key] = next(LazyImageDict.__generations)
+        self.__rgba.pop(key, None)
+
+    def setEncoded(self, key: str, data: bytes) -> bool:
+        """Set the encoded image for key. Returns True if the image changed."""
+        return self.__set(key, data)
+
+    def setStored(self, key: str, store: ImageStore, reference: str) -> bool:
+        """Set the image for key to an image in store. Returns True if the image changed."""
+        return self.__set(key, (store, reference))
+
+    def __set(self, key: str, source: Union[bytes, Tuple[ImageStore, str]]) -> bool:
+        if self.__encoded.get(key) == source:
+            return False
+        self.__encoded[key] = source
+        super().pop(key, None)
+        self.__changed(key)
+        return True
+
+    def getEncoded(self, key: str) -> Optional[bytes]:
+        source: Optional[Union[bytes, Tuple[ImageStore, str]]] = self.__encoded.get(key)
+        if isinstance(source, tuple):
+            store, reference = source
+            return store.get(reference)
+        return source
+
+    def __contains__(self, key: object) -> bool:
+        if super().__contains__(key):
+            return True
+        source: Optional[Union[bytes, Tuple[ImageStore, str]]] = self.__encoded.get(key)  # type: ignore
+        if isinstance(source, tuple):
+            store, reference = source
+            if reference not in store:
+                self.__dropMissing(str(key), reference)
+                return False
+        return source is not None
+
+    def __dropMissing(self, key: str, reference: str) -> None:
+        # The file was removed from the store, e.g. by pruning. Without the reference the image is downloaded again with the next update
+        LOG.warning('Image %s for %s is missing in the image store, it will be downloaded again', reference, key)
+        self.pop(key, None)
+
+    def __missing__(self, key: str) -> Image.Image:
+        if key not in self.__encoded:
+            raise KeyError(key)
+        source: Union[bytes, Tuple[ImageStore, str]] = self.__encoded[key]
+        if isinstance(source, tuple):
+            store, reference = source
+            # Decode directly from the memory mapped file, the mapping is released once the image is loaded
+            try:
+                with store.open(reference) as mappedFile:
+                    img: Image.Image = Image.open(mappedFile)
+                    img.load()
+            except OSError as err:
+                self.__dropMissing(key, reference)
+                raise KeyError(key) from err
+        else:
+            img = Image.open(io.BytesIO(source))
+        # Decoding does not change the image, so the generation is kept
+        super().__setitem__(key, img)
+        return img
+
+    def release(self) -> None:
+        """Drop all decoded images that can be decoded again, together with their RGBA versions"""
+        for key in self.__encoded:
+            super().pop(key, None)
+            self.__rgba.pop(key, None)
+
+    def pop(self, key, *args):
+        self.__encoded.pop(key, None)
+        self.__generation.pop(key, None)
+        self.__rgba.pop(key, None)
+        return super().pop(key, *args)
@@ -0,0 +1,113 @@
+from typing import Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+import asyncio
+import time
+
+
+def parseRetryAfter(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header given either in seconds or as http date"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retryDate: datetime = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retryDate.tzinfo is None:
+        retryDate = retryDate.replace(tzinfo=timezone.utc)
+    return max(0.0, (retryDate - datetime.now(tz=timezone.utc)).total_seconds())
+
+
+class RequestScheduler:
+    """Token bucket limiting the request rate of an account. Callers are delayed until they are allowed to send instead of failing.
+
+    Slots are handed out in the order they are requested. When the server answers with too many requests, pause() holds back all requests for the
+    time given by the server.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1, maxRetries: int = 3, defaultRetryAfter: float = 60) -> None:
+        """Initialize RequestScheduler
+
+        Args:
+            rate (Optional[float], optional): Requests per second. None means the rate is not limited. Defaults to None.
+            burst (int, optional): Number of requests that can be sent at once after a time without requests. Defaults to 1.
+            maxRetries (int, optional): How often a request answered with too many requests is retried. Defaults to 3.
+            defaultRetryAfter (float, optional): Seconds to wait when the server does not send Retry-After. Defaults to 60.
+        """
+        self.rate: Optional[float] = rate
+        self.burst: int = burst
+        self.maxRetries: int = maxRetries
+        self.defaultRetryAfter: float = defaultRetryAfter
+        self.__lock: Lock = Lock()
+        self.__tokens: float = burst
+        self.__lastRefill: float = time.monotonic()
+        self.__pausedUntil: float = 0.0
+        self.__queueDepth: int = 0
+
+    def __refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.__tokens = min(float(self.burst), self.__tokens + (now - self.__lastRefill) * self.rate)
+        self.__lastRefill = now
+
+    @property
+    def availableTokens(self) -> float:
+        """Requests that can be sent right now. Negative values are requests that are already waiting for a slot."""
+        with self.__lock:
+            self.__refill(time.monotonic())
+            return self.__tokens
+
+    @property
+    def queueDepth(self) -> int:
+        """Number of callers currently waiting for a slot"""
+        return self.__queueDepth
+
+    @property
+    def pausedFor(self) -> float:
+        """Seconds until requests are allowed again after the server asked to retry later"""
+        return max(0.0, self.__pausedUntil - time.monotonic())
+
+    def reserve(self) -> float:
+        """Reserve a slot for a request. Returns the seconds the caller has to wait before sending the request."""
+        with self.__lock:
+            now: float = time.monotonic()
+            self.__refill(now)
+            delay: float = max(0.0, self.__pausedUntil - now)
+            if self.rate is not None:
+                self.__tokens -= 1
+                if self.__tokens < 0:
+                    delay = max(delay, -self.__tokens / self.rate)
+            return delay
+
+    def acquire(self) -> None:
+        """Block until a request can be sent"""
+        delay: float = self.reserve()
+        if delay > 0:
+            with self.__lock:
+                self.__queueDepth += 1
+            try:
+                time.sleep(delay)
+            finally:
+                with self.__lock:
+                    self.__queueDepth -= 1
+
+    async def acquireAsync(self) -> None:
+        """Wait on the event loop until a request can be sent"""
+        delay: float = self.reserve()
+        if delay > 0:
+            with self.__lock:
+                self.__queueDepth += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                with self.__lock:
+                    self.__queueDepth -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for the given number of seconds"""
+        with self.__lock:
+            self.__pausedUntil = max(self.__pausedUntil, time.monotonic() + seconds)
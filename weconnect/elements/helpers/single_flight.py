@@ -0,0 +1,53 @@
+from typing import Any, Callable, Dict, Hashable, Optional
+from threading import Event, Lock
+
+
+class SingleFlight:
+    """Executes a function only once for all callers that ask for the same key at the same time. Callers arriving while the function is running
+    wait for it and get the same result or exception."""
+
+    class Call:
+        def __init__(self) -> None:
+            self.done: Event = Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self) -> None:
+        self.__lock: Lock = Lock()
+        self.__calls: Dict[Hashable, SingleFlight.Call] = {}
+        self.__sharedCount: int = 0
+
+    @property
+    def sharedCount(self) -> int:
+        """Number of calls that were answered with the result of another call"""
+        return self.__sharedCount
+
+    def inFlight(self) -> int:
+        with self.__lock:
+            return len(self.__calls)
+
+    def do(self, key: Hashable, function: Callable[..., Any], *args, **kwargs) -> Any:
+        with self.__lock:
+            call: Optional[SingleFlight.Call] = self.__calls.get(key)
+            leader: bool = call is None
+            if call is None:
+                call = SingleFlight.Call()
+                self.__calls[key] = call
+            else:
+                self.__sharedCount += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
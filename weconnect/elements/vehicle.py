@@ -1,18 +1,19 @@
 from __future__ import annotations
-from typing import Dict, List, Set, Any, Type, Optional, cast, TYPE_CHECKING
-import os
+from typing import Dict, List, Set, Any, Tuple, Type, Optional, Union, cast, TYPE_CHECKING
 from threading import Lock
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
-from datetime import datetime, timedelta
 import base64
-import io
+import contextvars
 import logging
 
 from weconnect.elements.generic_status import GenericStatus
 
-from requests import exceptions, codes
+from requests import codes
 
-from weconnect.addressable import AddressableObject, AddressableAttribute, AddressableDict, AddressableList
+from weconnect.addressable import AddressableObject, AddressableAttribute, AddressableDict, AddressableList, LazyImageAttribute
+from weconnect.cache import CacheEntry
+from weconnect.image_store import ImageStore
 if TYPE_CHECKING:
     from weconnect.weconnect import WeConnect
 from weconnect.elements.generic_capability import GenericCapability
@@ -49,9 +50,8 @@ from weconnect.elements.temperature_battery_status import TemperatureBatteryStat
 from weconnect.elements.temperature_outside_status import TemperatureOutsideStatus
 from weconnect.elements.charging_profiles import ChargingProfiles
 from weconnect.elements.trip import Trip
-from weconnect.errors import APICompatibilityError, RetrievalError, APIError, TooManyRequestsError
+from weconnect.errors import APICompatibilityError, APIError, TooManyRequestsError
 from weconnect.util import toBool
-from weconnect.weconnect_errors import ErrorEventType
 from weconnect.domain import Domain
 from weconnect.elements.error import Error
 
@@ -60,6 +60,9 @@ from weconnect.elements.helpers.request_tracker import RequestTracker
 SUPPORT_IMAGES = False
 try:
     from PIL import Image, ImageDraw  # type: ignore
+    from weconnect.elements.helpers.badge_registry import BADGES
+    from weconnect.elements.helpers.icon_cache import ICONS
+    from weconnect.elements.helpers.lazy_image_dict import LazyImageDict
     SUPPORT_IMAGES = True
 except ImportError:
     pass
@@ -83,6 +86,13 @@ class DomainDict(AddressableDict):
 
 
 class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attributes
+    # Arguments for fetchData for endpoints that are not available for all vehicles
+    OPTIONAL_FETCH_ARGS: Dict[str, Any] = {'allowEmpty': True, 'allowHttpError': True, 'allowedErrors': [codes['not_found'],
+                                                                                                         codes['no_content'],
+                                                                                                         codes['bad_gateway'],
+                                                                                                         codes['forbidden']]}
+    # Maximum number of optional endpoints (parking position, trips) of one vehicle that are fetched in parallel
+    MAX_PARALLEL_FETCHES: int = 4
 
     def __init__(
         self,
@@ -94,7 +104,8 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
         updateCapabilities: bool = True,
         updatePictures: bool = True,
         selective: Optional[list[Domain]] = None,
-        enableTracker: bool = False
+        enableTracker: bool = False,
+        fetchStatus: bool = True
     ) -> None:
         self.weConnect: WeConnect = weConnect
         super().__init__(localAddress=vin, parent=parent)
@@ -123,15 +134,16 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
         self.fixAPI: bool = fixAPI
 
         if SUPPORT_IMAGES:
-            self.__carImages: Dict[str, Image.Image] = {}
-            self.__badges: Dict[Vehicle.Badge, Image.Image] = {}
+            self.__carImages: LazyImageDict = LazyImageDict()
+            self.__statusPictureKey: Optional[Tuple] = None
+            self.__statusPictureIcons: List[Image.Image] = []
             self.pictures: AddressableDict[str, Image.Image] = AddressableDict(localAddress='pictures', parent=self)
 
         self.requestTracker: Optional[RequestTracker] = None
         if enableTracker:
             self.requestTracker = RequestTracker(self)
 
-        self.update(fromDict, updateCapabilities=updateCapabilities, updatePictures=updatePictures, selective=selective)
+        self.update(fromDict, updateCapabilities=updateCapabilities, updatePictures=updatePictures, selective=selective, fetchStatus=fetchStatus)
 
     def enableTracker(self) -> None:
         if self.requestTracker is None:
@@ -152,7 +164,8 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
         updateCapabilities: bool = True,
         updatePictures: bool = True,
         force: bool = False,
-        selective: Optional[list[Domain]] = None
+        selective: Optional[list[Domain]] = None,
+        fetchStatus: bool = True
     ) -> None:
         if fromDict is not None:
             LOG.debug('Create /update vehicle')
@@ -225,15 +238,59 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                                               'coUsers']}.items():
                 LOG.warning('%s: Unknown attribute %s with value %s', self.getGlobalAddress(), key, value)
 
+        if not fetchStatus:
+            return
         self.updateStatus(updateCapabilities=updateCapabilities, force=force, selective=selective)
         if SUPPORT_IMAGES and updatePictures:
-            for badge in Vehicle.Badge:
-                badgeImg: Image = Image.open(f'{os.path.dirname(__file__)}/../badges/{badge.value}.png')
-                badgeImg.thumbnail((100, 100))
-                self.__badges[badge] = badgeImg
-
             self.updatePictures()
 
+    def getSelectiveStatusUrl(self, updateCapabilities: bool = True, selective: Optional[list[Domain]] = None) -> str:
+        if selective is None:
+            jobs = [domain.value for domain in Domain if domain != Domain.ALL and domain != Domain.ALL_CAPABLE and domain != Domain.PARKING]
+        elif Domain.ALL_CAPABLE in selective:
+            if self.capabilities:
+                jobs = []
+                for dom in [domain for domain in Domain if domain != Domain.ALL and domain != Domain.ALL_CAPABLE and domain != Domain.PARKING]:
+                    if dom.value in self.capabilities and self.capabilities[dom.value].enabled and not self.capabilities[dom.value].status.enabled:
+                        jobs.append(dom.value)
+                if updateCapabilities:
+                    jobs.append(Domain.USER_CAPABILITIES.value)
+            else:
+                jobs = ['all']
+        elif Domain.ALL in selective:
+            jobs = ['all']
+        else:
+            jobs = [domain.value for domain in selective]
+        return 'https://emea.bff.cariad.digital/vehicle/v1/vehicles/' + self.vin.value + '/selectivestatus?jobs=' + ','.join(jobs)
+
+    def needsParkingPosition(self, updateCapabilities: bool = True, selective: Optional[list[Domain]] = None) -> bool:
+        return (selective is None or any(x in selective for x in [Domain.ALL, Domain.ALL_CAPABLE, Domain.PARKING])) \
+            and (not updateCapabilities or ('parkingPosition' in self.capabilities and self.capabilities['parkingPosition'].status.value is None))
+
+    def getParkingPositionUrl(self) -> str:
+        return 'https://emea.bff.cariad.digital/vehicle/v1/vehicles/' + self.vin.value + '/parkingposition'
+
+    def needsTrips(self, selective: Optional[list[Domain]] = None) -> bool:
+        return selective is None or any(x in selective for x in [Domain.ALL, Domain.ALL_CAPABLE, Domain.TRIPS])
+
+    def getTripUrls(self) -> Dict[Trip.TripType, str]:
+        return {tripType: 'https://emea.bff.cariad.digital/vehicle/v1/trips/' + self.vin.value + '/' + tripType.value.lower() + '/last'
+                for tripType in Trip.TripType if tripType != Trip.TripType.UNKNOWN}
+
+    def getStatusRequests(self, updateCapabilities: bool = True, selective: Optional[list[Domain]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Requests that updateStatus will do with the given parameters as tuples of url and additional arguments for fetchData"""
+        if self.vin.value is None:
+            raise APIError('')
+        statusRequests: List[Tuple[str, Dict[str, Any]]] = [(self.getSelectiveStatusUrl(updateCapabilities=updateCapabilities, selective=selective), {})]
+        if self.needsParkingPosition(updateCapabilities=updateCapabilities, selective=selective):
+            statusRequests.append((self.getParkingPositionUrl(), Vehicle.OPTIONAL_FETCH_ARGS))
+        if self.needsTrips(selective=selective):
+            statusRequests.extend([(url, Vehicle.OPTIONAL_FETCH_ARGS) for url in self.getTripUrls().values()])
+        return statusRequests
+
+    def getPicturesUrl(self) -> str:
+        return f'https://emea.bff.cariad.digital/media/v2/vehicle-images/{self.vin.value}?resolution=2x'
+
     def updateStatus(self, updateCapabilities: bool = True, force: bool = False,  # noqa: C901 # pylint: disable=too-many-branches
                      selective: Optional[list[Domain]] = None):
         jobKeyClassMap: Dict[Domain, Dict[str, Type[GenericStatus]]] = {
@@ -320,24 +377,8 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
         }
         if self.vin.value is None:
             raise APIError('')
-        if selective is None:
-            jobs = [domain.value for domain in Domain if domain != Domain.ALL and domain != Domain.ALL_CAPABLE and domain != Domain.PARKING]
-        elif Domain.ALL_CAPABLE in selective:
-            if self.capabilities:
-                jobs = []
-                for dom in [domain for domain in Domain if domain != Domain.ALL and domain != Domain.ALL_CAPABLE and domain != Domain.PARKING]:
-                    if dom.value in self.capabilities and self.capabilities[dom.value].enabled and not self.capabilities[dom.value].status.enabled:
-                        jobs.append(dom.value)
-                if updateCapabilities:
-                    jobs.append(Domain.USER_CAPABILITIES.value)
-            else:
-                jobs = ['all']
-        elif Domain.ALL in selective:
-            jobs = ['all']
-        else:
-            jobs = [domain.value for domain in selective]
         with self.lock:
-            url: str = 'https://emea.bff.cariad.digital/vehicle/v1/vehicles/' + self.vin.value + '/selectivestatus?jobs=' + ','.join(jobs)
+            url: str = self.getSelectiveStatusUrl(updateCapabilities=updateCapabilities, selective=selective)
             data: Optional[Dict[str, Any]] = self.weConnect.fetchData(url, force)
             if len(data) == 0:
                 LOG.warning('%s: Vehicle data for %s is empty, this can happen when there are too many requests', self.getGlobalAddress(), self.vin.value)
@@ -369,13 +410,22 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                 for key, value in {key: value for key, value in data.items() if key not in list([domain.value for domain in jobKeyClassMap.keys()])}.items():
                     LOG.warning('%s: Unknown domain %s with value %s', self.getGlobalAddress(), key, value)
 
-            if (selective is None or any(x in selective for x in [Domain.ALL, Domain.ALL_CAPABLE, Domain.PARKING])) \
-                    and (not updateCapabilities or ('parkingPosition' in self.capabilities and self.capabilities['parkingPosition'].status.value is None)):
-                url = 'https://emea.bff.cariad.digital/vehicle/v1/vehicles/' + self.vin.value + '/parkingposition'
-                data = self.weConnect.fetchData(url, force, allowEmpty=True, allowHttpError=True, allowedErrors=[codes['not_found'],
-                                                                                                                 codes['no_content'],
-                                                                                                                 codes['bad_gateway'],
-                                                                                                                 codes['forbidden']])
+            # Parking position and trips do not depend on each other, so they are fetched in parallel and applied afterwards
+            parkingPositionUrl: Optional[str] = None
+            if self.needsParkingPosition(updateCapabilities=updateCapabilities, selective=selective):
+                parkingPositionUrl = self.getParkingPositionUrl()
+            tripUrls: Dict[Trip.TripType, str] = {}
+            if self.needsTrips(selective=selective):
+                tripUrls = self.getTripUrls()
+            urls: List[str] = ([parkingPositionUrl] if parkingPositionUrl is not None else []) + list(tripUrls.values())
+            if urls:
+                with ThreadPoolExecutor(max_workers=min(len(urls), Vehicle.MAX_PARALLEL_FETCHES), thread_name_prefix='WeConnectFetch') as executor:
+                    # The context is passed on, so fetches see data prefetched for this update, e.g. by AsyncWeConnect
+                    futures: Dict[str, Future] = {url: executor.submit(contextvars.copy_context().run, self.weConnect.fetchData, url, force,
+                                                                       **Vehicle.OPTIONAL_FETCH_ARGS) for url in urls}
+
+            if parkingPositionUrl is not None:
+                data = futures[parkingPositionUrl].result()
                 if data is not None:
                     if 'parking' not in self.domains:
                         self.domains['parking'] = DomainDict(localAddress='parking', parent=self)
@@ -395,15 +445,10 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                         parkingPosition.carCapturedTimestamp.enabled = False
                         parkingPosition.enabled = False
 
-            if (selective is None or any(x in selective for x in [Domain.ALL, Domain.ALL_CAPABLE, Domain.TRIPS])):
+            if tripUrls:
                 try:
-                    for tripType in [tripType for tripType in Trip.TripType if tripType != Trip.TripType.UNKNOWN]:
-                        url = 'https://emea.bff.cariad.digital/vehicle/v1/trips/' + self.vin.value + '/' + tripType.value.lower() + '/last'
-
-                        data = self.weConnect.fetchData(url, force, allowEmpty=True, allowHttpError=True, allowedErrors=[codes['not_found'],
-                                                                                                                         codes['no_content'],
-                                                                                                                         codes['bad_gateway'],
-                                                                                                                         codes['forbidden']])
+                    for tripType, url in tripUrls.items():
+                        data = futures[url].result()
                         if data is not None and 'data' in data:
                             if tripType.value in self.trips:
                                 self.trips[tripType.value].update(fromDict=data['data'])
@@ -424,85 +469,78 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
         if not SUPPORT_IMAGES:
             return
         with self.lock:
-            url: str = f'https://emea.bff.cariad.digital/media/v2/vehicle-images/{self.vin.value}?resolution=2x'
+            url: str = self.getPicturesUrl()
             data = self.weConnect.fetchData(url, allowHttpError=True)
             if data is not None and 'data' in data:  # pylint: disable=too-many-nested-blocks
+                imageStore: Optional[ImageStore] = self.weConnect.imageStore
+                imageData: Dict[str, Union[bytes, str]] = {}
+                downloadUrls: Dict[str, str] = {}
                 for image in data['data']:
-                    img = None
-                    cacheDate = None
-                    imageurl: str = image['url']
-                    if self.weConnect.maxAgePictures is not None and self.weConnect.cache is not None and imageurl in self.weConnect.cache:
-                        img, cacheDateString = self.weConnect.cache[imageurl]
-                        img = base64.b64decode(img)
-                        img = Image.open(io.BytesIO(img))
-                        cacheDate = datetime.fromisoformat(cacheDateString)
-                    if img is None or self.weConnect.maxAgePictures is None \
-                            or (cacheDate is not None and cacheDate < (datetime.utcnow() - timedelta(seconds=self.weConnect.maxAgePictures))):
-                        try:
-                            imageDownloadResponse = self.weConnect.session.get(imageurl, stream=True)
-                            self.weConnect.recordElapsed(imageDownloadResponse.elapsed)
-                            if imageDownloadResponse.status_code == codes['ok']:
-                                img = Image.open(imageDownloadResponse.raw)
-                                if self.weConnect.cache is not None:
-                                    buffered = io.BytesIO()
-                                    img.save(buffered, format="PNG")
-                                    imgStr = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                                    self.weConnect.cache[imageurl] = (imgStr, str(datetime.utcnow()))
-                            elif imageDownloadResponse.status_code == codes['unauthorized']:
-                                LOG.info('Server asks for new authorization')
-                                self.weConnect.login()
-                                imageDownloadResponse = self.weConnect.session.get(imageurl, stream=True)
-                                self.weConnect.recordElapsed(imageDownloadResponse.elapsed)
-                                if imageDownloadResponse.status_code == codes['ok']:
-                                    img = Image.open(imageDownloadResponse.raw)
-                                    if self.weConnect.cache is not None:
-                                        buffered = io.BytesIO()
-                                        img.save(buffered, format="PNG")
-                                        imgStr = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                                        self.weConnect.cache[imageurl] = (imgStr, str(datetime.utcnow()))
-                                else:
-                                    self.weConnect.notifyError(self, ErrorEventType.HTTP, str(imageDownloadResponse.status_code),
-                                                               'Could not fetch vehicle image due to server error')
-                                    raise RetrievalError('Could not retrieve vehicle image even after re-authorization.'
-                                                         f' Status Code was: {imageDownloadResponse.status_code}')
-                                self.weConnect.notifyError(self, ErrorEventType.HTTP, str(imageDownloadResponse.status_code),
-                                                           'Could not fetch vehicle image due to server error')
-                                raise RetrievalError(f'Could not retrieve vehicle image. Status Code was: {imageDownloadResponse.status_code}')
-                            else:
-                                LOG.warning('Failed downloading picture %s with status code %d will try again in next update', image['id'],
-                                            imageDownloadResponse.status_code)
-                        except exceptions.ConnectionError as connectionError:
-                            self.weConnect.notifyError(self, ErrorEventType.CONNECTION, 'connection',
-                                                       'Could not fetch vehicle image due to connection problem')
-                            raise RetrievalError from connectionError
-                        except exceptions.ChunkedEncodingError as chunkedEncodingError:
-                            self.weConnect.notifyError(self, ErrorEventType.CONNECTION, 'chunked encoding error',
-                                                       'Could not refresh token due to connection problem with chunked encoding')
-                            raise RetrievalError from chunkedEncodingError
-                        except exceptions.ReadTimeout as timeoutError:
-                            self.weConnect.notifyError(self, ErrorEventType.TIMEOUT, 'timeout', 'Could not fetch vehicle image due to timeout')
-                            raise RetrievalError from timeoutError
-                        except exceptions.RetryError as retryError:
-                            raise RetrievalError from retryError
-
-                    if img is not None:
-                        self.__carImages[image['id']] = img
-                        if image['id'] == 'car_34view':
-                            if 'car' in self.pictures:
-                                self.pictures['car'].setValueWithCarTime(self.__carImages['car_34view'], lastUpdateFromCar=None, fromServer=True)
-                            else:
-                                self.pictures['car'] = AddressableAttribute(localAddress='car', parent=self.pictures, value=self.__carImages['car_34view'],
-                                                                            valueType=Image.Image)
+                    cachedData, fresh = self.weConnect.lookupCache(image['url'], self.weConnect.maxAgePictures)
+                    if ImageStore.isReference(cachedData):
+                        if imageStore is not None and cachedData in imageStore:
+                            imageData[image['id']] = cachedData
+                        else:
+                            fresh = False
+                    elif cachedData is not None:
+                        # Caches filled from json contain the base64 encoded image
+                        imageBytes: bytes = base64.b64decode(cachedData) if isinstance(cachedData, str) else cachedData
+                        if imageStore is not None:
+                            # Move images cached by older versions into the store
+                            entry: Optional[CacheEntry] = self.weConnect.cache.peek(image['url'])
+                            imageData[image['id']] = imageStore.put(imageBytes)
+                            if entry is not None:
+                                self.weConnect.cache.put(image['url'], imageData[image['id']], validators=entry.validators, storedAt=entry.storedAt)
+                        else:
+                            imageData[image['id']] = imageBytes
+                    if not fresh:
+                        downloadUrls[image['id']] = image['url']
+
+                # Images are downloaded in parallel and kept in their original encoding, they are only decoded when used
+                if downloadUrls:
+                    with ThreadPoolExecutor(max_workers=min(len(downloadUrls), Vehicle.MAX_PARALLEL_FETCHES),
+                                            thread_name_prefix='WeConnectImageDownload') as executor:
+                        futures: Dict[str, Future] = {imageId: executor.submit(contextvars.copy_context().run, self.weConnect.fetchImageData, imageurl)
+                                                      for imageId, imageurl in downloadUrls.items()}
+                    for imageId, future in futures.items():
+                        downloadedData: Optional[bytes] = future.result()
+                        if downloadedData is not None:
+                            # With an image store only the reference to the stored file is cached
+                            imageData[imageId] = imageStore.put(downloadedData) if imageStore is not None else downloadedData
+                            if self.weConnect.cache is not None:
+                                self.weConnect.cache.put(downloadUrls[imageId], imageData[imageId])
+
+                for imageId, imageSource in imageData.items():
+                    if isinstance(imageSource, str) and imageStore is not None:
+                        self.__carImages.setStored(imageId, imageStore, imageSource)
+                    elif isinstance(imageSource, bytes):
+                        self.__carImages.setEncoded(imageId, imageSource)
+
+                if 'car_34view' in imageData:
+                    if 'car' not in self.pictures:
+                        self.pictures['car'] = LazyImageAttribute(localAddress='car', parent=self.pictures)
+                    # The picture is only decoded when it is used
+                    self.pictures['car'].setEncodedWithCarTime(self.__carImages.getEncoded('car_34view'), lastUpdateFromCar=None, fromServer=True)
 
                 self.updateStatusPicture()
 
+    def releaseImages(self) -> None:
+        """Drop decoded images that can be decoded again, e.g. under memory pressure. Decoded downloads and their RGBA versions are otherwise
+        kept until the image changes, so composing the status pictures again does not need to decode them."""
+        if not SUPPORT_IMAGES:
+            return
+        with self.lock:
+            self.__carImages.release()
+            for picture in self.pictures.values():
+                if isinstance(picture, LazyImageAttribute):
+                    picture.release()
+
     def updateStatusPicture(self) -> None:  # noqa: C901
         if not SUPPORT_IMAGES:
             return
         if 'car_birdview' in self.__carImages:
-            img: Image = self.__carImages['car_birdview']
-
             badges: Set[Vehicle.Badge] = set()
+            overlays: List[str] = []
 
             doorNameMap: Dict[str, str] = {'frontLeft': 'door_left_front',
                                            'frontRight': 'door_right_front',
@@ -537,8 +575,7 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                         badges.add(Vehicle.Badge.WARNING)
 
                     if doorImageName is not None and doorImageName in self.__carImages:
-                        doorImage = self.__carImages[doorImageName].convert("RGBA")
-                        img.paste(doorImage, (0, 0), doorImage)
+                        overlays.append(doorImageName)
 
                 for name, window in accessStatus.windows.items():
                     name = windowNameMap.get(name, name)
@@ -553,17 +590,14 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                         badges.add(Vehicle.Badge.WARNING)
 
                     if windowImageName is not None and windowImageName in self.__carImages:
-                        windowImage = self.__carImages[windowImageName].convert("RGBA")
-                        img.paste(windowImage, (0, 0), windowImage)
+                        overlays.append(windowImageName)
             else:
                 for name in doorNameMap.values():
                     if name in self.__carImages:
-                        doorImage = self.__carImages[name].convert("RGBA")
-                        img.paste(doorImage, (0, 0), doorImage)
+                        overlays.append(name)
                 for name in windowNameMap.values():
                     if name != 'sunroof' and name in self.__carImages:
-                        windowImage = self.__carImages[name].convert("RGBA")
-                        img.paste(windowImage, (0, 0), windowImage)
+                        overlays.append(name)
 
             if 'vehicleLights' in self.domains and 'lightsStatus' in self.domains['vehicleLights']:
                 lightsStatus: LightsStatus = cast(LightsStatus, self.domains['vehicleLights']['lightsStatus'])
@@ -578,8 +612,7 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                     if light.status.value == LightsStatus.Light.LightState.ON:
                         lightImageName = f'light_{name}'
                         if lightImageName in self.__carImages:
-                            lightImage = self.__carImages[lightImageName].convert("RGBA")
-                            img.paste(lightImage, (0, 0), lightImage)
+                            overlays.append(lightImageName)
 
             if 'charging' in self.domains and 'chargingStatus' in self.domains['charging']:
                 chargingStatus: ChargingStatus = cast(ChargingStatus, self.domains['charging']['chargingStatus'])
@@ -609,61 +642,29 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                 if parkingPosition.latitude.enabled and parkingPosition.latitude.value is not None:
                     badges.add(Vehicle.Badge.PARKING)
 
-            self.__carImages['status'] = img
-
-            imgWithBadges = img.copy()
-            badgeoffset = 0
-            for badge in badges:
-                badgeImage = self.__badges[badge].convert("RGBA")
-                imgWithBadges.paste(badgeImage, (0, badgeoffset), badgeImage)
-                badgeoffset += 110
-
-            warningLightoffset = 0
-            imgWidth, _ = imgWithBadges.size
+            warningLightIcons: List[Image.Image] = []
             if 'vehicleHealthWarnings' in self.domains and 'warningLights' in self.domains['vehicleHealthWarnings']:
                 warningLightsStatus = self.domains['vehicleHealthWarnings']['warningLights']
                 if warningLightsStatus.warningLights.enabled:
-                    for warningLight in warningLightsStatus.warningLights.values():
-                        if warningLight.icon.enabled:
-                            draw = ImageDraw.Draw(imgWithBadges.convert("RGBA"))
-                            draw.ellipse(((imgWidth - 100), warningLightoffset, (imgWidth - 1), (warningLightoffset + 100)), fill=(0, 0, 0, 200))
-                            lightImage = warningLight.icon.value
-                            lightImage = lightImage.resize((64, 64), Image.LANCZOS)
-                            imgWithBadges.paste(lightImage, ((imgWidth - 82), warningLightoffset + 18), lightImage)
-                            warningLightoffset += 110
-
-            self.__carImages['statusWithBadge'] = imgWithBadges
-
-            # Car with badges
-            if 'car_34view' in self.__carImages:
-                carWithBadges = self.__carImages['car_34view'].copy()
-
-                badgeoffset = 0
-                for badge in badges:
-                    badgeImage = self.__badges[badge].convert("RGBA")
-                    carWithBadges.paste(badgeImage, (0, badgeoffset), badgeImage)
-                    badgeoffset += 110
-
-                warningLightoffset = 0
-                imgWidth, _ = carWithBadges.size
-                if 'vehicleHealthWarnings' in self.domains and 'warningLights' in self.domains['vehicleHealthWarnings']:
-                    warningLightsStatus = self.domains['vehicleHealthWarnings']['warningLights']
-                    if warningLightsStatus.warningLights.enabled:
-                        for warningLight in warningLightsStatus.warningLights.values():
-                            if warningLight.icon.enabled:
-                                draw = ImageDraw.Draw(carWithBadges)
-                                draw.ellipse(((imgWidth - 100), warningLightoffset, (imgWidth - 1), (warningLightoffset + 100)), fill=(0, 0, 0, 200))
-                                lightImage = warningLight.icon.value
-                                lightImage = lightImage.resize((64, 64), Image.LANCZOS)
-                                carWithBadges.paste(lightImage, ((imgWidth - 82), warningLightoffset + 18), lightImage)
-                                warningLightoffset += 110
-
-                self.__carImages['carWithBadge'] = carWithBadges
+                    warningLightIcons = [warningLight.icon.value for warningLight in warningLightsStatus.warningLights.values() if warningLight.icon.enabled]
+
+            # Composing is skipped if neither the state shown nor one of the images used changed since the last time
+            # Sorted, so the same badges always give the same key and are drawn in the same order
+            badgeList: List[Vehicle.Badge] = sorted(badges, key=lambda badge: badge.value)
+            key: Tuple = (self.__carImages.generation('car_birdview'), self.__carImages.generation('car_34view'),
+                          tuple((name, self.__carImages.generation(name)) for name in overlays), tuple(badgeList),
+                          tuple(id(icon) for icon in warningLightIcons))
+            if key != self.__statusPictureKey or 'status' not in self.__carImages:
+                self.__composeStatusPictures(overlays, badgeList, warningLightIcons)
+                self.__statusPictureKey = key
+                # Keep the icons so that their ids in the key can not be reused by other images
+                self.__statusPictureIcons = warningLightIcons
 
         else:
             LOG.info('Could not update status picture as birdview image could not be retrieved')
             if 'status' in self.__carImages:
                 self.__carImages.pop("status")
+            self.__statusPictureKey = None
 
         if 'status' in self.pictures:
             if 'status' in self.__carImages:
@@ -673,8 +674,7 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                 self.pictures['status'].enabled = False
         else:
             if 'status' in self.__carImages:
-                self.pictures['status'] = AddressableAttribute(localAddress='status', parent=self.pictures, value=self.__carImages['status'],
-                                                               valueType=Image.Image)
+                self.pictures['status'] = LazyImageAttribute(localAddress='status', parent=self.pictures, value=self.__carImages['status'])
 
         if 'statusWithBadge' in self.pictures:
             if 'statusWithBadge' in self.__carImages:
@@ -684,9 +684,8 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                 self.pictures['statusWithBadge'].enabled = False
         else:
             if 'statusWithBadge' in self.__carImages:
-                self.pictures['statusWithBadge'] = AddressableAttribute(localAddress='statusWithBadge', parent=self.pictures,
-                                                                        value=self.__carImages['statusWithBadge'],
-                                                                        valueType=Image.Image)
+                self.pictures['statusWithBadge'] = LazyImageAttribute(localAddress='statusWithBadge', parent=self.pictures,
+                                                                      value=self.__carImages['statusWithBadge'])
 
         if 'carWithBadge' in self.pictures:
             if 'carWithBadge' in self.__carImages:
@@ -696,9 +695,54 @@ class Vehicle(AddressableObject):  # pylint: disable=too-many-instance-attribute
                 self.pictures['carWithBadge'].enabled = False
         else:
             if 'carWithBadge' in self.__carImages:
-                self.pictures['carWithBadge'] = AddressableAttribute(localAddress='carWithBadge', parent=self.pictures,
-                                                                     value=self.__carImages['carWithBadge'],
-                                                                     valueType=Image.Image)
+                self.pictures['carWithBadge'] = LazyImageAttribute(localAddress='carWithBadge', parent=self.pictures,
+                                                                   value=self.__carImages['carWithBadge'])
+
+    def __composeStatusPictures(self, overlays: List[str], badges: List[Vehicle.Badge], warningLightIcons: List[Image.Image]) -> None:
+        img: Image.Image = self.__carImages['car_birdview'].copy()
+        for name in overlays:
+            overlay: Image.Image = self.__carImages.getRGBA(name)
+            img.paste(overlay, (0, 0), overlay)
+        self.__carImages['status'] = img
+
+        imgWithBadges = img.copy()
+        badgeoffset = 0
+        for badge in badges:
+            badgeImage = BADGES[badge.value]
+            imgWithBadges.paste(badgeImage, (0, badgeoffset), badgeImage)
+            badgeoffset += 110
+
+        warningLightoffset = 0
+        imgWidth, _ = imgWithBadges.size
+        for icon in warningLightIcons:
+            draw = ImageDraw.Draw(imgWithBadges.convert("RGBA"))
+            draw.ellipse(((imgWidth - 100), warningLightoffset, (imgWidth - 1), (warningLightoffset + 100)), fill=(0, 0, 0, 200))
+            lightImage = ICONS.resized(icon, (64, 64))
+            imgWithBadges.paste(lightImage, ((imgWidth - 82), warningLightoffset + 18), lightImage)
+            warningLightoffset += 110
+
+        self.__carImages['statusWithBadge'] = imgWithBadges
+
+        # Car with badges
+        if 'car_34view' in self.__carImages:
+            carWithBadges = self.__carImages['car_34view'].copy()
+
+            badgeoffset = 0
+            for badge in badges:
+                badgeImage = BADGES[badge.value]
+                carWithBadges.paste(badgeImage, (0, badgeoffset), badgeImage)
+                badgeoffset += 110
+
+            warningLightoffset = 0
+            imgWidth, _ = carWithBadges.size
+            for icon in warningLightIcons:
+                draw = ImageDraw.Draw(carWithBadges)
+                draw.ellipse(((imgWidth - 100), warningLightoffset, (imgWidth - 1), (warningLightoffset + 100)), fill=(0, 0, 0, 200))
+                lightImage = ICONS.resized(icon, (64, 64))
+                carWithBadges.paste(lightImage, ((imgWidth - 82), warningLightoffset + 18), lightImage)
+                warningLightoffset += 110
+
+            self.__carImages['carWithBadge'] = carWithBadges
 
     def __str__(self) -> str:  # noqa: C901
         returnString: str = ''
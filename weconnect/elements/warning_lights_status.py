@@ -1,14 +1,13 @@
 from enum import Enum
-import base64
-import io
 import logging
 
-from weconnect.addressable import AddressableAttribute, AddressableObject, AddressableDict
+from weconnect.addressable import AddressableAttribute, AddressableObject, AddressableDict, LazyImageAttribute
 from weconnect.elements.generic_status import GenericStatus
 
 SUPPORT_IMAGES = False
 try:
-    from PIL import Image  # type: ignore
+    from PIL import Image  # type: ignore # noqa: F401 # pylint: disable=unused-import
+    from weconnect.elements.helpers.icon_cache import ICONS
     SUPPORT_IMAGES = True
 except ImportError:
     pass
@@ -90,7 +89,7 @@ class WarningLightsStatus(GenericStatus):
             self.text = AddressableAttribute(localAddress='text', parent=self, value=None, valueType=str)
             self.category = AddressableAttribute(localAddress='category', parent=self, value=None, valueType=WarningLightsStatus.WarningLight.Category)
             self.priority = AddressableAttribute(localAddress='priority', parent=self, value=None, valueType=int)
-            self.icon = AddressableAttribute(localAddress='icon', parent=self, value=None, valueType=Image.Image)
+            self.icon = LazyImageAttribute(localAddress='icon', parent=self)
             self.iconName = AddressableAttribute(localAddress='iconName', parent=self, value=None, valueType=str)
             self.iconColor = AddressableAttribute(localAddress='iconColor', parent=self, value=None, valueType=WarningLightsStatus.WarningLight.IconColor)
             self.messageId = AddressableAttribute(localAddress='messageId', parent=self, value=None, valueType=str)
@@ -118,9 +117,8 @@ class WarningLightsStatus(GenericStatus):
                 if 'icon' in fromDict and fromDict['icon'] is not None:
                     prefix = 'data:image/png;base64,'
                     if fromDict['icon'].startswith(prefix):
-                        img = fromDict['icon'][len(prefix):]
-                        img = base64.b64decode(img)
-                        img = Image.open(io.BytesIO(img))
+                        # Icons repeat across vehicles and updates, the decoded image is shared
+                        img = ICONS.get(fromDict['icon'][len(prefix):])
                         self.icon.setValueWithCarTime(img, lastUpdateFromCar=None, fromServer=True)
                     else:
                         LOG.error('%s: warning light icon is not a base64 encoded png', self.getGlobalAddress())
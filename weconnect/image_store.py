@@ -0,0 +1,96 @@
+from __future__ import annotations
+from typing import Iterator, Optional, Set
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+
+LOG = logging.getLogger("weconnect")
+
+
+class ImageStore():
+    """Content addressed store for downloaded images
+
+    Images are written once in their original encoding to a file named after the sha256 hash of their content. The cache only keeps the reference
+    returned by put, so images are neither base64 encoded in json cache files nor held in memory by the cache.
+
+    Args:
+        directory (str): Directory the images are stored in. It is created if it does not exist.
+    """
+
+    PREFIX: str = 'sha256:'
+
+    def __init__(self, directory: str) -> None:
+        self.directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def isReference(value: object) -> bool:
+        # The prefix can not be confused with base64 encoded images from older cache files, as ':' is not part of the base64 alphabet
+        return isinstance(value, str) and value.startswith(ImageStore.PREFIX)
+
+    def path(self, reference: str) -> str:
+        digest: str = reference[len(ImageStore.PREFIX):]
+        if len(digest) != 64 or not all(char in '0123456789abcdef' for char in digest):
+            raise ValueError(f'{reference} is not a valid image reference')
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        """Store the image and return its reference. Images that are already stored are not written again."""
+        reference: str = ImageStore.PREFIX + hashlib.sha256(data).hexdigest()
+        path: str = self.path(reference)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so that an interrupted write never leaves a truncated image under the final name
+            fileDescriptor, temporaryPath = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            try:
+                with os.fdopen(fileDescriptor, 'wb') as file:
+                    file.write(data)
+                os.replace(temporaryPath, path)
+            except OSError:
+                if os.path.exists(temporaryPath):
+                    os.remove(temporaryPath)
+                raise
+        return reference
+
+    def __contains__(self, reference: object) -> bool:
+        if not ImageStore.isReference(reference):
+            return False
+        try:
+            return os.path.exists(self.path(str(reference)))
+        except ValueError:
+            # Malformed reference, e.g. from a damaged cache file. The image is treated as missing and downloaded again.
+            return False
+
+    def get(self, reference: str) -> Optional[bytes]:
+        """Return the content of the image or None if it is not stored"""
+        try:
+            with open(self.path(reference), 'rb') as file:
+                return file.read()
+        except (OSError, ValueError):
+            return None
+
+    def open(self, reference: str) -> mmap.mmap:
+        """Memory map the image, e.g. to decode it without copying the file into memory first. Raises OSError if the image is not stored."""
+        with open(self.path(reference), 'rb') as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def references(self) -> Iterator[str]:
+        for subdirectory in os.scandir(self.directory):
+            if subdirectory.is_dir():
+                for entry in os.scandir(subdirectory.path):
+                    if entry.is_file() and not entry.name.startswith('.tmp-'):
+                        yield ImageStore.PREFIX + entry.name
+
+    def prune(self, keep: Set[str]) -> int:
+        """Remove all images not referenced in keep, e.g. the values of the cache. Returns the number of removed images."""
+        removed: int = 0
+        for reference in list(self.references()):
+            if reference not in keep:
+                try:
+                    os.remove(self.path(reference))
+                    removed += 1
+                except (OSError, ValueError) as err:
+                    LOG.warning('Could not remove image %s from image store: %s', reference, err)
+        return removed
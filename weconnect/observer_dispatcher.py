@@ -0,0 +1,221 @@
+from __future__ import annotations
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional
+from collections import deque
+from enum import Enum
+from threading import Condition, Lock, Thread, get_ident
+import asyncio
+import inspect
+import logging
+import time
+
+LOG = logging.getLogger("weconnect")
+
+
+class ObserverDispatcher():
+    """Delivers notifications to observers in worker threads instead of the thread that changed the element
+
+    Observers are added with the dispatcher, e.g. weConnect.addObserver(observer, flag, dispatcher=dispatcher). Notifications are put into
+    bounded queues and the element is changed or the update continues without waiting for the observer. Each observer is always served by the
+    same worker, so it gets notifications in the order they happened. Observers get the element itself, its value may have changed again by
+    the time the observer runs.
+
+    Args:
+        workers (int, optional): Number of worker threads. Defaults to 1.
+        maxQueueSize (int, optional): Maximum number of queued notifications per worker. Defaults to 1000.
+        overflowPolicy (ObserverDispatcher.OverflowPolicy, optional): What happens if a queue is full. Defaults to OverflowPolicy.BLOCK.
+        loop (asyncio.AbstractEventLoop, optional): If given, observers are called in this event loop and coroutine functions are awaited
+        there. Defaults to None.
+    """
+
+    class OverflowPolicy(Enum):
+        BLOCK = 'block'
+        DROP_NEWEST = 'drop newest'
+        DROP_OLDEST = 'drop oldest'
+
+    class Event(NamedTuple):
+        observer: Callable
+        element: Any
+        flags: Any
+        enqueuedAt: float
+
+    def __init__(self, workers: int = 1, maxQueueSize: int = 1000, overflowPolicy: ObserverDispatcher.OverflowPolicy = OverflowPolicy.BLOCK,
+                 loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        if maxQueueSize < 1:
+            raise ValueError('maxQueueSize must be at least 1')
+        self.maxQueueSize: int = maxQueueSize
+        self.overflowPolicy: ObserverDispatcher.OverflowPolicy = overflowPolicy
+        self.loop: Optional[asyncio.AbstractEventLoop] = loop
+        self.dispatched: int = 0
+        self.dropped: int = 0
+        self.errors: int = 0
+        self.maxQueueDepth: int = 0
+        self.__latencyTotal: float = 0.0
+        self.lastLatency: float = 0.0
+        self.maxLatency: float = 0.0
+        self.__statsLock: Lock = Lock()
+        self.__closed: bool = False
+        self.__queues: List[Deque[ObserverDispatcher.Event]] = [deque() for _ in range(workers)]
+        self.__busy: List[bool] = [False] * workers
+        self.__conditions: List[Condition] = [Condition() for _ in range(workers)]
+        self.__threads: List[Thread] = [Thread(target=self.__work, args=(shard,), daemon=True, name=f'WeConnect observer dispatcher {shard}')
+                                        for shard in range(workers)]
+        for thread in self.__threads:
+            thread.start()
+        self.__threadIds: List[Optional[int]] = [thread.ident for thread in self.__threads]
+
+    def wrap(self, observer: Callable) -> DispatchedObserver:
+        """Return the observer that is registered instead of observer. It compares equal to observer, so removeObserver works with both."""
+        return DispatchedObserver(self, observer)
+
+    def submit(self, observer: Callable, element: Any, flags: Any) -> bool:
+        """Queue a notification for observer. Returns False if it was dropped."""
+        if self.__closed:
+            LOG.warning('Observer dispatcher is closed, dropping notification for %s', observer)
+            with self.__statsLock:
+                self.dropped += 1
+            return False
+        shard: int = hash(observer) % len(self.__queues)
+        queue: Deque[ObserverDispatcher.Event] = self.__queues[shard]
+        with self.__conditions[shard]:
+            if len(queue) >= self.maxQueueSize:
+                if self.overflowPolicy == ObserverDispatcher.OverflowPolicy.DROP_NEWEST:
+                    with self.__statsLock:
+                        self.dropped += 1
+                    return False
+                if self.overflowPolicy == ObserverDispatcher.OverflowPolicy.DROP_OLDEST:
+                    queue.popleft()
+                    with self.__statsLock:
+                        self.dropped += 1
+                # An observer of this worker changing elements would wait for itself and the loop can not wait for the workers that wait for
+                # the loop, so their notifications are queued regardless of the limit
+                elif get_ident() != self.__threadIds[shard] and not self.__inLoop():
+                    self.__conditions[shard].wait_for(lambda: len(queue) < self.maxQueueSize or self.__closed)
+                    if self.__closed:
+                        with self.__statsLock:
+                            self.dropped += 1
+                        return False
+            queue.append(ObserverDispatcher.Event(observer=observer, element=element, flags=flags, enqueuedAt=time.monotonic()))
+            self.maxQueueDepth = max(self.maxQueueDepth, len(queue))
+            self.__conditions[shard].notify_all()
+        return True
+
+    def __inLoop(self) -> bool:
+        if self.loop is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def __work(self, shard: int) -> None:
+        queue: Deque[ObserverDispatcher.Event] = self.__queues[shard]
+        condition: Condition = self.__conditions[shard]
+        while True:
+            with condition:
+                condition.wait_for(lambda: len(queue) > 0 or self.__closed)
+                if not queue:
+                    return
+                event: ObserverDispatcher.Event = queue.popleft()
+                self.__busy[shard] = True
+                condition.notify_all()
+            try:
+                self.__call(event)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                LOG.error('Observer %s failed for %s: %s', event.observer, event.element, err)
+                with self.__statsLock:
+                    self.errors += 1
+            latency: float = time.monotonic() - event.enqueuedAt
+            with self.__statsLock:
+                self.dispatched += 1
+                self.__latencyTotal += latency
+                self.lastLatency = latency
+                self.maxLatency = max(self.maxLatency, latency)
+            with condition:
+                self.__busy[shard] = False
+                condition.notify_all()
+
+    def __call(self, event: ObserverDispatcher.Event) -> None:
+        if self.loop is None:
+            event.observer(element=event.element, flags=event.flags)
+            return
+
+        async def callInLoop() -> None:
+            result = event.observer(element=event.element, flags=event.flags)
+            if inspect.isawaitable(result):
+                await result
+        # Waiting for the observer keeps the order of the notifications
+        asyncio.run_coroutine_threadsafe(callInLoop(), self.loop).result()
+
+    @property
+    def queueDepth(self) -> int:
+        """Number of notifications waiting in all queues"""
+        return sum(len(queue) for queue in self.__queues)
+
+    @property
+    def averageLatency(self) -> float:
+        """Average time in seconds from queueing a notification until the observer returned"""
+        with self.__statsLock:
+            return self.__latencyTotal / self.dispatched if self.dispatched else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {'queueDepth': self.queueDepth, 'maxQueueDepth': self.maxQueueDepth, 'dispatched': self.dispatched, 'dropped': self.dropped,
+                'errors': self.errors, 'averageLatency': self.averageLatency, 'maxLatency': self.maxLatency}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued notifications are delivered. Returns False if the timeout expired before.
+
+        With a loop this must not be called from the loop, as the observers are called there, use loop.run_in_executor instead.
+        """
+        deadline: Optional[float] = time.monotonic() + timeout if timeout is not None else None
+        for shard, condition in enumerate(self.__conditions):
+            with condition:
+                if not condition.wait_for(lambda shard=shard: not self.__queues[shard] and not self.__busy[shard],
+                                          timeout=max(0.0, deadline - time.monotonic()) if deadline is not None else None):
+                    return False
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the workers. With wait all queued notifications are delivered first, otherwise they are discarded."""
+        if not wait:
+            for shard, condition in enumerate(self.__conditions):
+                with condition:
+                    with self.__statsLock:
+                        self.dropped += len(self.__queues[shard])
+                    self.__queues[shard].clear()
+        self.__closed = True
+        for condition in self.__conditions:
+            with condition:
+                condition.notify_all()
+        for thread in self.__threads:
+            if thread.ident != get_ident():
+                thread.join()
+
+    def __enter__(self) -> ObserverDispatcher:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class DispatchedObserver():
+    """Observer registered by addObserver with a dispatcher, queues notifications for the original observer"""
+
+    def __init__(self, dispatcher: ObserverDispatcher, observer: Callable) -> None:
+        self.dispatcher: ObserverDispatcher = dispatcher
+        self.observer: Callable = observer
+
+    def __call__(self, element: Any, flags: Any) -> None:
+        self.dispatcher.submit(self.observer, element, flags)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, DispatchedObserver):
+            return self.observer == other.observer
+        return self.observer == other
+
+    def __hash__(self) -> int:
+        return hash(self.observer)
+
+    def __repr__(self) -> str:
+        return f'DispatchedObserver({self.observer!r})'
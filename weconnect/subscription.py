@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import Any, Dict, List, NamedTuple, Optional
+from collections import OrderedDict
+from threading import Condition
+
+from weconnect.addressable import AddressableLeaf
+
+
+class CoalescingSubscription():
+    """Subscription that keeps only the latest change of every element
+
+    Instead of getting every notification, a consumer calls drain() whenever it is ready and gets one change per global address with the flags
+    of all notifications since the last drain merged. A consumer that falls behind, e.g. during the first update after filling the cache, gets
+    as many changes as elements changed, regardless of how often they changed.
+
+    Args:
+        element (AddressableLeaf): Element to subscribe to, changes of all its children are included
+        flags (AddressableLeaf.ObserverEvent, optional): Events to subscribe to. Defaults to AddressableLeaf.ObserverEvent.ALL.
+        priority (AddressableLeaf.ObserverPriority, optional): Priority of the observer. Defaults to USER_LOW.
+        onUpdateComplete (bool, optional): Only record changes once the update is complete. Defaults to False.
+    """
+
+    class Change(NamedTuple):
+        address: str
+        element: AddressableLeaf
+        flags: AddressableLeaf.ObserverEvent
+        notifications: int
+
+        @property
+        def value(self) -> Any:
+            """Current value of the element, this is the latest value and not the value at the time of the first notification"""
+            return getattr(self.element, 'value', None)
+
+    def __init__(self, element: AddressableLeaf, flags: AddressableLeaf.ObserverEvent = AddressableLeaf.ObserverEvent.ALL,
+                 priority: Optional[AddressableLeaf.ObserverPriority] = None, onUpdateComplete: bool = False) -> None:
+        self.element: AddressableLeaf = element
+        self.flags: AddressableLeaf.ObserverEvent = flags
+        self.notifications: int = 0
+        self.coalesced: int = 0
+        self.__condition: Condition = Condition()
+        self.__pending: OrderedDict[str, CoalescingSubscription.Change] = OrderedDict()
+        if priority is None:
+            priority = AddressableLeaf.ObserverPriority.USER_LOW
+        element.addObserver(self.__onNotify, flags, priority=priority, onUpdateComplete=onUpdateComplete)
+
+    def __onNotify(self, element: AddressableLeaf, flags: AddressableLeaf.ObserverEvent) -> None:
+        address: str = element.getGlobalAddress()
+        with self.__condition:
+            self.notifications += 1
+            change: Optional[CoalescingSubscription.Change] = self.__pending.get(address)
+            if change is None:
+                self.__pending[address] = CoalescingSubscription.Change(address=address, element=element, flags=flags, notifications=1)
+            else:
+                self.coalesced += 1
+                mergedFlags: AddressableLeaf.ObserverEvent = AddressableLeaf.mergeFlags(change.flags, flags)
+                if mergedFlags:
+                    # The slot keeps its position, so changes are drained in the order elements first changed
+                    self.__pending[address] = change._replace(element=element, flags=mergedFlags, notifications=change.notifications + 1)
+                else:
+                    # Enabled and disabled again before anyone noticed
+                    del self.__pending[address]
+            self.__condition.notify_all()
+
+    def drain(self, maxChanges: Optional[int] = None, timeout: Optional[float] = 0) -> List[CoalescingSubscription.Change]:
+        """Remove and return the pending changes in the order the elements first changed
+
+        Args:
+            maxChanges (int, optional): Return at most this many changes, the others stay pending. Defaults to None for all changes.
+            timeout (float, optional): Seconds to wait for a change if there is none. None waits forever. Defaults to 0.
+
+        Returns:
+            List[CoalescingSubscription.Change]: One change per global address
+        """
+        with self.__condition:
+            if timeout != 0:
+                self.__condition.wait_for(lambda: len(self.__pending) > 0, timeout=timeout)
+            changes: List[CoalescingSubscription.Change] = []
+            while self.__pending and (maxChanges is None or len(changes) < maxChanges):
+                changes.append(self.__pending.popitem(last=False)[1])
+            return changes
+
+    def stats(self) -> Dict[str, int]:
+        return {'pending': len(self), 'notifications': self.notifications, 'coalesced': self.coalesced}
+
+    def close(self) -> None:
+        """Stop recording changes, pending changes can still be drained"""
+        self.element.removeObserver(self.__onNotify)
+
+    def __len__(self) -> int:
+        with self.__condition:
+            return len(self.__pending)
+
+    def __enter__(self) -> CoalescingSubscription:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,21 +1,32 @@
 from __future__ import annotations
 from typing import Dict, List, Set, Tuple, Callable, Any, Optional, Union
 
+import contextvars
 import os
+import re
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
 from threading import Lock
 import string
 import locale
 import logging
 import json
-from datetime import datetime, timedelta
+import time
+import weakref
+from datetime import timedelta
 
 import requests
 
+from weconnect.cache import Cache, CacheEntry, MemoryCache
+from weconnect.image_store import ImageStore
 from weconnect.auth.session_manager import SessionManager, Service, SessionUser
+from weconnect.auth.token_refresher import TokenRefresher
 from weconnect.elements.vehicle import Vehicle
 from weconnect.domain import Domain
 from weconnect.elements.charging_station import ChargingStation
 from weconnect.elements.general_controls import GeneralControls
+from weconnect.elements.helpers.single_flight import SingleFlight
+from weconnect.elements.helpers.request_scheduler import RequestScheduler
 from weconnect.addressable import AddressableLeaf, AddressableObject, AddressableDict
 from weconnect.errors import RetrievalError, TooManyRequestsError
 from weconnect.weconnect_errors import ErrorEventType
@@ -27,6 +38,8 @@ LOG = logging.getLogger("weconnect")
 class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attributes, too-many-public-methods
     """Main class used to interact with WeConnect"""
 
+    VEHICLES_URL: str = 'https://emea.bff.cariad.digital/vehicle/v1/vehicles'
+
     def __init__(  # noqa: C901 # pylint: disable=too-many-arguments
         self,
         username: str,
@@ -44,7 +57,17 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         numRetries: int = 3,
         timeout: bool = None,
         selective: Optional[list[Domain]] = None,
-        forceReloginAfter: Optional[int] = None
+        forceReloginAfter: Optional[int] = None,
+        maxWorkers: Optional[int] = None,
+        tokenRefreshMargin: Optional[int] = None,
+        requestsPerHour: Optional[float] = None,
+        requestBurst: int = 10,
+        poolMaxsize: int = 10,
+        poolBlock: bool = False,
+        cache: Optional[Cache] = None,
+        maxAgePolicy: Optional[Dict[Union[str, Domain], int]] = None,
+        staleWhileRevalidate: Optional[int] = None,
+        imageStore: Optional[ImageStore] = None
     ) -> None:
         """Initialize WeConnect interface. If loginOnInit is true the user will be tried to login.
            If loginOnInit is true also an initial fetch of data is performed.
@@ -67,9 +90,31 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
             timeout (bool, optional, optional): Timeout in seconds used for http connections to the VW servers
             selective (list[Domain], optional): Domains to request data for
             forceReloginAfter (int, optional): Force a full relogin after number of seconds. This might be necessary to get fresh data
+            maxWorkers (int, optional): Number of threads used to update vehicles in parallel. Observers may then be called from these threads.
+            None means vehicles are updated one after another. Defaults to None.
+            tokenRefreshMargin (int, optional): Refresh tokens in a background thread this many seconds before they expire. New tokens are written to
+            the tokenfile. None means tokens are only refreshed when a request needs them. Defaults to None.
+            requestsPerHour (float, optional): Limit the requests to the VW servers. Requests exceeding the limit are delayed and requests answered with
+            too many requests are retried after the time the server asks for. None means no limit and no retries. Defaults to None.
+            requestBurst (int, optional): Number of requests that can be sent at once when requestsPerHour is used. Defaults to 10.
+            poolMaxsize (int, optional): Maximum number of connections per host that are kept open and reused. Should be at least the number of
+            parallel requests, e.g. when maxWorkers is used. Defaults to 10.
+            poolBlock (bool, optional): Never open more than poolMaxsize connections per host, requests wait for a free connection instead.
+            Defaults to False.
+            cache (Cache, optional): Backend for the response cache, e.g. a MemoryCache with limits or a SQLiteCache that persists every response
+            immediately. Defaults to an unlimited MemoryCache.
+            maxAgePolicy (Dict[Union[str, Domain], int], optional): Maximum age of the cache per endpoint. Keys are regular expressions matched
+            against the URL or domains. If several keys match a URL the smallest maximum age is used, URLs not matching any key use maxAge.
+            Defaults to None.
+            staleWhileRevalidate (int, optional): Seconds after the maximum age in which outdated data is returned immediately while it is fetched in the
+            background. Once the new data arrives the last update is repeated so observers are notified. None means outdated data is always fetched
+            before returning. Defaults to None.
+            imageStore (ImageStore, optional): Store for downloaded images. Images are written once to a file named after their content and the cache
+            only keeps a reference to it, which keeps images out of memory and json cache files. Defaults to None.
         """
         super().__init__(localAddress='', parent=None)
         self.lock = Lock()
+        self.__tokenRefresher: Optional[TokenRefresher] = None
         self.username: str = username
         self.password: str = password
         self.spin: Union[str, bool] = spin
@@ -79,7 +124,7 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         self.__vehicles: AddressableDict[str, Vehicle] = AddressableDict(localAddress='vehicles', parent=self)
         self.__stations: AddressableDict[str, ChargingStation] = AddressableDict(localAddress='chargingStations', parent=self)
         self.__controls: GeneralControls = GeneralControls(localAddress='controls', parent=self)
-        self.__cache: Dict[str, Any] = {}
+        self.__cache: Cache = cache if cache is not None else MemoryCache()
         self.fixAPI: bool = fixAPI
         self.proxy: Optional[str] = proxy
 
@@ -89,13 +134,24 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
             self.proxystring = ""
 
         self.maxAge: Optional[int] = maxAge
+        self.maxAgePolicy = maxAgePolicy
         self.maxAgePictures: Optional[int] = maxAgePictures
+        self.maxWorkers: Optional[int] = maxWorkers
         self.latitude: Optional[float] = None
         self.longitude: Optional[float] = None
         self.searchRadius: Optional[int] = None
         self.market: Optional[str] = None
         self.useLocale: Optional[str] = locale.getlocale()[0]
         self.__elapsed: List[timedelta] = []
+        self.__notModifiedCount: int = 0
+        self.__fetchFlights: SingleFlight = SingleFlight()
+        self.staleWhileRevalidate: Optional[int] = staleWhileRevalidate
+        self.imageStore: Optional[ImageStore] = imageStore
+        self.__revalidationLock: Lock = Lock()
+        self.__revalidating: Set[str] = set()
+        self.__revalidatedChanges: bool = False
+        self.__revalidationExecutor: Optional[ThreadPoolExecutor] = None
+        self._lastUpdateArgs: Optional[Dict[str, Any]] = None
 
         self.__enableTracker: bool = False
 
@@ -108,10 +164,24 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         self.__session.proxies.update(self.proxystring)
         self.__session.timeout = timeout
         self.__session.retries = numRetries
+        self.__session.configurePool(poolMaxsize=poolMaxsize, poolBlock=poolBlock)
         self.__session.forceReloginAfter = forceReloginAfter
+        if requestsPerHour is not None:
+            self.__session.scheduler = RequestScheduler(rate=requestsPerHour / 3600, burst=requestBurst)
+
+        if tokenRefreshMargin is not None:
+            # The refresher only holds a weak reference, so a pending refresh does not keep this object alive and __del__ can disconnect
+            persistTokens: weakref.WeakMethod = weakref.WeakMethod(self.persistTokens)
+
+            def onRefresh() -> None:
+                method: Optional[Callable[[], None]] = persistTokens()
+                if method is not None:
+                    method()
+            self.__tokenRefresher = TokenRefresher(self.__session, margin=tokenRefreshMargin, onRefresh=onRefresh)
+            self.__tokenRefresher.start()
 
         if loginOnInit:
-            self.__session.login()
+            self.__session.relogin()
 
         if updateAfterLogin:
             self.update(updateCapabilities=updateCapabilities, updatePictures=updatePictures, selective=selective)
@@ -121,14 +191,24 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         return super().__del__()
 
     def disconnect(self) -> None:
-        pass
+        if self.__tokenRefresher is not None:
+            self.__tokenRefresher.stop()
+        if self.__revalidationExecutor is not None:
+            self.__revalidationExecutor.shutdown(wait=False)
+            self.__revalidationExecutor = None
+        self.__cache.close()
 
     @property
     def session(self) -> requests.Session:
         return self.__session
 
     @property
-    def cache(self) -> Dict[str, Any]:
+    def requestScheduler(self) -> Optional[RequestScheduler]:
+        """Scheduler limiting the request rate, gives access to the remaining budget and the number of waiting requests"""
+        return self.__session.scheduler
+
+    @property
+    def cache(self) -> Cache:
         return self.__cache
 
     def persistTokens(self) -> None:
@@ -137,7 +217,7 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
 
     def persistCacheAsJson(self, filename: str) -> None:
         with open(filename, 'w', encoding='utf8') as file:
-            json.dump(self.__cache, file, cls=ExtendedEncoder)
+            json.dump(self.__cache.toDict(), file, cls=ExtendedEncoder)
         LOG.info('Writing cachefile %s', filename)
 
     def fillCacheFromJson(self, filename: str, maxAge: int, maxAgePictures: Optional[int] = None) -> None:
@@ -149,11 +229,12 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
 
         try:
             with open(filename, 'r', encoding='utf8') as file:
-                self.__cache = json.load(file)
+                self.__cache.fromDict(json.load(file))
         except json.decoder.JSONDecodeError:
-            LOG.error('Cachefile %s seems corrupted will delete it and try to create a new one. '
-                      'If this problem persists please check if a problem with your disk exists.', filename)
-            os.remove(filename)
+            corruptFilename: str = f'{filename}.corrupt-{int(time.time())}'
+            LOG.error('Cachefile %s seems corrupted will move it to %s and try to create a new one. '
+                      'If this problem persists please check if a problem with your disk exists.', filename, corruptFilename)
+            os.replace(filename, corruptFilename)
         LOG.info('Reading cachefile %s', filename)
 
     def fillCacheFromJsonString(self, jsonString, maxAge: int, maxAgePictures: Optional[int] = None) -> None:
@@ -163,7 +244,7 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         else:
             self.maxAgePictures = maxAgePictures
 
-        self.__cache = json.loads(jsonString)
+        self.__cache.fromDict(json.loads(jsonString))
         LOG.info('Reading cache from string')
 
     def clearCache(self) -> None:
@@ -180,8 +261,18 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         for vehicle in self.vehicles:
             vehicle.disableTracker()
 
-    def login(self) -> None:
-        self.__session.login()
+    @property
+    def trackerEnabled(self) -> bool:
+        return self.__enableTracker
+
+    def login(self, generation: Optional[int] = None) -> None:
+        """Login to WeConnect. Only one thread at a time does a login.
+
+        Args:
+            generation (Optional[int], optional): Value of session.authGeneration when the need for a login was detected. If another thread logged in
+            since then, no new login is done. Defaults to None.
+        """
+        self.__session.relogin(generation)
 
     @property
     def vehicles(self) -> AddressableDict[str, Vehicle]:
@@ -189,47 +280,71 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
 
     def update(self, updateCapabilities: bool = True, updatePictures: bool = True, force: bool = False,
                selective: Optional[list[Domain]] = None) -> None:
-        self.__elapsed.clear()
+        self._lastUpdateArgs = {'updateCapabilities': updateCapabilities, 'updatePictures': updatePictures, 'selective': selective}
+        self.clearElapsed()
         try:
-            self.updateVehicles(updateCapabilities=updateCapabilities, updatePictures=updatePictures, force=force, selective=selective)
-            self.updateChargingStations(force=force)
+            # Observers are notified once all vehicles and charging stations are updated
+            with self.updateTransaction():
+                self.updateVehicles(updateCapabilities=updateCapabilities, updatePictures=updatePictures, force=force, selective=selective)
+                self.updateChargingStations(force=force)
         finally:
-            self.updateComplete()
             self.__session.cookies.clear()  # Clear cookies to have a fresh session afterwards
 
     def updateVehicles(self, updateCapabilities: bool = True, updatePictures: bool = True, force: bool = False,  # noqa: C901
                        selective: Optional[list[Domain]] = None) -> None:
         with self.lock:
-            catchedRetrievalError = None
-            url = 'https://emea.bff.cariad.digital/vehicle/v1/vehicles'
+            catchedRetrievalErrors: Dict[str, RetrievalError] = {}
+            url = WeConnect.VEHICLES_URL
             data = self.fetchData(url, force)
             if data is not None:
                 if 'data' in data and data['data']:
-                    vins: List[str] = []
+                    vehicleDicts: Dict[str, Dict[str, Any]] = {}
                     for vehicleDict in data['data']:
                         if 'vin' not in vehicleDict:
                             break
-                        vin: str = vehicleDict['vin']
-                        vins.append(vin)
+                        vehicleDicts[vehicleDict['vin']] = vehicleDict
+
+                    if self.maxWorkers is not None and self.maxWorkers > 1 and len(vehicleDicts) > 1:
+                        with ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix='WeConnectVehicleUpdate') as executor:
+                            futures: Dict[str, Future] = {vin: executor.submit(contextvars.copy_context().run, self.__updateVehicle, vin, vehicleDict,
+                                                                               updateCapabilities=updateCapabilities, updatePictures=updatePictures,
+                                                                               selective=selective)
+                                                          for vin, vehicleDict in vehicleDicts.items()}
+                            results: Dict[str, Callable[[], Optional[Vehicle]]] = {vin: future.result for vin, future in futures.items()}
+                    else:
+                        results = {vin: functools.partial(self.__updateVehicle, vin, vehicleDict, updateCapabilities=updateCapabilities,
+                                                          updatePictures=updatePictures, selective=selective)
+                                   for vin, vehicleDict in vehicleDicts.items()}
+
+                    for vin, result in results.items():
                         try:
-                            if vin not in self.__vehicles:
-                                vehicle = Vehicle(weConnect=self, vin=vin, parent=self.__vehicles, fromDict=vehicleDict, fixAPI=self.fixAPI,
-                                                  updateCapabilities=updateCapabilities, updatePictures=updatePictures, selective=selective,
-                                                  enableTracker=self.__enableTracker)
+                            vehicle: Optional[Vehicle] = result()
+                            if vehicle is not None:
                                 self.__vehicles[vin] = vehicle
-                            else:
-                                self.__vehicles[vin].update(fromDict=vehicleDict, updateCapabilities=updateCapabilities, updatePictures=updatePictures,
-                                                            selective=selective)
                         except RetrievalError as retrievalError:
-                            catchedRetrievalError = retrievalError
+                            catchedRetrievalErrors[vin] = retrievalError
                             LOG.error('Failed to retrieve data for VIN %s: %s', vin, retrievalError)
                     # delete those vins that are not anymore available
-                    for vin in [vin for vin in self.__vehicles if vin not in vins]:
+                    for vin in [vin for vin in self.__vehicles if vin not in vehicleDicts]:
                         del self.__vehicles[vin]
 
-                    self.__cache[url] = (data, str(datetime.utcnow()))
-            if catchedRetrievalError:
-                raise catchedRetrievalError
+                    self.__cache.touch(url)
+            if len(catchedRetrievalErrors) == 1:
+                raise next(iter(catchedRetrievalErrors.values()))
+            if catchedRetrievalErrors:
+                raise RetrievalError(f'Failed to retrieve data for {len(catchedRetrievalErrors)} vehicles: '
+                                     + ', '.join([f'{vin}: {error}' for vin, error in catchedRetrievalErrors.items()])) \
+                    from next(iter(catchedRetrievalErrors.values()))
+
+    def __updateVehicle(self, vin: str, vehicleDict: Dict[str, Any], updateCapabilities: bool = True, updatePictures: bool = True,
+                        selective: Optional[list[Domain]] = None) -> Optional[Vehicle]:
+        """Creates or updates a vehicle. Returns the vehicle if it was newly created."""
+        if vin not in self.__vehicles:
+            return Vehicle(weConnect=self, vin=vin, parent=self.__vehicles, fromDict=vehicleDict, fixAPI=self.fixAPI,
+                           updateCapabilities=updateCapabilities, updatePictures=updatePictures, selective=selective,
+                           enableTracker=self.__enableTracker)
+        self.__vehicles[vin].update(fromDict=vehicleDict, updateCapabilities=updateCapabilities, updatePictures=updatePictures, selective=selective)
+        return None
 
     def setChargingStationSearchParameters(self, latitude: float, longitude: float, searchRadius: Optional[int] = None, market: Optional[str] = None,
                                            useLocale: Optional[str] = locale.getlocale()[0]) -> None:
@@ -239,9 +354,7 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
         self.market = market
         self.useLocale = useLocale
 
-    def getChargingStations(self, latitude, longitude, searchRadius=None, market=None, useLocale=None,  # noqa: C901
-                            force=False) -> AddressableDict[str, ChargingStation]:
-        chargingStationMap: AddressableDict[str, ChargingStation] = AddressableDict(localAddress='', parent=None)
+    def getChargingStationsUrl(self, latitude, longitude, searchRadius=None, market=None, useLocale=None) -> str:
         url: str = f'https://emea.bff.cariad.digital/poi/charging-stations/v2?latitude={latitude}&longitude={longitude}'
         if market is not None:
             url += f'&market={market}'
@@ -251,6 +364,12 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
             url += f'&searchRadius={searchRadius}'
         if self.session.userId is not None:
             url += f'&userId={self.session.userId}'
+        return url
+
+    def getChargingStations(self, latitude, longitude, searchRadius=None, market=None, useLocale=None,  # noqa: C901
+                            force=False) -> AddressableDict[str, ChargingStation]:
+        chargingStationMap: AddressableDict[str, ChargingStation] = AddressableDict(localAddress='', parent=None)
+        url: str = self.getChargingStationsUrl(latitude, longitude, searchRadius=searchRadius, market=market, useLocale=useLocale)
         data = self.fetchData(url, force)
         if data is not None:
             if 'chargingStations' in data and data['chargingStations']:
@@ -262,20 +381,13 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
                                                                fixAPI=self.fixAPI)
                     chargingStationMap[stationId] = station
 
-                self.__cache[url] = (data, str(datetime.utcnow()))
+                self.__cache.touch(url)
         return chargingStationMap
 
     def updateChargingStations(self, force: bool = False) -> None:  # noqa: C901 # pylint: disable=too-many-branches
         if self.latitude is not None and self.longitude is not None:
-            url: str = f'https://emea.bff.cariad.digital/poi/charging-stations/v2?latitude={self.latitude}&longitude={self.longitude}'
-            if self.market is not None:
-                url += f'&market={self.market}'
-            if self.useLocale is not None:
-                url += f'&locale={self.useLocale}'
-            if self.searchRadius is not None:
-                url += f'&searchRadius={self.searchRadius}'
-            if self.session.userId is not None:
-                url += f'&userId={self.session.userId}'
+            url: str = self.getChargingStationsUrl(self.latitude, self.longitude, searchRadius=self.searchRadius, market=self.market,
+                                                   useLocale=self.useLocale)
             data = self.fetchData(url, force)
             if data is not None:
                 if 'chargingStations' in data and data['chargingStations']:
@@ -295,7 +407,7 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
                     for stationId in [stationId for stationId in ids if stationId not in self.__stations]:
                         del self.__stations[stationId]
 
-                    self.__cache[url] = (data, str(datetime.utcnow()))
+                    self.__cache.touch(url)
 
     def getLeafChildren(self) -> List[AddressableLeaf]:
         leafChildren = [children for vehicle in self.__vehicles.values() for children in vehicle.getLeafChildren()] \
@@ -341,6 +453,18 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
     def recordElapsed(self, elapsed: timedelta) -> None:
         self.__elapsed.append(elapsed)
 
+    def clearElapsed(self) -> None:
+        self.__elapsed.clear()
+        self.__notModifiedCount = 0
+
+    def getSharedFetchCount(self) -> int:
+        """Number of fetchData calls that were answered by a request that was already in flight for the same URL"""
+        return self.__fetchFlights.sharedCount
+
+    def getNotModifiedCount(self) -> int:
+        """Number of requests since the last update that the server answered with 304 Not Modified"""
+        return self.__notModifiedCount
+
     def getMinElapsed(self) -> timedelta:
         if len(self.__elapsed) == 0:
             return None
@@ -361,58 +485,238 @@ class WeConnect(AddressableObject):  # pylint: disable=too-many-instance-attribu
             return None
         return sum(self.__elapsed, timedelta())
 
-    def fetchData(self, url, force=False, allowEmpty=False, allowHttpError=False, allowedErrors=None) -> Optional[Dict[str, Any]]:  # noqa: C901
-        data: Optional[Dict[str, Any]] = None
-        cacheDate: Optional[datetime] = None
-        if not force and (self.maxAge is not None and self.cache is not None and url in self.cache):
-            data, cacheDateString = self.cache[url]
-            cacheDate = datetime.fromisoformat(cacheDateString)
-        if data is None or self.maxAge is None \
-                or (cacheDate is not None and cacheDate < (datetime.utcnow() - timedelta(seconds=self.maxAge))):
+    def lookupCache(self, url: str, maxAge: Optional[int]) -> Tuple[Optional[Any], bool]:
+        """Look up url in the cache
+
+        Args:
+            url (str): URL the cached data was fetched from
+            maxAge (Optional[int]): Maximum age in seconds for the entry to count as fresh. None means the cache is not used.
+
+        Returns:
+            Tuple[Optional[Any], bool]: The cached data (also when outdated) and whether it is still fresh
+        """
+        if maxAge is None or self.cache is None:
+            return None, False
+        entry: Optional[CacheEntry] = self.cache.get(url)
+        if entry is None:
+            return None, False
+        return entry.data, entry.data is not None and entry.age <= maxAge
+
+    @property
+    def maxAgePolicy(self) -> Dict[Union[str, Domain], int]:
+        return self.__maxAgePolicy
+
+    @maxAgePolicy.setter
+    def maxAgePolicy(self, newPolicy: Optional[Dict[Union[str, Domain], int]]) -> None:
+        self.__maxAgePolicy: Dict[Union[str, Domain], int] = dict(newPolicy) if newPolicy is not None else {}
+        self.__maxAgePolicyPatterns: List[Tuple[re.Pattern, int]] = [(re.compile(key), maxAge) for key, maxAge in self.__maxAgePolicy.items()
+                                                                     if isinstance(key, str)]
+
+    def getMaxAge(self, url: str) -> Optional[int]:
+        """Maximum age of cached data for url according to maxAgePolicy
+
+        Args:
+            url (str): URL of the request
+
+        Returns:
+            Optional[int]: Smallest maximum age of all policy entries matching url or maxAge if no entry matches
+        """
+        maxAges: List[int] = [maxAge for pattern, maxAge in self.__maxAgePolicyPatterns if pattern.search(url)]
+        domainMaxAges: Dict[Domain, int] = {key: maxAge for key, maxAge in self.__maxAgePolicy.items() if isinstance(key, Domain)}
+        if domainMaxAges:
+            if '/parkingposition' in url and Domain.PARKING in domainMaxAges:
+                maxAges.append(domainMaxAges[Domain.PARKING])
+            if '/trips/' in url and Domain.TRIPS in domainMaxAges:
+                maxAges.append(domainMaxAges[Domain.TRIPS])
+            match: Optional[re.Match] = re.search(r'/selectivestatus\?jobs=([^&]*)', url)
+            if match is not None:
+                jobs: List[str] = match.group(1).split(',')
+                maxAges.extend([maxAge for domain, maxAge in domainMaxAges.items() if domain not in (Domain.PARKING, Domain.TRIPS)
+                                and (domain.value in jobs or Domain.ALL.value in jobs)])
+        if maxAges:
+            return min(maxAges)
+        return self.maxAge
+
+    def getConditionalHeaders(self, url: str, data: Optional[Any]) -> Dict[str, str]:
+        """Headers to ask the server to only send the data for url if it changed compared to the cached data
+
+        Args:
+            url (str): URL the cached data was fetched from
+            data (Optional[Any]): Cached data for url as returned by lookupCache
+
+        Returns:
+            Dict[str, str]: If-None-Match and If-Modified-Since headers from the validators stored with the cache entry
+        """
+        headers: Dict[str, str] = {}
+        entry: Optional[CacheEntry] = self.cache.peek(url) if data is not None and self.cache is not None else None
+        if entry is not None and entry.validators is not None:
+            validators: Dict[str, str] = entry.validators
+            if 'ETag' in validators:
+                headers['If-None-Match'] = validators['ETag']
+            if 'Last-Modified' in validators:
+                headers['If-Modified-Since'] = validators['Last-Modified']
+        return headers
+
+    def isStaleUsable(self, url: str, maxAge: Optional[int]) -> bool:
+        """Outdated cached data for url can be returned while it is revalidated in the background"""
+        if self.staleWhileRevalidate is None or maxAge is None or self.cache is None:
+            return False
+        entry: Optional[CacheEntry] = self.cache.peek(url)
+        return entry is not None and entry.data is not None and entry.age <= maxAge + self.staleWhileRevalidate
+
+    def revalidate(self, url: str, data: Optional[Any], allowEmpty=False, allowHttpError=False, allowedErrors=None) -> None:
+        """Fetch url in the background to replace the outdated data in the cache. When all running revalidations are finished and data changed,
+        the last update is repeated."""
+        with self.__revalidationLock:
+            if url in self.__revalidating:
+                return
+            self.__revalidating.add(url)
+            if self.__revalidationExecutor is None:
+                self.__revalidationExecutor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='WeConnectRevalidate')
+            self.__revalidationExecutor.submit(self.__revalidate, url, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError,
+                                               allowedErrors=allowedErrors)
+
+    def __revalidate(self, url: str, data: Optional[Any], allowEmpty=False, allowHttpError=False, allowedErrors=None) -> None:
+        changed: bool = False
+        try:
+            key = (url, allowEmpty, allowHttpError, tuple(allowedErrors) if allowedErrors is not None else None)
+            newData = self.__fetchFlights.do(key, self.__fetchData, url, data=data, headers=self.getConditionalHeaders(url, data), allowEmpty=allowEmpty,
+                                             allowHttpError=allowHttpError, allowedErrors=allowedErrors)
+            changed = newData != data
+        except RetrievalError as retrievalError:
+            LOG.warning('Revalidating %s failed: %s', url, retrievalError)
+        finally:
+            with self.__revalidationLock:
+                self.__revalidating.discard(url)
+                self.__revalidatedChanges = self.__revalidatedChanges or changed
+                repeatUpdate: bool = not self.__revalidating and self.__revalidatedChanges
+                if not self.__revalidating:
+                    self.__revalidatedChanges = False
+        if repeatUpdate:
+            self._onRevalidated()
+
+    def _onRevalidated(self) -> None:
+        """Called in a background thread when revalidated data has changed. Repeats the last update using the new data from the cache."""
+        if self._lastUpdateArgs is not None:
             try:
-                statusResponse: requests.Response = self.session.get(url, allow_redirects=False)
+                self.update(**self._lastUpdateArgs)
+            except RetrievalError as retrievalError:
+                LOG.warning('Update after revalidation failed: %s', retrievalError)
+
+    def fetchData(self, url, force=False, allowEmpty=False, allowHttpError=False, allowedErrors=None,  # noqa: C901
+                  allowStale=True) -> Optional[Dict[str, Any]]:
+        data: Optional[Dict[str, Any]] = None
+        headers: Dict[str, str] = {}
+        if not force:
+            maxAge: Optional[int] = self.getMaxAge(url)
+            data, fresh = self.lookupCache(url, maxAge)
+            if fresh:
+                return data
+            if allowStale and self.isStaleUsable(url, maxAge):
+                self.revalidate(url, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors)
+                return data
+            headers = self.getConditionalHeaders(url, data)
+        # Concurrent callers for the same request wait for one request and share its result
+        key = (url, allowEmpty, allowHttpError, tuple(allowedErrors) if allowedErrors is not None else None)
+        return self.__fetchFlights.do(key, self.__fetchData, url, data=data, headers=headers, allowEmpty=allowEmpty, allowHttpError=allowHttpError,
+                                      allowedErrors=allowedErrors)
+
+    def __fetchData(self, url, data=None, headers=None, allowEmpty=False, allowHttpError=False, allowedErrors=None) -> Optional[Dict[str, Any]]:
+        try:
+            generation: int = self.session.authGeneration
+            statusResponse: requests.Response = self.session.get(url, allow_redirects=False, headers=headers)
+            self.recordElapsed(statusResponse.elapsed)
+            if statusResponse.status_code == requests.codes['unauthorized']:
+                LOG.info('Server asks for new authorization')
+                self.login(generation)
+                statusResponse = self.session.get(url, allow_redirects=False, headers=headers)
                 self.recordElapsed(statusResponse.elapsed)
-                if statusResponse.status_code in (requests.codes['ok'], requests.codes['multiple_status']):
-                    data = statusResponse.json()
-                    if self.cache is not None:
-                        self.cache[url] = (data, str(datetime.utcnow()))
-                elif statusResponse.status_code == requests.codes['too_many_requests']:
-                    self.notifyError(self, ErrorEventType.HTTP, str(statusResponse.status_code),
-                                     'Could not fetch data due to too many requests from your account')
-                    raise TooManyRequestsError('Could not fetch data due to too many requests from your account. '
-                                               f'Status Code was: {statusResponse.status_code}')
-                elif statusResponse.status_code == requests.codes['unauthorized']:
-                    LOG.info('Server asks for new authorization')
-                    self.login()
-                    statusResponse = self.session.get(url, allow_redirects=False)
-                    self.recordElapsed(statusResponse.elapsed)
-
-                    if statusResponse.status_code in (requests.codes['ok'], requests.codes['multiple_status']):
-                        data = statusResponse.json()
-                        if self.cache is not None:
-                            self.cache[url] = (data, str(datetime.utcnow()))
-                    elif not allowHttpError or (allowedErrors is not None and statusResponse.status_code not in allowedErrors):
-                        self.notifyError(self, ErrorEventType.HTTP, str(statusResponse.status_code), 'Could not fetch data due to server error')
-                        raise RetrievalError(f'Could not fetch data even after re-authorization. Status Code was: {statusResponse.status_code}')
-                elif not allowHttpError or (allowedErrors is not None and statusResponse.status_code not in allowedErrors):
-                    self.notifyError(self, ErrorEventType.HTTP, str(statusResponse.status_code), 'Could not fetch data due to server error')
-                    raise RetrievalError(f'Could not fetch data. Status Code was: {statusResponse.status_code}')
-            except requests.exceptions.ConnectionError as connectionError:
-                self.notifyError(self, ErrorEventType.CONNECTION, 'connection', 'Could not fetch data due to connection problem')
-                raise RetrievalError from connectionError
-            except requests.exceptions.ChunkedEncodingError as chunkedEncodingError:
-                self.notifyError(self, ErrorEventType.CONNECTION, 'chunked encoding error',
-                                 'Could not fetch data due to connection problem with chunked encoding')
-                raise RetrievalError from chunkedEncodingError
-            except requests.exceptions.ReadTimeout as timeoutError:
-                self.notifyError(self, ErrorEventType.TIMEOUT, 'timeout', 'Could not fetch data due to timeout')
-                raise RetrievalError from timeoutError
-            except requests.exceptions.RetryError as retryError:
-                raise RetrievalError from retryError
+                return self._processResponse(url, statusResponse, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors,
+                                             reauthorized=True)
+            return self._processResponse(url, statusResponse, data, allowEmpty=allowEmpty, allowHttpError=allowHttpError, allowedErrors=allowedErrors)
+        except requests.exceptions.ConnectionError as connectionError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'connection', 'Could not fetch data due to connection problem')
+            raise RetrievalError from connectionError
+        except requests.exceptions.ChunkedEncodingError as chunkedEncodingError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'chunked encoding error',
+                             'Could not fetch data due to connection problem with chunked encoding')
+            raise RetrievalError from chunkedEncodingError
+        except requests.exceptions.ReadTimeout as timeoutError:
+            self.notifyError(self, ErrorEventType.TIMEOUT, 'timeout', 'Could not fetch data due to timeout')
+            raise RetrievalError from timeoutError
+        except requests.exceptions.RetryError as retryError:
+            raise RetrievalError from retryError
+
+    def _processResponse(self, url, statusResponse, data=None, allowEmpty=False, allowHttpError=False, allowedErrors=None,  # noqa: C901
+                         reauthorized=False) -> Optional[Dict[str, Any]]:
+        """Turn the response of a data request into data, updates the cache and raises errors for failed requests.
+           Data is returned unchanged if an allowed http error occured or the server answered that the data was not modified."""
+        if statusResponse.status_code in (requests.codes['ok'], requests.codes['multiple_status']):
+            try:
+                data = statusResponse.json()
             except requests.exceptions.JSONDecodeError as jsonError:
                 if allowEmpty:
-                    data = None
-                else:
-                    self.notifyError(self, ErrorEventType.JSON, 'json', 'Could not fetch data due to error in returned data')
-                    raise RetrievalError from jsonError
+                    return None
+                self.notifyError(self, ErrorEventType.JSON, 'json', 'Could not fetch data due to error in returned data')
+                raise RetrievalError from jsonError
+            if self.cache is not None:
+                validators: Dict[str, str] = {header: statusResponse.headers[header] for header in ['ETag', 'Last-Modified']
+                                              if header in statusResponse.headers}
+                # The size of the response body is used instead of serializing the data again to limit the cache size
+                self.cache.put(url, data, validators=validators if validators else None, size=len(statusResponse.content))
+        elif statusResponse.status_code == requests.codes['not_modified'] and data is not None:
+            # Cached data is still valid, only its age is reset
+            self.__notModifiedCount += 1
+            if self.cache is not None:
+                self.cache.touch(url)
+        elif statusResponse.status_code == requests.codes['too_many_requests'] and not reauthorized:
+            self.notifyError(self, ErrorEventType.HTTP, str(statusResponse.status_code),
+                             'Could not fetch data due to too many requests from your account')
+            raise TooManyRequestsError('Could not fetch data due to too many requests from your account. '
+                                       f'Status Code was: {statusResponse.status_code}')
+        elif not allowHttpError or (allowedErrors is not None and statusResponse.status_code not in allowedErrors):
+            self.notifyError(self, ErrorEventType.HTTP, str(statusResponse.status_code), 'Could not fetch data due to server error')
+            if reauthorized:
+                raise RetrievalError(f'Could not fetch data even after re-authorization. Status Code was: {statusResponse.status_code}')
+            raise RetrievalError(f'Could not fetch data. Status Code was: {statusResponse.status_code}')
         return data
+
+    def fetchImageData(self, url: str) -> Optional[bytes]:
+        """Download an image
+
+        Args:
+            url (str): URL of the image
+
+        Returns:
+            Optional[bytes]: Content of the image file or None if the server did not provide the image
+        """
+        try:
+            generation: int = self.session.authGeneration
+            imageDownloadResponse: requests.Response = self.session.get(url, stream=True)
+            self.recordElapsed(imageDownloadResponse.elapsed)
+            if imageDownloadResponse.status_code == requests.codes['unauthorized']:
+                LOG.info('Server asks for new authorization')
+                self.login(generation)
+                imageDownloadResponse = self.session.get(url, stream=True)
+                self.recordElapsed(imageDownloadResponse.elapsed)
+                if imageDownloadResponse.status_code != requests.codes['ok']:
+                    self.notifyError(self, ErrorEventType.HTTP, str(imageDownloadResponse.status_code),
+                                     'Could not fetch vehicle image due to server error')
+                    raise RetrievalError('Could not retrieve vehicle image even after re-authorization.'
+                                         f' Status Code was: {imageDownloadResponse.status_code}')
+            if imageDownloadResponse.status_code == requests.codes['ok']:
+                return imageDownloadResponse.content
+            LOG.warning('Failed downloading picture %s with status code %d will try again in next update', url, imageDownloadResponse.status_code)
+            return None
+        except requests.exceptions.ConnectionError as connectionError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'connection', 'Could not fetch vehicle image due to connection problem')
+            raise RetrievalError from connectionError
+        except requests.exceptions.ChunkedEncodingError as chunkedEncodingError:
+            self.notifyError(self, ErrorEventType.CONNECTION, 'chunked encoding error',
+                             'Could not fetch vehicle image due to connection problem with chunked encoding')
+            raise RetrievalError from chunkedEncodingError
+        except requests.exceptions.ReadTimeout as timeoutError:
+            self.notifyError(self, ErrorEventType.TIMEOUT, 'timeout', 'Could not fetch vehicle image due to timeout')
+            raise RetrievalError from timeoutError
+        except requests.exceptions.RetryError as retryError:
+            raise RetrievalError from retryError